@@ -0,0 +1,101 @@
+"""Offline querying without the API: plans (or questions) in, results out, as JSON lines.
+
+    python -m app plans.jsonl > results.jsonl
+    echo '{"intent": "TOTAL_SALES", "metric": "sales", "filters": {"month": "2025-01"}}' | python -m app
+
+Each input line is a plan object, {"plan": {...}} or {"question": "..."}
+(questions go through the LLM planner), with an optional "id" or
+"request_id" that is echoed back. Output lines are {"id", "plan", "result"}
+or {"id", "error"}, in input order; the exit status is 1 if any line failed.
+--answer adds an "answer" to question lines only.
+The dataset loads from its snapshot in SNAPSHOT_DIR when one is fresh.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+from typing import Any, Dict, Iterator, List, Optional, TextIO
+
+from .config import settings
+from .engines.registry import DEFAULT_DATASET, EngineRegistry, parse_datasets
+from .query_log import json_default
+from .schemas import ParsedQuery
+
+
+def _lines(fh: TextIO) -> Iterator[str]:
+    for line in fh:
+        if line.strip():
+            yield line
+
+
+def run_line(engine: Any, line: str, answer: bool = False, approximate: bool = False) -> Dict[str, Any]:
+    """Executes one input line; errors are returned, not raised."""
+    out: Dict[str, Any] = {"id": None}
+    try:
+        obj = json.loads(line)
+        if not isinstance(obj, dict):
+            raise ValueError("Each line must be a JSON object")
+        out["id"] = obj.get("id", obj.get("request_id"))
+        if "question" in obj:
+            from .planner import parse_question_to_plan
+
+            plan = parse_question_to_plan(str(obj["question"]))
+        else:
+            plan = ParsedQuery.model_validate(obj.get("plan", {k: v for k, v in obj.items() if k not in ("id", "request_id")}))
+        out["plan"] = plan.model_dump(exclude_none=True)
+        if plan.intent in ("CLARIFICATION_REQUIRED", "UNSUPPORTED", "PDF_COMPARE"):
+            raise ValueError(f"{plan.intent} plans are not executed offline")
+        out["result"] = engine.execute_session(plan, approximate=approximate)[0]
+        if answer and "question" in obj:  # plan-only lines have no question to answer
+            from .answer_writer import write_answer
+
+            out["answer"] = write_answer(str(obj["question"]), plan, out["result"])
+    except Exception as e:
+        out.pop("result", None)
+        out["error"] = f"{type(e).__name__}: {e}"
+    return out
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(prog="python -m app", description="Run sales plans or questions from JSON lines.")
+    ap.add_argument("input", nargs="?", default="-", help="JSON-lines file ('-' = stdin)")
+    ap.add_argument("-o", "--output", default="-", help="JSON-lines output file ('-' = stdout)")
+    ap.add_argument("--dataset", default=DEFAULT_DATASET, help="dataset id from SALES_DATASETS")
+    ap.add_argument("--sales-file", help="query this file/directory/glob instead of the configured datasets")
+    ap.add_argument("--answer", action="store_true", help="also write an LLM answer per question line")
+    ap.add_argument("--approximate", action="store_true", help="estimate from the sample where possible (with intervals)")
+    args = ap.parse_args(argv)
+
+    if args.sales_file:  # no snapshot: it would be keyed like the configured default dataset
+        registry = EngineRegistry({DEFAULT_DATASET: args.sales_file}, 0)
+    else:
+        registry = EngineRegistry(parse_datasets(settings.sales_datasets, settings.sales_file), 0, settings.snapshot_dir)
+    try:
+        engine = registry.get(args.dataset)
+    except KeyError as e:
+        ap.error(str(e.args[0]))
+
+    src = sys.stdin if args.input == "-" else open(args.input, "r", encoding="utf-8")
+    dst = sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8")
+    failed = unanswered = 0
+    try:
+        for line in _lines(src):
+            out = run_line(engine, line, args.answer, args.approximate)
+            failed += "error" in out
+            unanswered += args.answer and "error" not in out and "answer" not in out
+            dst.write(json.dumps(out, default=json_default) + "\n")
+    finally:
+        if src is not sys.stdin:
+            src.close()
+        if dst is not sys.stdout:
+            dst.close()
+    if unanswered:
+        print(f"warning: --answer skipped {unanswered} plan line(s) without a question", file=sys.stderr)
+    if failed:
+        print(f"{failed} line(s) failed", file=sys.stderr)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,6 +1,7 @@
 from __future__ import annotations
 import json
 from typing import Any, Dict
+from .config import settings
 from .llm import responses_text
 from .schemas import ParsedQuery
 
@@ -15,11 +16,37 @@ Rules:
 - Do NOT invent missing metrics, trends, reasons, or additional calculations.
 - If the plan intent is CLARIFICATION_REQUIRED, ask the clarification_question.
 - If a table is present in result.table, summarize it briefly (top rows).
+  If result.table_truncated is true, only the top rows are shown; mention the total (table_total_rows).
+- For TOP_N, table rows carry rank, share and cum_share (fractions of result.total); result.others
+  holds everything outside the top N. For active_stores, cum_share counts each store once.
+- For STORE_COHORT, report current/previous active stores and the new, lost and retained counts;
+  result.table lists the new and lost stores.
+- For DRIVERS, report current vs previous and the delta, then the top rows of result.table
+  (dimension, group, delta, share_of_change = fraction of the total change); by_dimension holds the
+  top movers per dimension. For active_stores, per-group changes do not add up to the total.
+  Dimensions in single_valued (one value in both periods) and collapsed (same split as the named
+  dimension) are left out of the ranking; do not present them as drivers. If result.message says the
+  comparison period has no data, say so and give only the current value.
+- If result.approximate is true, the numbers are estimates from a data sample: say "approximately",
+  give the likely range ci_low..ci_high without quoting a confidence level, and offer to compute the
+  exact figure.
+  For approximate TOP_N, share, cum_share and others are estimates too, and others.groups counts only
+  groups seen in the sample.
+- If result.filter_resolution is present, state which data value a filter was matched to,
+  or, when it could not be matched, suggest the listed candidates.
 - Keep the answer concise and business-friendly.
 """
 
+def _preview(result: Dict[str, Any]) -> Dict[str, Any]:
+    """Caps result.table so large breakdowns don't blow up the prompt."""
+    table = result.get("table")
+    cap = settings.answer_table_preview
+    if not isinstance(table, list) or len(table) <= cap:
+        return result
+    return {**result, "table": table[:cap], "table_total_rows": len(table), "table_truncated": True}
+
 def write_answer(question: str, plan: ParsedQuery, result: Dict[str, Any]) -> str:
-    payload = {"question": question, "plan": plan.model_dump(), "result": result}
+    payload = {"question": question, "plan": plan.model_dump(exclude_none=True), "result": _preview(result)}
     prompt = f"""{ANSWER_INSTRUCTIONS}
 
 INPUT (JSON):
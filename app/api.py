@@ -1,13 +1,24 @@
 from __future__ import annotations
-from fastapi import FastAPI, HTTPException
+import time
+import uuid
+from typing import TYPE_CHECKING, Any, Dict, Literal, Optional
+
+from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import Response
 
-from .schemas import ChatRequest, ChatResponse, PdfCompareResponse
+from .schemas import ChatRequest, ChatResponse, ParsedQuery, PdfCompareResponse, ReportResponse, ResultPage
 from .planner import parse_question_to_plan
-from .engines.sales_engine import SalesEngine
-from .engines.pdf_compare import compare_po_pi
+from .engines.registry import DEFAULT_DATASET, EngineRegistry, parse_datasets
 from .answer_writer import write_answer
 from .config import settings
+from .results import ARROW_STREAM, decode_cursor, page, paginate_result, result_store, to_arrow_ipc
+from .reports import ReportCache, refresh_reports, report_cache
+from .sessions import SessionState, session_store
+from .query_log import query_log
+
+if TYPE_CHECKING:
+    from .engines.sales_engine import SalesEngine
 
 app = FastAPI(title="Accurate Sales + PDF Assistant")
 
@@ -19,47 +30,176 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-_sales_engine = None
+engines = EngineRegistry(
+    parse_datasets(settings.sales_datasets, settings.sales_file),
+    settings.engine_memory_mb * 1024 * 1024,
+    settings.snapshot_dir,
+    on_load=refresh_reports,
+)
 
-def sales_engine() -> SalesEngine:
-    global _sales_engine
-    if _sales_engine is None:
-        _sales_engine = SalesEngine.from_file(settings.sales_file)
-    return _sales_engine
+def sales_engine(dataset: Optional[str] = None) -> SalesEngine:
+    try:
+        return engines.get(dataset)
+    except KeyError as e:
+        raise HTTPException(status_code=404, detail=str(e.args[0]))
 
 @app.get("/")
 def health():
     return {"ok": True, "service": "Accurate Sales + PDF Assistant"}
 
+def _log_query(req: ChatRequest, sid: str, plan: ParsedQuery, timings: Dict[str, float], **extra: Any) -> None:
+    """Queues a query-log record (no-op unless QUERY_LOG is set); result hashing happens off the request path."""
+    if not query_log.enabled:
+        return
+    result = extra.pop("result", None)
+    record = {
+        "ts": time.time(), "session_id": sid, "dataset": req.dataset or DEFAULT_DATASET, "question": req.question,
+        "plan": plan.model_dump(exclude_none=True), **extra,
+        "timings_ms": {k: round(v * 1000, 3) for k, v in timings.items()},
+    }
+    query_log.log(record, result)
+
 @app.post("/chat", response_model=ChatResponse)
 def chat(req: ChatRequest):
-    plan = parse_question_to_plan(req.question)
+    t0 = time.perf_counter()
+    timings: Dict[str, float] = {}
+    sid = req.session_id or uuid.uuid4().hex
+    prior = session_store.get(sid)
+    plan = parse_question_to_plan(req.question, prior.plan if prior else None)
+    timings["plan"] = time.perf_counter() - t0
 
     if plan.intent == "CLARIFICATION_REQUIRED":
         result = {"clarification_required": True}
         answer = plan.clarification_question or "Could you clarify your request?"
-        return ChatResponse(plan=plan, result=result, answer=answer)
+        _log_query(req, sid, plan, dict(timings, total=time.perf_counter() - t0))
+        return ChatResponse(plan=plan, result=result, answer=answer, session_id=sid)
 
     if plan.intent == "UNSUPPORTED":
         result = {"unsupported": True}
         answer = "Sorry — I can only answer sales/active stores questions, or compare PO vs PI PDFs."
-        return ChatResponse(plan=plan, result=result, answer=answer)
+        _log_query(req, sid, plan, dict(timings, total=time.perf_counter() - t0))
+        return ChatResponse(plan=plan, result=result, answer=answer, session_id=sid)
 
     if plan.intent == "PDF_COMPARE":
         result = {"hint": "Call POST /pdf/compare to generate discrepancy report."}
         answer = "To compare the Purchase Order vs Proforma Invoice, call POST /pdf/compare (it generates CSV/JSON reports)."
-        return ChatResponse(plan=plan, result=result, answer=answer)
+        _log_query(req, sid, plan, dict(timings, total=time.perf_counter() - t0))
+        return ChatResponse(plan=plan, result=result, answer=answer, session_id=sid)
 
+    t1 = time.perf_counter()
     try:
-        result = sales_engine().execute(plan)
+        engine = sales_engine(req.dataset)
+        timings["engine"] = time.perf_counter() - t1
+        t1 = time.perf_counter()
+        hit = report_cache(req.dataset or DEFAULT_DATASET).match(engine, plan)
+        if hit is not None:
+            report, resolution = hit
+            result = dict(report.result, report=report.name)
+            if resolution:
+                result["filter_resolution"] = resolution
+            state = SessionState(plan=report.plan)
+        else:
+            result, state = engine.execute_session(plan, prior, approximate=req.approximate)
+    except HTTPException:
+        raise  # unknown dataset (404)
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
+    timings["execute"] = time.perf_counter() - t1
+    session_store.put(sid, state)
 
+    t1 = time.perf_counter()
+    # a report hit skips the engine only; the answer is written for this question's wording
     answer = write_answer(req.question, plan, result)
-    return ChatResponse(plan=plan, result=result, answer=answer)
+    timings["answer"] = time.perf_counter() - t1
+    response = ChatResponse(plan=plan, result=paginate_result(result, req.page_size, req.table_format), answer=answer, session_id=sid)
+    timings["total"] = time.perf_counter() - t0
+    # executed: the resolved plan the result came from; replaying it must reproduce result_hash
+    _log_query(
+        req, sid, plan, timings, executed=state.plan.model_dump(exclude_none=True),
+        report=report.name if hit is not None else None, backend=engine.backend,
+        approximate=bool(result.get("approximate")), result=result,
+    )
+    return response
+
+@app.get("/results", response_model=ResultPage)
+def result_page(
+    request: Request, cursor: str, limit: Optional[int] = None, table_format: Literal["rows", "columns"] = "rows",
+):
+    """Next page of a large result table. Send `Accept: application/vnd.apache.arrow.stream` for Arrow IPC."""
+    try:
+        rid, offset = decode_cursor(cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    cached = result_store.get(rid)
+    if cached is None:
+        raise HTTPException(status_code=404, detail="Result expired or unknown; re-run the question.")
+    table, _ = cached
+    limit = max(1, min(limit or settings.result_page_size, 10000))
+
+    if ARROW_STREAM in request.headers.get("accept", ""):
+        try:
+            body = to_arrow_ipc(table[offset:offset + limit])
+        except RuntimeError as e:
+            raise HTTPException(status_code=406, detail=str(e))
+        p = page(table, rid, offset, limit)
+        headers = {"X-Total-Rows": str(p["total_rows"])}
+        if p["next_cursor"]:
+            headers["X-Next-Cursor"] = p["next_cursor"]
+        return Response(content=body, media_type=ARROW_STREAM, headers=headers)
+
+    return ResultPage(**page(table, rid, offset, limit, table_format))
+
+@app.get("/datasets")
+def list_datasets():
+    return {"datasets": engines.datasets()}
+
+def reports_of(dataset: Optional[str] = None) -> ReportCache:
+    """The dataset's reports; loads the dataset only if they were never computed (not after an eviction)."""
+    dataset = dataset or DEFAULT_DATASET
+    if dataset not in engines.sources:
+        raise HTTPException(status_code=404, detail=f"Unknown dataset: {dataset}")
+    cache = report_cache(dataset)
+    if not cache.built:
+        sales_engine(dataset)
+    return cache
+
+@app.get("/reports")
+def list_reports(dataset: Optional[str] = None):
+    cache = reports_of(dataset)
+    return {"reports": [
+        {"name": r.name, "plan": r.plan, "computed_at": r.computed_at}
+        for r in (cache.get(n) for n in cache.names()) if r is not None
+    ]}
+
+@app.get("/reports/{name}", response_model=ReportResponse)
+def get_report(
+    name: str, dataset: Optional[str] = None, page_size: Optional[int] = None, table_format: Literal["rows", "columns"] = "rows",
+):
+    """A precomputed report; served from memory, no LLM or engine call."""
+    report = reports_of(dataset).get(name)
+    if report is None:
+        raise HTTPException(status_code=404, detail=f"Unknown report: {name}")
+    return ReportResponse(
+        name=report.name, plan=report.plan, result=paginate_result(report.result, page_size, table_format),
+        computed_at=report.computed_at,
+    )
+
+@app.post("/reports/refresh")
+def reload_reports(dataset: Optional[str] = None):
+    """Reloads the dataset from its sources and recomputes its reports."""
+    try:
+        engines.reload(dataset)
+    except KeyError as e:
+        raise HTTPException(status_code=404, detail=str(e.args[0]))
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    cache = report_cache(dataset or DEFAULT_DATASET)
+    return {"reports": cache.names(), "failed": cache.failed}
 
 @app.post("/pdf/compare", response_model=PdfCompareResponse)
 def pdf_compare():
+    from .engines.pdf_compare import compare_po_pi  # pdfplumber only loads for PDF work
+
     try:
         discrepancies, summary, csv_path, json_path = compare_po_pi(settings.po_pdf, settings.pi_pdf)
     except Exception as e:
@@ -4,11 +4,68 @@ from pydantic import BaseModel
 class Settings(BaseModel):
     openai_api_key: str = os.getenv("OPENAI_API_KEY", "")
     openai_model: str = os.getenv("OPENAI_MODEL", "gpt-5.2")
+    # Point at a compatible server (e.g. `python -m app.stub_llm`) instead of api.openai.com
+    openai_base_url: str = os.getenv("OPENAI_BASE_URL", "")
 
+    # LLM call shaping: concurrent in-flight calls, requests/sec (0 = unlimited) and retries
+    llm_max_concurrency: int = int(os.getenv("LLM_MAX_CONCURRENCY", "8"))
+    llm_rate_per_sec: float = float(os.getenv("LLM_RATE_PER_SEC", "0"))
+    llm_rate_burst: int = int(os.getenv("LLM_RATE_BURST", "10"))
+    llm_max_retries: int = int(os.getenv("LLM_MAX_RETRIES", "4"))
+    llm_backoff_base: float = float(os.getenv("LLM_BACKOFF_BASE", "0.5"))
+    llm_backoff_max: float = float(os.getenv("LLM_BACKOFF_MAX", "8"))
+
+    # A file, a directory or a glob of .xlsb/.csv/.parquet sources
     sales_file: str = os.getenv("SALES_FILE", "Sales_Active_Stores_Data.xlsb")
+    # More datasets served by the same process: "retail=/data/retail.xlsb,food=/data/food/" ("default" is SALES_FILE)
+    sales_datasets: str = os.getenv("SALES_DATASETS", "")
+    # Loaded datasets are evicted (least recently used first) above this total size
+    engine_memory_mb: int = int(os.getenv("ENGINE_MEMORY_MB", "4096"))
+    # Parquet snapshots evicted datasets are reloaded from ("" = always reload the sources)
+    snapshot_dir: str = os.getenv("SNAPSHOT_DIR", ".snapshots")
+    # Split each dataset across worker processes by "year" or "quarter" ("" = one in-process engine)
+    sales_shards: str = os.getenv("SALES_SHARDS", "")
+    # Comma-separated sheet names read from each xlsb source
+    sales_sheets: str = os.getenv("SALES_SHEETS", "Sales 2022 Onwards")
+    # Processes used to load several sources (0 = one per CPU)
+    sales_load_workers: int = int(os.getenv("SALES_LOAD_WORKERS", "0"))
+    sales_chunk_rows: int = int(os.getenv("SALES_CHUNK_ROWS", "50000"))
+    # Query execution: "pandas" (in-memory masks) or "duckdb" (SQL over a Parquet snapshot)
+    sales_backend: str = os.getenv("SALES_BACKEND", "pandas")
+    # Parquet snapshot written for the duckdb backend (empty = a temp file)
+    sales_snapshot: str = os.getenv("SALES_SNAPSHOT", "")
+    duckdb_threads: int = int(os.getenv("DUCKDB_THREADS", "0"))
     po_pdf: str = os.getenv("PO_PDF", "Purchase_Order_2025-12-12.pdf")
     pi_pdf: str = os.getenv("PI_PDF", "Proforma_Invoice_2025-12-12.pdf")
 
+    # Large BREAKDOWN tables: rows per page, cached full tables, rows shown to the answer writer
+    result_page_size: int = int(os.getenv("RESULT_PAGE_SIZE", "100"))
+    result_cache_size: int = int(os.getenv("RESULT_CACHE_SIZE", "256"))
+    result_cache_ttl_s: float = float(os.getenv("RESULT_CACHE_TTL_S", "900"))
+    answer_table_preview: int = int(os.getenv("ANSWER_TABLE_PREVIEW", "20"))
+
+    # Named reports precomputed on load ({name: plan} JSON; built-in defaults when missing)
+    reports_file: str = os.getenv("REPORTS_FILE", "reports.json")
+
+    # Approximate mode: sampled fraction per (month, channel) stratum (0 = off), minimum rows per stratum,
+    # nominal confidence level of the reported intervals and the sampling seed (the sample is built on first
+    # use); datasets below APPROX_MIN_DATASET_ROWS rows answer approximate requests exactly
+    approx_sample_frac: float = float(os.getenv("APPROX_SAMPLE_FRAC", "0.05"))
+    approx_min_rows: int = int(os.getenv("APPROX_MIN_ROWS", "30"))
+    approx_min_dataset_rows: int = int(os.getenv("APPROX_MIN_DATASET_ROWS", "1000000"))
+    approx_confidence: float = float(os.getenv("APPROX_CONFIDENCE", "0.95"))
+    approx_seed: int = int(os.getenv("APPROX_SEED", "0"))
+
+    # Follow-up questions: sessions kept, idle expiry, and the largest row set remembered per session
+    session_cache_size: int = int(os.getenv("SESSION_CACHE_SIZE", "1024"))
+    session_ttl_s: float = float(os.getenv("SESSION_TTL_S", "1800"))
+    session_max_rows: int = int(os.getenv("SESSION_MAX_ROWS", "2000000"))
+
+    # /chat query log for replay (JSON lines; "" = off), rotated above QUERY_LOG_MAX_MB
+    query_log: str = os.getenv("QUERY_LOG", "")
+    query_log_max_mb: int = int(os.getenv("QUERY_LOG_MAX_MB", "64"))
+    query_log_backups: int = int(os.getenv("QUERY_LOG_BACKUPS", "5"))
+    query_log_queue: int = int(os.getenv("QUERY_LOG_QUEUE", "10000"))
 
     debug: bool = os.getenv("DEBUG", "false").lower() == "true"
 
@@ -0,0 +1,84 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+# Period keys are YYYYMM integers: sortable, readable, cheap to compare.
+
+
+def period_key(year: int, month: int) -> int:
+    return int(year) * 100 + int(month)
+
+
+def parse_month(s: str) -> int:
+    """'2024-03' -> 202403."""
+    y, m = str(s).strip().split("-")
+    if not 1 <= int(m) <= 12:
+        raise ValueError(f"Invalid month: {s!r}")
+    return period_key(int(y), int(m))
+
+
+def format_key(key: int) -> str:
+    return f"{key // 100:04d}-{key % 100:02d}"
+
+
+def add_months(key: int, n: int) -> int:
+    i = (key // 100) * 12 + (key % 100 - 1) + n
+    return period_key(i // 12, i % 12 + 1)
+
+
+def quarter_range(s: str) -> Tuple[int, int]:
+    """'2024-Q2' -> (202404, 202406)."""
+    y, q = str(s).strip().upper().split("-Q")
+    q = int(q)
+    if not 1 <= q <= 4:
+        raise ValueError(f"Invalid quarter: {s!r}")
+    return period_key(int(y), 3 * q - 2), period_key(int(y), 3 * q)
+
+
+def year_range(y: int) -> Tuple[int, int]:
+    return period_key(int(y), 1), period_key(int(y), 12)
+
+
+@dataclass(frozen=True)
+class PeriodIndex:
+    """Period -> row offsets for a frame sorted by its period key column.
+
+    keys[i] occupies rows starts[i]:starts[i + 1].
+    """
+    keys: np.ndarray
+    starts: np.ndarray
+
+    @classmethod
+    def build(cls, sorted_keys: np.ndarray) -> "PeriodIndex":
+        keys, first = np.unique(sorted_keys, return_index=True)
+        starts = np.append(first, len(sorted_keys)).astype(np.int64)
+        return cls(keys=keys.astype(np.int64), starts=starts)
+
+    @property
+    def first(self) -> Optional[int]:
+        return int(self.keys[0]) if len(self.keys) else None
+
+    @property
+    def last(self) -> Optional[int]:
+        return int(self.keys[-1]) if len(self.keys) else None
+
+    def rows(self, lo: int, hi: int) -> Tuple[int, int]:
+        """Row slice [start, stop) covering periods lo..hi inclusive (binary search)."""
+        i = int(np.searchsorted(self.keys, lo, side="left"))
+        j = int(np.searchsorted(self.keys, hi, side="right"))
+        return int(self.starts[i]), int(self.starts[j])
+
+    def row_slices(self, ranges: List[Tuple[int, int]]) -> List[Tuple[int, int]]:
+        out = []
+        for lo, hi in sorted(ranges):
+            a, b = self.rows(lo, hi)
+            if a >= b:
+                continue
+            if out and a <= out[-1][1]:
+                out[-1] = (out[-1][0], max(out[-1][1], b))
+            else:
+                out.append((a, b))
+        return out
@@ -1,14 +1,23 @@
 from __future__ import annotations
 
+import glob
+import multiprocessing
+import os
 import re
-from typing import Optional, Tuple, Any
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple, Any
 
+import numpy as np
 import pandas as pd
+from pandas.api.types import union_categoricals
 
 from ..config import settings
 from .sales_schema import Cols
+from .periods import format_key
 
 SHEET_NAME = "Sales 2022 Onwards"
+SOURCE_SUFFIXES = (".xlsb", ".csv", ".parquet")
 
 
 COL_MAP = {
@@ -62,61 +71,361 @@ def _clean_str(v: Any) -> str:
         return ""
     return str(v).strip()
 
-def _normalize_month_to_num(series: pd.Series) -> pd.Series:
-    def to_month(v: Any) -> Optional[int]:
-        if pd.isna(v):
-            return None
-        x = _clean_str(v).upper()
-        x = re.sub(r"\s+", "", x)
-
-        if x.isdigit():
-            m = int(x)
-            return m if 1 <= m <= 12 else None
-
-        x3 = x[:3]
-        if x3 in MONTH_MAP:
-            return MONTH_MAP[x3]
-
-        for k, m in MONTH_MAP.items():
-            if k in x:
-                return m
+def _month_num(v: Any) -> Optional[int]:
+    if v is None or pd.isna(v):
         return None
+    if isinstance(v, (int, float, np.integer, np.floating)) and float(v).is_integer():
+        v = int(v)  # pyxlsb yields numeric months as floats
+    x = _clean_str(v).upper()
+    x = re.sub(r"\s+", "", x)
+
+    if x.isdigit():
+        m = int(x)
+        return m if 1 <= m <= 12 else None
+
+    x3 = x[:3]
+    if x3 in MONTH_MAP:
+        return MONTH_MAP[x3]
+
+    for k, m in MONTH_MAP.items():
+        if k in x:
+            return m
+    return None
 
-    return series.map(to_month)
+def _factorize_map(series: pd.Series, fn: Any) -> Tuple[np.ndarray, List[Any]]:
+    """Applies `fn` to the distinct values only: returns (codes, fn(uniques)); code -1 = missing."""
+    codes, uniques = pd.factorize(series, use_na_sentinel=True)
+    return codes, [fn(u) for u in uniques]
 
-def _require(df: pd.DataFrame, cols: list[str]) -> None:
+def _normalize_month_to_num(series: pd.Series) -> pd.Series:
+    # ~12 distinct spellings per sheet: parse those, then take by code
+    codes, months = _factorize_map(series, _month_num)
+    table = np.array([np.nan if m is None else m for m in months] + [np.nan], dtype=np.float64)
+    return pd.Series(table[codes], index=series.index)
+
+def _require(df: pd.DataFrame, cols: list[str], source: str = SHEET_NAME) -> None:
     missing = [c for c in cols if c not in df.columns]
     if missing:
         raise RuntimeError(
-            f"Sheet '{SHEET_NAME}' missing columns: {missing}. "
+            f"Sheet '{source}' missing columns: {missing}. "
             f"Available (first 50): {list(df.columns)[:50]}"
         )
 
-def load_sales_dataframe(path: Optional[str] = None) -> Tuple[pd.DataFrame, Cols]:
-    path = path or settings.sales_file
-    df = pd.read_excel(path, sheet_name=SHEET_NAME, engine="pyxlsb")
-    if df is None or df.empty:
-        raise RuntimeError(f"Sheet '{SHEET_NAME}' is empty or not found in {path}.")
-
-    # Require minimum columns to function
-    _require(df, [COL_MAP["year"], COL_MAP["month"], COL_MAP["sales_value"], COL_MAP["store_id"]])
-
-    # Standard helpers
-    df["_year"] = pd.to_numeric(df[COL_MAP["year"]], errors="coerce").astype("Int64")
-    df["_month_num"] = _normalize_month_to_num(df[COL_MAP["month"]]).astype("Int64")
-    df = df.dropna(subset=["_year", "_month_num"])
+def _store_id(v: Any) -> Optional[str]:
+    if v is None or (isinstance(v, float) and pd.isna(v)):
+        return None
+    # pyxlsb yields numbers as floats: 13365.0 -> "13365"
+    if isinstance(v, float) and v.is_integer():
+        return str(int(v))
+    return str(v).strip()
 
-    df["_period"] = df["_year"].astype(int).astype(str) + "-" + df["_month_num"].astype(int).astype(str).str.zfill(2)
-    df["_quarter"] = df["_year"].astype(int).astype(str) + "-Q" + (((df["_month_num"].astype(int) - 1) // 3) + 1).astype(str)
 
-    df["_sales"] = pd.to_numeric(df[COL_MAP["sales_value"]], errors="coerce").fillna(0.0).astype(float)
-    df["_store_id"] = df[COL_MAP["store_id"]].astype(str).str.strip()
+def _label(v: Any) -> Any:
+    # pyxlsb yields numbers as floats; label integral ones like read_excel did: 0.0 -> "0"
+    if isinstance(v, float) and v.is_integer():
+        return str(int(v))
+    return v
+
+
+class _CategoricalBuilder:
+    """Accumulates a column as int32 codes against a growing category table."""
+
+    def __init__(self) -> None:
+        self.codes: Dict[Any, int] = {}
+        self.categories: List[Any] = []
+        self.chunks: List[np.ndarray] = []
+
+    def add(self, values: pd.Series) -> None:
+        self.add_codes(*_factorize_map(values, _label))
+
+    def add_codes(self, local: np.ndarray, uniques: Any) -> None:
+        """Adds a chunk given as local codes into `uniques` (None entries count as missing;
+        equal entries share one category)."""
+        remap = np.empty(len(uniques), dtype=np.int32)
+        for i, u in enumerate(uniques):
+            if u is None:
+                remap[i] = -1
+                continue
+            code = self.codes.get(u)
+            if code is None:
+                code = self.codes[u] = len(self.categories)
+                self.categories.append(u)
+            remap[i] = code
+        out = np.full(len(local), -1, dtype=np.int32)
+        has = local >= 0
+        out[has] = remap[local[has]]
+        self.chunks.append(out)
+
+    def finish(self, order: Optional[np.ndarray] = None) -> pd.Categorical:
+        codes = np.concatenate(self.chunks) if self.chunks else np.empty(0, dtype=np.int32)
+        self.chunks = []
+        if order is not None:
+            codes = codes[order]
+        return pd.Categorical.from_codes(codes, categories=pd.Index(self.categories, dtype=object))
+
+
+class _NumericBuilder:
+    """Accumulates a numeric column. With infer_int, all-integral columns come back
+    as int64, matching what read_excel produced for the sheet's id/number columns."""
+
+    def __init__(self, dtype: str = "float64", infer_int: bool = False) -> None:
+        self.dtype = dtype
+        self.infer_int = infer_int
+        self.chunks: List[np.ndarray] = []
+
+    def add(self, values: pd.Series) -> None:
+        if self.dtype == "float64":
+            self.chunks.append(pd.to_numeric(values, errors="coerce").to_numpy(dtype=np.float64, na_value=np.nan))
+        else:
+            self.chunks.append(values.to_numpy(dtype=self.dtype))
+
+    def finish(self, order: Optional[np.ndarray] = None) -> np.ndarray:
+        arr = np.concatenate(self.chunks) if self.chunks else np.empty(0, dtype=self.dtype)
+        self.chunks = []
+        if order is not None:
+            arr = arr[order]
+        if self.infer_int and len(arr) and not np.isnan(arr).any() and np.array_equal(arr, np.floor(arr)):
+            return arr.astype(np.int64)
+        return arr
+
+
+def _key_labels(keys: np.ndarray, fmt: Any) -> pd.Categorical:
+    codes, uniq = pd.factorize(keys, sort=True)
+    return pd.Categorical.from_codes(codes, categories=[fmt(int(k)) for k in uniq])
+
+
+def _is_numeric(values: pd.Series) -> bool:
+    return values.dtype.kind in "fiu"
+
+
+def _iter_sheet_chunks(path: str, chunk_rows: int, sheet_name: str = SHEET_NAME) -> Iterator[pd.DataFrame]:
+    """Streams the sheet as DataFrames of at most `chunk_rows` rows."""
+    from pyxlsb import open_workbook
+
+    with open_workbook(path) as wb:
+        try:
+            sheet = wb.get_sheet(sheet_name)
+        except (ValueError, IndexError):
+            raise RuntimeError(f"Sheet '{sheet_name}' is empty or not found in {path}.")
+        with sheet:
+            rows = sheet.rows()
+            header_row = next(rows, None)
+            if header_row is None:
+                return
+            header = [c.v if c.v is not None else f"Unnamed: {i}" for i, c in enumerate(header_row)]
+            width = len(header)
+
+            buf: List[List[Any]] = []
+            for row in rows:
+                vals = [c.v for c in row[:width]]
+                if all(v is None for v in vals):
+                    continue
+                if len(vals) < width:
+                    vals.extend([None] * (width - len(vals)))
+                buf.append(vals)
+                if len(buf) >= chunk_rows:
+                    yield pd.DataFrame(buf, columns=header)
+                    buf = []
+            if buf:
+                yield pd.DataFrame(buf, columns=header)
+
+
+def _iter_parquet_chunks(path: str, chunk_rows: int) -> Iterator[pd.DataFrame]:
+    try:
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise RuntimeError(f"Reading Parquet sources requires pyarrow ({path}).")
+    for batch in pq.ParquetFile(path).iter_batches(batch_size=chunk_rows):
+        yield batch.to_pandas()
+
+
+def _iter_source_chunks(path: str, sheet_name: str, chunk_rows: int) -> Iterator[pd.DataFrame]:
+    suffix = Path(path).suffix.lower()
+    if suffix == ".csv":
+        yield from pd.read_csv(path, chunksize=chunk_rows)
+    elif suffix == ".parquet":
+        yield from _iter_parquet_chunks(path, chunk_rows)
+    else:
+        yield from _iter_sheet_chunks(path, chunk_rows, sheet_name)
+
+
+def _load_source(path: str, sheet_name: str = SHEET_NAME, chunk_rows: Optional[int] = None) -> pd.DataFrame:
+    """Streams one source in row chunks straight into typed, encoded columns.
+
+    Text columns become categoricals (int32 codes), numbers stay numeric, and the
+    derived helper columns are computed per chunk, so peak memory stays close to
+    the final frame instead of an all-object copy of the sheet.
+    """
+    chunk_rows = chunk_rows or settings.sales_chunk_rows
+    label = sheet_name if Path(path).suffix.lower() == ".xlsb" else path
+
+    builders: Dict[str, Any] = {}
+    header: List[str] = []
+    derived = {
+        "_year": _NumericBuilder("int32"),
+        "_month_num": _NumericBuilder("int8"),
+        "_period_key": _NumericBuilder("int64"),
+        "_sales": _NumericBuilder("float64"),
+        "_store_id": _CategoricalBuilder(),
+    }
+
+    for chunk in _iter_source_chunks(path, sheet_name, chunk_rows):
+        if not header:
+            header = list(chunk.columns)
+            # Require minimum columns to function
+            _require(chunk, [COL_MAP["year"], COL_MAP["month"], COL_MAP["sales_value"], COL_MAP["store_id"]], label)
+
+        # Standard helpers
+        year = pd.to_numeric(chunk[COL_MAP["year"]], errors="coerce")
+        month = _normalize_month_to_num(chunk[COL_MAP["month"]])
+        keep = (year.notna() & month.notna()).to_numpy()
+        if not keep.all():
+            chunk, year, month = chunk[keep], year[keep], month[keep]
+        if chunk.empty:
+            continue
+        year = year.astype("int64")
+        month = month.astype("int64")
+
+        derived["_year"].add(year)
+        derived["_month_num"].add(month)
+        derived["_period_key"].add(year * 100 + month)
+        derived["_sales"].add(pd.to_numeric(chunk[COL_MAP["sales_value"]], errors="coerce").fillna(0.0))
+        derived["_store_id"].add_codes(*_factorize_map(chunk[COL_MAP["store_id"]], _store_id))
+
+        for col in header:
+            values = chunk[col]
+            b = builders.get(col)
+            if b is None:
+                b = builders[col] = _NumericBuilder(infer_int=True) if _is_numeric(values) else _CategoricalBuilder()
+            elif isinstance(b, _NumericBuilder) and not _is_numeric(values) and values.notna().any():
+                # Text showed up in a numeric column: re-encode what we have as categories
+                cat = _CategoricalBuilder()
+                for prev in b.chunks:
+                    cat.add(pd.Series(prev))
+                b = builders[col] = cat
+            b.add(values)
+
+    if not header or not derived["_period_key"].chunks:
+        raise RuntimeError(f"Sheet '{label}' is empty or not found in {path}.")
+
+    # Rows sorted by YYYYMM key so any period range is a contiguous slice (see data.periods)
+    keys = np.concatenate(derived["_period_key"].chunks)
+    order = None if bool(np.all(keys[:-1] <= keys[1:])) else np.argsort(keys, kind="stable")
+
+    data: Dict[str, Any] = {}
+    for name, b in [*builders.items(), *derived.items()]:
+        data[name] = b.finish(order)
+
+    # Period/quarter labels from integer keys: format each distinct key once
+    keys = data["_period_key"]
+    data["_period"] = _key_labels(keys, format_key)
+    data["_quarter"] = _key_labels((keys // 100) * 10 + (keys % 100 - 1) // 3 + 1, lambda k: f"{k // 10}-Q{k % 10}")
+
+    return pd.DataFrame(data, copy=False)
+
+
+def resolve_sources(path: str, sheets: Optional[List[str]] = None) -> List[Tuple[str, str]]:
+    """Expands a file, directory or glob into (file, sheet) sources.
+
+    Each xlsb file contributes one source per sheet; CSV/Parquet files one each.
+    """
+    sheets = sheets or [SHEET_NAME]
+    p = Path(path)
+    if p.is_dir():
+        files = sorted(str(f) for f in p.iterdir() if f.suffix.lower() in SOURCE_SUFFIXES)
+    elif glob.has_magic(path):
+        files = sorted(f for f in glob.glob(path) if Path(f).suffix.lower() in SOURCE_SUFFIXES)
+    else:
+        files = [path]
+    if not files:
+        raise RuntimeError(f"No sales sources found at {path}.")
+    return [(f, sh) for f in files for sh in (sheets if Path(f).suffix.lower() == ".xlsb" else [SHEET_NAME])]
+
+
+def _source_labels(sources: List[Tuple[str, str]], multi_sheet: bool) -> List[str]:
+    """Unique `_source` labels: each file's path relative to the matched files' common directory."""
+    paths = [os.path.abspath(f) for f, _ in sources]
+    root = os.path.commonpath([os.path.dirname(p) for p in paths])
+    labels: List[str] = []
+    for p, (f, sh) in zip(paths, sources):
+        label = Path(os.path.relpath(p, root)).as_posix() + (f"#{sh}" if multi_sheet and f.lower().endswith(".xlsb") else "")
+        base, n = label, 2
+        while label in labels:
+            label, n = f"{base} ({n})", n + 1
+        labels.append(label)
+    return labels
+
+
+def _load_source_task(args: Tuple[str, str, int]) -> pd.DataFrame:
+    return _load_source(*args)
+
+
+def _concat_sources(frames: List[pd.DataFrame], labels: List[str]) -> pd.DataFrame:
+    """Unifies per-source frames: categories are merged, missing columns become NA."""
+    names: List[str] = []
+    for f in frames:
+        names.extend(c for c in f.columns if c not in names)
+
+    data: Dict[str, Any] = {}
+    for name in names:
+        parts = [f[name] if name in f.columns else pd.Series(np.nan, index=f.index) for f in frames]
+        if any(isinstance(x.dtype, pd.CategoricalDtype) for x in parts):
+            data[name] = union_categoricals(
+                [x.array if isinstance(x.dtype, pd.CategoricalDtype) else pd.Categorical(x.astype(object)) for x in parts],
+                ignore_order=True,
+            )
+        else:
+            data[name] = np.concatenate([x.to_numpy() for x in parts])
+        # release each source column as soon as it is merged
+        for f in frames:
+            if name in f.columns:
+                del f[name]
+
+    codes = np.concatenate([np.full(len(f), i, dtype=np.int32) for i, f in enumerate(frames)])
+    data["_source"] = pd.Categorical.from_codes(codes, categories=labels)
+    df = pd.DataFrame(data, copy=False)
+
+    # Each source is period-sorted; the union needs one more stable sort
+    keys = df["_period_key"].to_numpy()
+    if not bool(np.all(keys[:-1] <= keys[1:])):
+        df = df.take(np.argsort(keys, kind="stable")).reset_index(drop=True)
+    return df
+
+
+def load_sales_dataframe(path: Optional[str] = None, chunk_rows: Optional[int] = None, sheets: Optional[List[str]] = None) -> Tuple[pd.DataFrame, Cols]:
+    """Loads one or many sources: a file, directory or glob of xlsb/CSV/Parquet.
+
+    Sources are loaded concurrently in a process pool and unified against
+    COL_MAP; every row is tagged with its source in `_source`.
+    """
+    path = path or settings.sales_file
+    chunk_rows = chunk_rows or settings.sales_chunk_rows
+    sheets = sheets or [s.strip() for s in settings.sales_sheets.split(",") if s.strip()]
+
+    sources = resolve_sources(path, sheets)
+    labels = _source_labels(sources, len(sheets) > 1)
+
+    tasks = [(f, sh, chunk_rows) for f, sh in sources]
+    workers = min(len(tasks), settings.sales_load_workers or os.cpu_count() or 1)
+    if workers <= 1:
+        frames = [_load_source_task(t) for t in tasks]
+    else:
+        # spawn: workers start clean instead of forking a threaded server
+        with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as ex:
+            frames = list(ex.map(_load_source_task, tasks))
+
+    if len(frames) == 1:
+        df = frames[0]
+        df["_source"] = pd.Categorical.from_codes(np.zeros(len(df), dtype=np.int32), categories=labels)
+    else:
+        df = _concat_sources(frames, labels)
 
     # Build Cols mapping (engine uses these)
     cols = Cols(
         date="_period",
         year="_year",
         quarter="_quarter",
+        period_key="_period_key",
         sales="_sales",
 
         brand=COL_MAP.get("brand") if COL_MAP.get("brand") in df.columns else None,
@@ -148,6 +457,8 @@ def load_sales_dataframe(path: Optional[str] = None) -> Tuple[pd.DataFrame, Cols
         segment=COL_MAP.get("segment") if COL_MAP.get("segment") in df.columns else None,
         sub_brand=COL_MAP.get("sub_brand") if COL_MAP.get("sub_brand") in df.columns else None,
         promo=COL_MAP.get("promo") if COL_MAP.get("promo") in df.columns else None,
+
+        source="_source",
     )
 
     return df, cols
@@ -9,6 +9,7 @@ class Cols:
     date: str
     year: str
     quarter: str
+    period_key: Optional[str] = None  # int YYYYMM; rows sorted by it
 
     # Metrics
     sales: Optional[str] = None
@@ -42,3 +43,6 @@ class Cols:
     segment: Optional[str] = None
     sub_brand: Optional[str] = None
     promo: Optional[str] = None
+
+    # Which file/sheet each row was loaded from
+    source: Optional[str] = None
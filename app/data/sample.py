@@ -0,0 +1,56 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from .periods import PeriodIndex
+
+WEIGHT = "_w"  # N_h / n_h: rows of the full data each sampled row stands for
+STRATUM = "_stratum"
+
+
+@dataclass(frozen=True)
+class StratifiedSample:
+    """Rows sampled without replacement within each (period, channel) stratum.
+
+    df holds the sampled rows (period-sorted, with WEIGHT and STRATUM columns);
+    pop[h] and size[h] are the full and sampled row counts of stratum h.
+    """
+    df: pd.DataFrame
+    periods: PeriodIndex
+    pop: np.ndarray
+    size: np.ndarray
+
+    @classmethod
+    def build(
+        cls, df: pd.DataFrame, period_key: str, channel: Optional[str], frac: float, min_rows: int, seed: int = 0,
+    ) -> "StratifiedSample":
+        """`df` must be sorted by period_key; each stratum keeps max(min_rows, frac * N_h) rows (all when fewer)."""
+        keys = df[period_key].to_numpy()
+        _, period_codes = np.unique(keys, return_inverse=True)
+        if channel is not None:
+            ch_codes, ch_labels = pd.factorize(df[channel])
+            strata = period_codes.astype(np.int64) * (len(ch_labels) + 1) + (ch_codes + 1)
+        else:
+            strata = period_codes.astype(np.int64)
+        _, strata = np.unique(strata, return_inverse=True)
+
+        pop = np.bincount(strata).astype(np.int64)
+        size = np.minimum(pop, np.maximum(min_rows, np.ceil(pop * frac).astype(np.int64)))
+
+        # random order within each stratum, keep the first size[h]
+        rng = np.random.default_rng(seed)
+        perm = rng.permutation(len(df))
+        order = perm[np.argsort(strata[perm], kind="stable")]
+        starts = np.concatenate(([0], np.cumsum(pop)[:-1]))
+        rank = np.arange(len(order)) - starts[strata[order]]
+        rows = np.sort(order[rank < size[strata[order]]])
+
+        sample = df.take(rows).reset_index(drop=True)
+        h = strata[rows]
+        sample[STRATUM] = h.astype(np.int32)
+        sample[WEIGHT] = pop[h] / size[h]
+        return cls(df=sample, periods=PeriodIndex.build(sample[period_key].to_numpy()), pop=pop, size=size)
@@ -0,0 +1,72 @@
+from __future__ import annotations
+
+import dataclasses
+import json
+import os
+from typing import Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .sales_schema import Cols
+
+
+def text_columns(df: pd.DataFrame) -> pd.DataFrame:
+    """Mixed-type object columns (e.g. 'DOHA' and 0.0 in one column) as text.
+
+    Filters and group labels already compare str() of the value, so this
+    keeps results identical while giving every column a single columnar type.
+    """
+    out = {}
+    for col in df.columns:
+        s = df[col]
+        if isinstance(s.dtype, pd.CategoricalDtype) and s.cat.categories.dtype == object:
+            labels = s.cat.categories.map(str)
+            if labels.is_unique:
+                out[col] = s.cat.rename_categories(labels)
+            else:
+                out[col] = s.astype(str).where(s.notna()).astype("category")
+        elif s.dtype == object:
+            out[col] = s.map(str).where(s.notna())
+    return df.assign(**out) if out else df
+
+
+def _cols_path(path: str) -> str:
+    return path + ".cols.json"
+
+
+def write_snapshot(df: pd.DataFrame, cols: Cols, path: str) -> None:
+    """Parquet copy of a loaded frame plus its column mapping (needs pyarrow)."""
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp = path + ".tmp"
+    text_columns(df).to_parquet(tmp, index=False)
+    os.replace(tmp, path)
+    with open(_cols_path(path), "w", encoding="utf-8") as fh:
+        json.dump(dataclasses.asdict(cols), fh)
+
+
+def read_cols(path: str) -> Cols:
+    with open(_cols_path(path), "r", encoding="utf-8") as fh:
+        return Cols(**json.load(fh))
+
+
+def read_snapshot(path: str, periods: Optional[Tuple[int, int]] = None) -> Tuple[pd.DataFrame, Cols]:
+    """The snapshot, or only the rows whose period key is within `periods` (inclusive)."""
+    cols = read_cols(path)
+    if periods is None or cols.period_key is None:
+        return pd.read_parquet(path), cols
+    lo, hi = periods
+    return pd.read_parquet(path, filters=[(cols.period_key, ">=", lo), (cols.period_key, "<=", hi)]), cols
+
+
+def snapshot_periods(path: str) -> np.ndarray:
+    """Sorted distinct period keys in a snapshot (reads that column only)."""
+    cols = read_cols(path)
+    if cols.period_key is None:
+        return np.empty(0, dtype=np.int64)
+    keys = pd.read_parquet(path, columns=[cols.period_key])[cols.period_key].to_numpy()
+    return np.unique(keys).astype(np.int64)
+
+
+def has_snapshot(path: str) -> bool:
+    return os.path.exists(path) and os.path.exists(_cols_path(path))
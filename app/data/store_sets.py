@@ -0,0 +1,43 @@
+from __future__ import annotations
+
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from .periods import PeriodIndex
+
+
+class StoreSets:
+    """Per-period sorted arrays of active store codes (stores with sales > 0).
+
+    Built once over the period-sorted frame; a multi-period set is the union
+    of its months, so cohort questions need no scan when no dimension filter
+    is applied.
+    """
+
+    def __init__(self, by_period: Dict[int, np.ndarray]):
+        self.by_period = by_period
+
+    @classmethod
+    def build(cls, periods: PeriodIndex, store_codes: np.ndarray, sales: np.ndarray) -> "StoreSets":
+        by_period: Dict[int, np.ndarray] = {}
+        for i, key in enumerate(periods.keys):
+            a, b = int(periods.starts[i]), int(periods.starts[i + 1])
+            codes = store_codes[a:b][(sales[a:b] > 0) & (store_codes[a:b] >= 0)]
+            by_period[int(key)] = np.unique(codes)
+        return cls(by_period)
+
+    def stores(self, ranges: List[Tuple[int, int]]) -> np.ndarray:
+        parts = [s for k, s in self.by_period.items() if any(lo <= k <= hi for lo, hi in ranges)]
+        if not parts:
+            return np.empty(0, dtype=np.int32)
+        return np.unique(np.concatenate(parts))
+
+
+def cohort(current: np.ndarray, previous: np.ndarray) -> Dict[str, np.ndarray]:
+    """new / lost / retained between two sorted unique code arrays."""
+    return {
+        "new": np.setdiff1d(current, previous, assume_unique=True),
+        "lost": np.setdiff1d(previous, current, assume_unique=True),
+        "retained": np.intersect1d(current, previous, assume_unique=True),
+    }
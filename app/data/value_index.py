@@ -0,0 +1,192 @@
+from __future__ import annotations
+
+import bisect
+import re
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Optional, Tuple, get_args
+
+import pandas as pd
+
+from ..schemas import Dimension
+from .sales_schema import Cols
+
+# Filters that map to a categorical column and can be resolved against its values
+DIMENSIONS: List[str] = list(get_args(Dimension))
+
+_NON_ALNUM = re.compile(r"[^0-9a-z]+")
+
+# Fuzzy matches are only applied when clearly better than the runner-up
+AUTO_RESOLVE_SCORE = 0.75
+AUTO_RESOLVE_MARGIN = 0.1
+
+
+def normalize_value(v: Any) -> str:
+    """Lowercase, punctuation-free, single-spaced form used for matching."""
+    return _NON_ALNUM.sub(" ", str(v).lower()).strip()
+
+
+def _grams(s: str) -> List[str]:
+    p = f"  {s} "
+    return [p[i:i + 3] for i in range(len(p) - 2)]
+
+
+@dataclass
+class ValueIndex:
+    """Distinct values of one dimension, indexed for exact, prefix and trigram lookup."""
+    values: List[str]                       # canonical values as they appear in the data
+    norms: List[str]                        # normalize_value(values[i])
+    exact: Dict[str, int] = field(default_factory=dict)
+    sorted_norms: List[Tuple[str, int]] = field(default_factory=list)
+    grams: Dict[str, List[int]] = field(default_factory=dict)
+
+    @classmethod
+    def build(cls, raw_values: Iterable[Any]) -> "ValueIndex":
+        values = sorted({str(v).strip() for v in raw_values if v is not None and not pd.isna(v) and str(v).strip()})
+        norms = [normalize_value(v) for v in values]
+        idx = cls(values=values, norms=norms)
+        for i, n in enumerate(norms):
+            idx.exact.setdefault(n, i)
+            for g in set(_grams(n)):
+                idx.grams.setdefault(g, []).append(i)
+        idx.sorted_norms = sorted((n, i) for i, n in enumerate(norms))
+        return idx
+
+    def lookup(self, raw: str) -> Optional[str]:
+        i = self.exact.get(normalize_value(raw))
+        return self.values[i] if i is not None else None
+
+    def prefix_ids(self, prefix: str) -> List[int]:
+        p = normalize_value(prefix)
+        if not p:
+            return []
+        lo = bisect.bisect_left(self.sorted_norms, (p, -1))
+        out: List[int] = []
+        for n, i in self.sorted_norms[lo:]:
+            if not n.startswith(p):
+                break
+            out.append(i)
+        return out
+
+    def contains_ids(self, pattern: str) -> List[int]:
+        p = normalize_value(pattern)
+        if not p:
+            return []
+        if len(p) < 3:
+            return [i for i, n in enumerate(self.norms) if p in n]
+        # Intersect trigram postings (rarest first), then verify the substring
+        postings = sorted((self.grams.get(p[i:i + 3], []) for i in range(len(p) - 2)), key=len)
+        ids = set(postings[0])
+        for post in postings[1:]:
+            if not ids:
+                break
+            ids.intersection_update(post)
+        return sorted(i for i in ids if p in self.norms[i])
+
+    def match(self, op: str, patterns: List[str]) -> List[str]:
+        """Expands an in/contains/prefix match into the matching canonical values."""
+        ids: set = set()
+        for pat in patterns:
+            if op == "contains":
+                ids.update(self.contains_ids(pat))
+            elif op == "prefix":
+                ids.update(self.prefix_ids(pat))
+            else:
+                hit, _ = self.resolve(pat)
+                if hit is not None:
+                    ids.add(self.exact[normalize_value(hit)])
+        return [self.values[i] for i in sorted(ids)]
+
+    def candidates(self, raw: str, k: int = 5) -> List[Tuple[str, float]]:
+        """Top-k values by trigram Dice similarity."""
+        q = normalize_value(raw)
+        qg = set(_grams(q))
+        if not qg:
+            return []
+        shared: Counter = Counter()
+        for g in qg:
+            for i in self.grams.get(g, ()):
+                shared[i] += 1
+        scored = [
+            (self.values[i], 2.0 * c / (len(qg) + len(set(_grams(self.norms[i])))))
+            for i, c in shared.items()
+        ]
+        scored.sort(key=lambda t: (-t[1], t[0]))
+        return [(v, round(s, 3)) for v, s in scored[:k]]
+
+    def resolve(self, raw: str) -> Tuple[Optional[str], List[Tuple[str, float]]]:
+        """Returns (canonical value or None, ranked candidates when unresolved)."""
+        hit = self.lookup(raw)
+        if hit is not None:
+            return hit, []
+
+        # "majid al futtaim" -> the single value starting with it
+        ids = self.prefix_ids(raw)
+        if len(ids) == 1:
+            return self.values[ids[0]], []
+
+        cands = self.candidates(raw)
+        if cands and cands[0][1] >= AUTO_RESOLVE_SCORE:
+            runner_up = cands[1][1] if len(cands) > 1 else 0.0
+            if cands[0][1] - runner_up >= AUTO_RESOLVE_MARGIN:
+                return cands[0][0], []
+        return None, cands
+
+
+class DimensionIndex:
+    """Per-dimension value dictionaries built once from the loaded data."""
+
+    def __init__(self, indexes: Dict[str, ValueIndex]):
+        self.indexes = indexes
+
+    @classmethod
+    def build(cls, df: pd.DataFrame, cols: Cols) -> "DimensionIndex":
+        indexes: Dict[str, ValueIndex] = {}
+        for dim in DIMENSIONS:
+            col = getattr(cols, dim, None)
+            if col is None or col not in df.columns:
+                continue
+            series = df[col]
+            raw = series.cat.categories if isinstance(series.dtype, pd.CategoricalDtype) else series.unique()
+            indexes[dim] = ValueIndex.build(raw)
+        return cls(indexes)
+
+    def get(self, dim: str) -> Optional[ValueIndex]:
+        return self.indexes.get(dim)
+
+    def resolve_filters(self, filters: Dict[str, Any]) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        """Maps filter values to canonical data values.
+
+        Returns the updated filters dict and a report of every value that was
+        rewritten or could not be matched (with ranked candidates).
+        """
+        out = dict(filters)
+        report: Dict[str, Any] = {}
+
+        if filters.get("match"):
+            expanded = []
+            for m in filters["match"]:
+                idx = self.indexes.get(m["dim"])
+                if idx is None:
+                    continue
+                values = idx.match(m["op"], m["values"])
+                expanded.append({"dim": m["dim"], "op": "in", "values": values})
+                if m["op"] != "in" or len(values) != len(m["values"]):
+                    report[f"{m['dim']}:{m['op']}"] = {"requested": m["values"], "matched": values[:20], "matched_count": len(values)}
+            out["match"] = expanded
+
+        for dim, raw in filters.items():
+            if not isinstance(raw, str) or not raw.strip():
+                continue
+            idx = self.indexes.get(dim)
+            if idx is None:
+                continue
+            canonical, cands = idx.resolve(raw)
+            if canonical is None:
+                report[dim] = {"requested": raw, "resolved": None, "candidates": [v for v, _ in cands]}
+            elif normalize_value(canonical) != normalize_value(raw):
+                out[dim] = canonical
+                report[dim] = {"requested": raw, "resolved": canonical}
+            else:
+                out[dim] = canonical
+        return out, report
@@ -0,0 +1,174 @@
+from __future__ import annotations
+
+from statistics import NormalDist
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from ..config import settings
+from ..data.sample import STRATUM, WEIGHT, StratifiedSample
+from ..data.sales_schema import Cols
+from ..schemas import ParsedQuery
+from .sales_engine import PlanValidationError, _apply_filters, _group_col, _time_ranges, _top_n_result
+
+APPROX_INTENTS = ("TOTAL_SALES", "TOTAL_ACTIVE_STORES", "BREAKDOWN", "TOP_N")
+
+
+def _t_quantile(p: float, dof: np.ndarray) -> np.ndarray:
+    """Student t quantile per degrees of freedom (rounded down; inf = normal).
+
+    Exact for 1 and 2 degrees of freedom, the Cornish-Fisher expansion in
+    1/dof above (within 0.2% of the exact value from 3 up).
+    """
+    z = NormalDist().inv_cdf(p)
+    d = np.floor(np.clip(np.asarray(dof, dtype=float), 1, None))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        t = (
+            z + (z**3 + z) / (4 * d) + (5 * z**5 + 16 * z**3 + 3 * z) / (96 * d**2)
+            + (3 * z**7 + 19 * z**5 + 17 * z**3 - 15 * z) / (384 * d**3)
+            + (79 * z**9 + 776 * z**7 + 1482 * z**5 - 1920 * z**3 - 945 * z) / (92160 * d**4)
+        )
+    t = np.where(d == 2, (2 * p - 1) / np.sqrt(2 * p * (1 - p)), t)
+    return np.where(d == 1, np.tan(np.pi * (p - 0.5)), t)
+
+
+def _sales_estimates(
+    d: pd.DataFrame, sample: StratifiedSample, sales: str, groups: np.ndarray, n_groups: int,
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Stratified expansion estimate of the sales sum per group, its variance and degrees of freedom.
+
+    Rows outside the filters count as y = 0 in their stratum, so only the
+    matched rows' sums are needed; strata sampled in full add no variance.
+    The degrees of freedom (Satterthwaite) count each stratum's matched rows,
+    not its sample size: a group seen in a few sampled rows gets a wide t
+    interval instead of an overconfident normal one.
+    """
+    y = d[sales].to_numpy(dtype=float)
+    s = pd.DataFrame({"g": groups, "h": d[STRATUM].to_numpy(), "y": y, "y2": y * y, "m": 1}).groupby(["g", "h"]).sum()
+    g = s.index.get_level_values("g").to_numpy()
+    h = s.index.get_level_values("h").to_numpy()
+    N = sample.pop[h].astype(float)
+    n = sample.size[h].astype(float)
+    s1, s2 = s["y"].to_numpy(), s["y2"].to_numpy()
+    mean = s1 / n
+    with np.errstate(divide="ignore", invalid="ignore"):
+        var_y = np.where(n > 1, (s2 - n * mean * mean) / (n - 1), 0.0)
+    var_h = N * N * (1 - n / N) * np.clip(var_y, 0, None) / n
+    var = np.bincount(g, weights=var_h, minlength=n_groups)
+    spread = np.bincount(g, weights=var_h * var_h / np.maximum(s["m"].to_numpy() - 1, 1), minlength=n_groups)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        dof = np.where(spread > 0, var * var / spread, np.inf)
+    return np.bincount(g, weights=N * mean, minlength=n_groups), var, dof
+
+
+def _store_estimates(d: pd.DataFrame, groups: np.ndarray, n_groups: int, cap: Optional[int]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Distinct active stores per group: GEE estimate and interval.
+
+    Stores seen in the sample are certainly active, so the lower end always
+    holds; the upper end assumes each store seen once stands for up to 1/f
+    stores (f = sampling fraction), which is a heuristic, not a guarantee.
+    """
+    stores, _ = pd.factorize(d["_store_id"])
+    ok = stores >= 0
+    pairs = pd.DataFrame({"g": groups[ok], "s": stores[ok]}).value_counts()
+    pg = pairs.index.get_level_values("g").to_numpy()
+    seen = np.bincount(pg, minlength=n_groups).astype(float)
+    once = np.bincount(pg, weights=(pairs.to_numpy() == 1).astype(float), minlength=n_groups)
+    inv = np.bincount(groups, weights=d[WEIGHT].to_numpy(), minlength=n_groups) / np.maximum(np.bincount(groups, minlength=n_groups), 1)
+    est = seen - once + once * np.sqrt(inv)
+    high = seen - once + once * inv
+    if cap is not None:
+        est, high = np.minimum(est, cap), np.minimum(high, cap)
+    return est, seen, high
+
+
+def _store_coverage(
+    d: pd.DataFrame, groups: np.ndarray, n_groups: int, top: np.ndarray, est: np.ndarray, total: float, cap: Optional[int],
+) -> np.ndarray:
+    """GEE estimate of the distinct stores bought by the top 1..k groups (each store once), kept monotone."""
+    rank = np.full(n_groups, len(top), dtype=np.int64)
+    rank[top] = np.arange(len(top))
+    row_rank = rank[groups]
+    covered = np.empty(len(top))
+    for i in range(len(top)):
+        sub = row_rank <= i
+        covered[i] = _store_estimates(d[sub], np.zeros(int(sub.sum()), dtype=np.int64), 1, cap)[0][0]
+    covered = np.maximum.accumulate(np.maximum(np.round(covered), est[top]))
+    return np.minimum(covered, total)
+
+
+def estimate(sample: StratifiedSample, cols: Cols, plan: ParsedQuery, store_cap: Optional[int] = None) -> Optional[Dict[str, Any]]:
+    """Approximate result for a resolved plan, or None when it must run exactly.
+
+    store_cap: exact active stores over the plan's periods, an upper bound for
+    every store estimate.
+    """
+    if plan.intent not in APPROX_INTENTS:
+        return None
+    d = _apply_filters(sample.df, cols, plan, sample.periods)
+    rows = int(round(float(d[WEIGHT].sum())))  # estimated matched rows
+    if plan.metric == "active_stores":
+        d = d[d[cols.sales] > 0]
+    if d.empty:
+        return None  # nothing sampled: an estimate would just say 0
+
+    labels = None
+    if plan.intent in ("BREAKDOWN", "TOP_N"):
+        group_col = _group_col(cols, plan.group_by or "")
+        if group_col is None:
+            raise PlanValidationError(f"Cannot group by '{plan.group_by}' (no column mapping).")
+        groups, labels = pd.factorize(d[group_col])
+        d, groups = d[groups >= 0], groups[groups >= 0]
+    else:
+        groups = np.zeros(len(d), dtype=np.int64)
+    n_groups = len(labels) if labels is not None else 1
+
+    meta = {
+        "approximate": True, "nominal_confidence": settings.approx_confidence,
+        "sample_rows": int(len(d)), "sample_fraction": len(sample.df) / float(sample.pop.sum()),
+    }
+    if plan.metric == "sales":
+        est, var, dof = _sales_estimates(d, sample, cols.sales, groups, n_groups)
+        half = _t_quantile(0.5 + settings.approx_confidence / 2, dof) * np.sqrt(var)
+        low, high = est - half, est + half
+        total = float(est.sum())
+        meta["ci_method"] = "stratified_t"
+    else:
+        est, low, high = _store_estimates(d, groups, n_groups, store_cap)
+        est, low, high = np.round(est), np.round(low), np.round(high)
+        total = float(_store_estimates(d, np.zeros(len(d), dtype=np.int64), 1, store_cap)[0].round()[0])
+        meta["ci_method"] = "gee"
+
+    if labels is None:
+        value: Any = float(est[0]) if plan.metric == "sales" else int(est[0])
+        out = {"ok": True, "rows": rows, "metric": plan.metric, "value": value, "ci_low": float(low[0]), "ci_high": float(high[0])}
+        return {**out, **meta}
+
+    order = np.argsort(-est, kind="stable")
+    if plan.intent == "TOP_N":
+        # same fields as an exact TOP_N; others.groups counts only groups seen in the sample
+        top = order[:int(plan.limit or 5)]
+        if plan.metric == "sales":
+            covered = np.cumsum(est[top])
+        else:
+            covered = _store_coverage(d, groups, n_groups, top, est, total, store_cap)
+        out = _top_n_result(plan, rows, labels[top], est[top], covered, total, n_groups)
+        for row, i in zip(out["table"], top):
+            row.update(ci_low=float(low[i]), ci_high=float(high[i]))
+        return {**out, **meta}
+
+    table = [
+        {"group": str(labels[i]), "value": float(est[i]), "ci_low": float(low[i]), "ci_high": float(high[i])}
+        for i in order
+    ]
+    out = {"ok": True, "rows": rows, "metric": plan.metric, "group_by": plan.group_by, "table": table}
+    return {**out, **meta}
+
+
+def store_cap(engine: Any, plan: ParsedQuery) -> Optional[int]:
+    """Exact active stores over the plan's periods (dimension filters ignored), when precomputed."""
+    if engine.store_sets is None:
+        return None
+    ranges = _time_ranges(plan.filters)
+    return int(len(engine.store_sets.stores(ranges if ranges is not None else [(0, 999912)])))
@@ -6,13 +6,16 @@ from pathlib import Path
 
 from .pdf_engine import extract_line_items, items_to_df
 
-def compare_po_pi(po_pdf: str, pi_pdf: str, out_dir: str = "outputs") -> Tuple[List[Dict[str, Any]], Dict[str, Any], str, str]:
-    outp = Path(out_dir)
-    outp.mkdir(parents=True, exist_ok=True)
-
-    po_items = items_to_df(extract_line_items(po_pdf))
-    pi_items = items_to_df(extract_line_items(pi_pdf))
+# (field, tolerance, issue) compared between PO and PI, in report order
+CHECKS = (
+    ("qty", 0, "QTY_MISMATCH"),
+    ("unit_price", 0.01, "UNIT_PRICE_MISMATCH"),
+    ("discount_pct", 0.01, "DISCOUNT_MISMATCH"),
+    ("tax_pct", 0.01, "TAX_MISMATCH"),
+)
 
+def compare_items(po_items: pd.DataFrame, pi_items: pd.DataFrame) -> List[Dict[str, Any]]:
+    """Discrepancies between PO and PI line items, one entry per SKU with issues."""
     # Merge on SKU
     merged = po_items.merge(
         pi_items,
@@ -22,47 +25,41 @@ def compare_po_pi(po_pdf: str, pi_pdf: str, out_dir: str = "outputs") -> Tuple[L
         indicator=True
     )
 
-    def neq(a, b, tol=1e-6):
-        if pd.isna(a) and pd.isna(b):
-            return False
-        if isinstance(a, (int, float, np.number)) and isinstance(b, (int, float, np.number)):
-            return abs(float(a) - float(b)) > tol
-        return str(a) != str(b)
+    # Numeric mismatch per column; a value missing on either side is not a mismatch (MISSING_IN_* covers it)
+    status = merged["_merge"].to_numpy()
+    flags = {
+        "MISSING_IN_PI": status == "left_only",
+        "MISSING_IN_PO": status == "right_only",
+    }
+    with np.errstate(invalid="ignore"):
+        for field, tol, issue in CHECKS:
+            a = merged[f"{field}_po"].to_numpy(dtype=float)
+            b = merged[f"{field}_pi"].to_numpy(dtype=float)
+            flags[issue] = np.abs(a - b) > tol
+
+    hit = np.logical_or.reduce(list(flags.values()))
+    rows = np.flatnonzero(hit)
+    values = {c: merged[c].to_numpy(dtype=object)[rows].tolist() for c in merged.columns if c != "_merge"}
 
+    fields = ("description", "qty", "unit_price", "discount_pct", "tax_pct")
     discrepancies = []
-    for _, r in merged.iterrows():
-        issues = []
-        if r["_merge"] != "both":
-            issues.append("MISSING_IN_" + ("PI" if r["_merge"] == "left_only" else "PO"))
+    for k, r in enumerate(rows):
+        discrepancies.append({
+            "sku": values["sku"][k],
+            "issues": [issue for issue, mask in flags.items() if mask[r]],
+            "po": {f: values[f + "_po"][k] for f in fields},
+            "pi": {f: values[f + "_pi"][k] for f in fields},
+        })
+    return discrepancies
 
-        if neq(r.get("qty_po"), r.get("qty_pi"), tol=0):
-            issues.append("QTY_MISMATCH")
-        if neq(r.get("unit_price_po"), r.get("unit_price_pi"), tol=0.01):
-            issues.append("UNIT_PRICE_MISMATCH")
-        if neq(r.get("discount_pct_po"), r.get("discount_pct_pi"), tol=0.01):
-            issues.append("DISCOUNT_MISMATCH")
-        if neq(r.get("tax_pct_po"), r.get("tax_pct_pi"), tol=0.01):
-            issues.append("TAX_MISMATCH")
 
-        if issues:
-            discrepancies.append({
-                "sku": r["sku"],
-                "issues": issues,
-                "po": {
-                    "description": r.get("description_po"),
-                    "qty": r.get("qty_po"),
-                    "unit_price": r.get("unit_price_po"),
-                    "discount_pct": r.get("discount_pct_po"),
-                    "tax_pct": r.get("tax_pct_po"),
-                },
-                "pi": {
-                    "description": r.get("description_pi"),
-                    "qty": r.get("qty_pi"),
-                    "unit_price": r.get("unit_price_pi"),
-                    "discount_pct": r.get("discount_pct_pi"),
-                    "tax_pct": r.get("tax_pct_pi"),
-                }
-            })
+def compare_po_pi(po_pdf: str, pi_pdf: str, out_dir: str = "outputs") -> Tuple[List[Dict[str, Any]], Dict[str, Any], str, str]:
+    outp = Path(out_dir)
+    outp.mkdir(parents=True, exist_ok=True)
+
+    po_items = items_to_df(extract_line_items(po_pdf))
+    pi_items = items_to_df(extract_line_items(pi_pdf))
+    discrepancies = compare_items(po_items, pi_items)
 
     disc_df = pd.DataFrame([{
         "sku": d["sku"],
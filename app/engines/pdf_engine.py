@@ -1,20 +1,112 @@
 from __future__ import annotations
-from dataclasses import dataclass
-from typing import List, Dict, Any, Optional
+from array import array
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
 import re
+import numpy as np
 import pdfplumber
 import pandas as pd
 
+from .pdf_templates import Template, header_index, header_line, is_footer, match_template, text_lines
+
 SKU_RE = re.compile(r"^A\d{4}$")
 
-@dataclass
+FIELDS = ("sku", "description", "qty", "unit_price", "discount_pct", "tax_pct")
+
+
+class LineItems:
+    """Columnar batch of line items: a list per text field, a typed array per number.
+
+    Extraction appends straight into the columns and to_df() hands the numeric
+    buffers to pandas without copying (the batch can't grow while a frame uses them).
+    Indexing and iteration yield LineItem row views.
+    """
+    __slots__ = FIELDS
+
+    def __init__(self) -> None:
+        self.sku: List[str] = []
+        self.description: List[str] = []
+        self.qty = array("q")
+        self.unit_price = array("d")
+        self.discount_pct = array("d")
+        self.tax_pct = array("d")
+
+    def append(self, sku: str, description: str, qty: int, unit_price: float, discount_pct: float, tax_pct: float) -> None:
+        self.sku.append(sku)
+        self.description.append(description)
+        self.qty.append(qty)
+        self.unit_price.append(unit_price)
+        self.discount_pct.append(discount_pct)
+        self.tax_pct.append(tax_pct)
+
+    def extend(self, other: "LineItems") -> None:
+        for f in FIELDS:
+            getattr(self, f).extend(getattr(other, f))
+
+    def __len__(self) -> int:
+        return len(self.sku)
+
+    def __getitem__(self, i: int) -> "LineItem":
+        n = len(self.sku)
+        if i < 0:
+            i += n
+        if not 0 <= i < n:
+            raise IndexError("line item index out of range")
+        return LineItem(self, i)
+
+    def __iter__(self) -> Iterator["LineItem"]:
+        return (LineItem(self, i) for i in range(len(self.sku)))
+
+    def to_df(self) -> pd.DataFrame:
+        return pd.DataFrame({
+            "sku": self.sku,
+            "description": self.description,
+            "qty": np.frombuffer(self.qty, dtype=np.int64),
+            "unit_price": np.frombuffer(self.unit_price, dtype=np.float64),
+            "discount_pct": np.frombuffer(self.discount_pct, dtype=np.float64),
+            "tax_pct": np.frombuffer(self.tax_pct, dtype=np.float64),
+        }, copy=False)
+
+
 class LineItem:
-    sku: str
-    description: str
-    qty: int
-    unit_price: float
-    discount_pct: float
-    tax_pct: float
+    """One row of a LineItems batch, read through (same attributes as the former dataclass)."""
+    __slots__ = ("_batch", "_i")
+
+    def __init__(self, batch: LineItems, i: int):
+        self._batch = batch
+        self._i = i
+
+    @property
+    def sku(self) -> str:
+        return self._batch.sku[self._i]
+
+    @property
+    def description(self) -> str:
+        return self._batch.description[self._i]
+
+    @property
+    def qty(self) -> int:
+        return self._batch.qty[self._i]
+
+    @property
+    def unit_price(self) -> float:
+        return self._batch.unit_price[self._i]
+
+    @property
+    def discount_pct(self) -> float:
+        return self._batch.discount_pct[self._i]
+
+    @property
+    def tax_pct(self) -> float:
+        return self._batch.tax_pct[self._i]
+
+    def astuple(self) -> Tuple[Any, ...]:
+        return tuple(getattr(self._batch, f)[self._i] for f in FIELDS)
+
+    def __eq__(self, other: object) -> bool:
+        return isinstance(other, LineItem) and self.astuple() == other.astuple()
+
+    def __repr__(self) -> str:
+        return "LineItem(" + ", ".join(f"{f}={v!r}" for f, v in zip(FIELDS, self.astuple())) + ")"
 
 def _to_float(x: Any) -> float:
     try:
@@ -28,67 +120,118 @@ def _to_int(x: Any) -> int:
     except Exception:
         return -1
 
-def extract_line_items(pdf_path: str, table_start_header: str = "SKU") -> List[LineItem]:
+def _add_item(items: LineItems, sku: str, cell: Callable[[str], Optional[str]]) -> None:
+    """Appends a row from its cell texts; cell(field) is None when the table lacks that column."""
+    desc, qty, price, disc, tax = (cell(f) for f in FIELDS[1:])
+    items.append(
+        sku,
+        desc.strip() if desc is not None else "",
+        _to_int(qty) if qty is not None else -1,
+        _to_float(price) if price is not None else float("nan"),
+        _to_float(disc) if disc is not None else 0.0,
+        _to_float(tax) if tax is not None else 0.0,
+    )
+
+
+def _items_from_tables(page: Any, items: LineItems) -> None:
+    """Generic path: pdfplumber table detection (slow, works for any ruled table)."""
+    for tbl in page.extract_tables() or []:
+        if not tbl or len(tbl) < 2:
+            continue
+        header = [str(h or "").strip() for h in tbl[0]]
+        header_join = " ".join(h.lower() for h in header)
+        if "sku" not in header_join or "qty" not in header_join:
+            continue
+
+        idx = header_index(header)
+        if idx["sku"] is None or idx["qty"] is None or idx["unit_price"] is None:
+            continue
+
+        for row in tbl[1:]:
+            if not row or idx["sku"] >= len(row):
+                continue
+            sku = str(row[idx["sku"]] or "").strip()
+            if not SKU_RE.match(sku):
+                continue
+
+            def cell(field: str) -> Optional[str]:
+                i = idx[field]
+                return str(row[i] or "") if i is not None and i < len(row) else None
+
+            _add_item(items, sku, cell)
+
+
+def _items_from_template(lines: List[Tuple[float, List[Dict[str, Any]]]], template: Template, items: LineItems) -> None:
+    """Fast path: assigns words to the template's column x-ranges, line by line under the header."""
+    head = header_line(lines)
+    if head is None:
+        return
+    fields = [f for f, _, _ in template.columns]
+    rows: List[Dict[str, List[str]]] = []
+    last_top: Optional[float] = None
+    row_top: Optional[float] = None
+    pitch: Optional[float] = None  # smallest distance between two item rows on this page
+    for top, words in lines:
+        if top <= head[0]:
+            continue
+        cells: Dict[str, List[str]] = {f: [] for f in fields}
+        for w in words:
+            xc = (w["x0"] + w["x1"]) / 2
+            for f, x0, x1 in template.columns:
+                if x0 <= xc < x1:
+                    cells[f].append(w["text"])
+                    break
+        if SKU_RE.match(" ".join(cells["sku"])):
+            rows.append({f: [" ".join(v)] if v else [] for f, v in cells.items()})
+            if row_top is not None:
+                pitch = top - row_top if pitch is None else min(pitch, top - row_top)
+            last_top = row_top = top
+        elif (
+            rows and last_top is not None and any(cells.values()) and not is_footer(words)
+            and top - last_top < template.wrap_gap
+            and (pitch is None or top - last_top <= pitch or bool(cells["qty"]))
+        ):
+            for f, v in cells.items():  # wrapped cell text, joined like pdfplumber does
+                if v:
+                    rows[-1][f].append(" ".join(v))
+            last_top = top
+        else:
+            last_top = None
+
+    for r in rows:
+        _add_item(items, r["sku"][0], lambda f, r=r: "\n".join(r[f]) if f in r else None)
+
+
+def extract_line_items(pdf_path: str, table_start_header: str = "SKU", fast: bool = True) -> LineItems:
     """Extracts line items from a semi-structured PDF table using pdfplumber.
 
     Assumes the table has a header row containing: SKU, Description, Qty, Unit Price, Discount %, Tax %
-    (additional columns are ignored).
+    (additional columns are ignored). Known supplier layouts (pdf_templates.TEMPLATES, fingerprinted
+    from the page-1 header) are read from word coordinates; anything else goes through extract_tables().
     """
-    items: List[LineItem] = []
+    items = LineItems()
 
     with pdfplumber.open(pdf_path) as pdf:
-        for page in pdf.pages:
-            tables = page.extract_tables() or []
-            for tbl in tables:
-                if not tbl or len(tbl) < 2:
-                    continue
-                header = [str(h or "").strip() for h in tbl[0]]
-                header_join = " ".join(h.lower() for h in header)
-                if "sku" not in header_join or "qty" not in header_join:
-                    continue
-
-                # Map column indices by header name (flexible)
-                def find_idx(keys):
-                    for k in keys:
-                        for i, h in enumerate(header):
-                            if k in h.lower():
-                                return i
-                    return None
-
-                idx_sku = find_idx(["sku"])
-                idx_desc = find_idx(["description"])
-                idx_qty = find_idx(["qty"])
-                idx_price = find_idx(["unit price", "price"])
-                idx_disc = find_idx(["discount"])
-                idx_tax = find_idx(["tax %", "tax"])
-
-                if idx_sku is None or idx_qty is None or idx_price is None:
-                    continue
-
-                for row in tbl[1:]:
-                    if not row or idx_sku >= len(row):
-                        continue
-                    sku = str(row[idx_sku] or "").strip()
-                    if not SKU_RE.match(sku):
-                        continue
-                    desc = str(row[idx_desc] or "").strip() if idx_desc is not None and idx_desc < len(row) else ""
-                    qty = _to_int(row[idx_qty]) if idx_qty is not None and idx_qty < len(row) else -1
-                    unit_price = _to_float(row[idx_price]) if idx_price is not None and idx_price < len(row) else float("nan")
-                    discount = _to_float(row[idx_disc]) if idx_disc is not None and idx_disc < len(row) else 0.0
-                    tax = _to_float(row[idx_tax]) if idx_tax is not None and idx_tax < len(row) else 0.0
-
-                    items.append(LineItem(sku=sku, description=desc, qty=qty, unit_price=unit_price, discount_pct=discount, tax_pct=tax))
+        template = None
+        if fast and pdf.pages:
+            first = text_lines(pdf.pages[0].extract_words())
+            template = match_template(first)
+        if template is not None:
+            for i, page in enumerate(pdf.pages):
+                _items_from_template(first if i == 0 else text_lines(page.extract_words()), template, items)
+        if not items:
+            for page in pdf.pages:
+                _items_from_tables(page, items)
 
     if not items:
         raise RuntimeError(f"No line items extracted from {pdf_path}. Try adjusting extraction heuristics.")
     return items
 
-def items_to_df(items: List[LineItem]) -> pd.DataFrame:
-    return pd.DataFrame([{
-        "sku": it.sku,
-        "description": it.description,
-        "qty": it.qty,
-        "unit_price": it.unit_price,
-        "discount_pct": it.discount_pct,
-        "tax_pct": it.tax_pct,
-    } for it in items])
+def items_to_df(items: Iterable[Any]) -> pd.DataFrame:
+    """DataFrame of line items; a LineItems batch converts without copying its numeric columns."""
+    if not isinstance(items, LineItems):
+        batch = LineItems()
+        for it in items:
+            batch.append(*(getattr(it, f) for f in FIELDS))
+        items = batch
+    return items.to_df()
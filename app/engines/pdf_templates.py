@@ -0,0 +1,138 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+# Header keywords per field, first match wins (same rules as the generic table path)
+HEADER_KEYS: Dict[str, List[str]] = {
+    "sku": ["sku"],
+    "description": ["description"],
+    "qty": ["qty"],
+    "unit_price": ["unit price", "price"],
+    "discount_pct": ["discount"],
+    "tax_pct": ["tax %", "tax"],
+}
+
+X_TOL = 2.0  # pt; header words must sit within this of the template's positions
+LINE_TOL = 1.5  # pt; words whose tops differ by less are on the same text line
+# Lines starting with these end the line-item table (totals and footers are never wrapped cell text)
+FOOTER_TOKENS = ("total", "sub total", "subtotal", "grand total", "net total", "amount due", "summary", "page ")
+
+
+def header_index(header: Sequence[str]) -> Dict[str, Optional[int]]:
+    """Column index per field from a table header row (None when absent)."""
+    out: Dict[str, Optional[int]] = {}
+    for field, keys in HEADER_KEYS.items():
+        out[field] = None
+        for k in keys:
+            hit = next((i for i, h in enumerate(header) if k in h.lower()), None)
+            if hit is not None:
+                out[field] = hit
+                break
+    return out
+
+
+@dataclass(frozen=True)
+class Template:
+    """A fixed supplier layout.
+
+    header: words of the table header row and their x0 on page 1 (the fingerprint).
+    columns: (field, x0, x1) cell x-ranges of the line-item columns.
+    wrap_gap: a text line closer than this below a row continues that row's cells, unless it
+    is a footer (FOOTER_TOKENS) or, with no qty word, sits further down than the row pitch.
+    """
+    name: str
+    header: Tuple[Tuple[str, float], ...]
+    columns: Tuple[Tuple[str, float, float], ...]
+    wrap_gap: float = 12.0
+
+    def matches(self, words: Sequence[Tuple[str, float]]) -> bool:
+        return len(words) == len(self.header) and all(
+            t == ht and abs(x - hx) <= X_TOL for (t, x), (ht, hx) in zip(words, self.header)
+        )
+
+
+TEMPLATES: Tuple[Template, ...] = (
+    Template(
+        name="infinity_po",
+        header=(
+            ("SKU", 95.5), ("Description", 150.9), ("Qty", 230.2), ("Unit", 255.6), ("Price", 273.3),
+            ("Discount", 304.9), ("%", 341.4), ("Tax", 360.5), ("%", 376.5), ("Line", 395.6),
+            ("Subtotal", 414.3), ("Discount", 461.6), ("Amount", 498.1), ("Taxable", 543.6),
+            ("Amount", 575.7), ("Tax", 617.9), ("Amount", 633.9), ("Line", 693.9), ("Total", 712.6),
+        ),
+        columns=(
+            ("sku", 86.4, 121.5), ("description", 121.5, 224.2), ("qty", 224.2, 249.6),
+            ("unit_price", 249.6, 298.9), ("discount_pct", 298.9, 354.5), ("tax_pct", 354.5, 389.6),
+        ),
+    ),
+    Template(
+        name="infinity_pi",
+        header=(
+            ("SKU", 48.9), ("Description", 104.2), ("Qty", 183.6), ("Unit", 208.9), ("Price", 226.7),
+            ("(PI)", 248.5), ("Discount", 273.4), ("%", 309.8), ("(PI)", 319.1), ("Tax", 344.0),
+            ("%", 360.0), ("(PI)", 369.4), ("Line", 394.3), ("Subtotal", 412.9), ("(PI)", 447.2),
+            ("Discount", 472.0), ("Amount", 508.5), ("(PI)", 540.9), ("Taxable", 565.8), ("Amount", 597.8),
+            ("(PI)", 630.3), ("Tax", 661.2), ("Amount", 677.2), ("(PI)", 709.6), ("Line", 741.9),
+            ("Total", 760.6), ("(PI)", 781.9),
+        ),
+        columns=(
+            ("sku", 39.7, 74.9), ("description", 74.9, 177.6), ("qty", 177.6, 202.9),
+            ("unit_price", 202.9, 267.4), ("discount_pct", 267.4, 338.0), ("tax_pct", 338.0, 388.3),
+        ),
+    ),
+)
+
+
+def text_lines(words: List[Dict[str, Any]]) -> List[Tuple[float, List[Dict[str, Any]]]]:
+    """pdfplumber words grouped into lines (top, words left to right), top to bottom."""
+    lines: List[Tuple[float, List[Dict[str, Any]]]] = []
+    for w in sorted(words, key=lambda w: (w["top"], w["x0"])):
+        if lines and w["top"] - lines[-1][0] < LINE_TOL:
+            lines[-1][1].append(w)
+        else:
+            lines.append((w["top"], [w]))
+    return [(top, sorted(ws, key=lambda w: w["x0"])) for top, ws in lines]
+
+
+def is_footer(words: List[Dict[str, Any]]) -> bool:
+    text = " ".join(w["text"] for w in words).lower()
+    return text.startswith(FOOTER_TOKENS)
+
+
+def header_line(lines: List[Tuple[float, List[Dict[str, Any]]]], first: str = "SKU") -> Optional[Tuple[float, List[Dict[str, Any]]]]:
+    for top, ws in lines:
+        if ws and ws[0]["text"] == first:
+            return top, ws
+    return None
+
+
+def match_template(lines: List[Tuple[float, List[Dict[str, Any]]]]) -> Optional[Template]:
+    """The known template whose table header matches these page-1 lines, if any."""
+    found = header_line(lines)
+    if found is None:
+        return None
+    words = [(w["text"], w["x0"]) for w in found[1]]
+    return next((t for t in TEMPLATES if t.matches(words)), None)
+
+
+def learn_template(page: Any, name: str) -> Optional[Template]:
+    """Builds a Template from a page whose line-item table pdfplumber can detect.
+
+    Run once per new supplier layout (benchmarks/pdf_fastpath.py --learn) and
+    add the result to TEMPLATES.
+    """
+    found = header_line(text_lines(page.extract_words()))
+    if found is None:
+        return None
+    for table in page.find_tables():
+        header = [str(h or "").strip() for h in table.extract()[0]]
+        idx = header_index(header)
+        if idx["sku"] is None or idx["qty"] is None:
+            continue
+        cells = table.rows[0].cells
+        columns = tuple(
+            (f, round(cells[i][0], 1), round(cells[i][2], 1)) for f, i in idx.items() if i is not None and cells[i]
+        )
+        return Template(name=name, header=tuple((w["text"], round(w["x0"], 1)) for w in found[1]), columns=columns)
+    return None
@@ -0,0 +1,147 @@
+from __future__ import annotations
+
+import os
+import threading
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional
+
+from ..config import settings
+
+if TYPE_CHECKING:
+    from .sales_engine import SalesEngine
+
+DEFAULT_DATASET = "default"
+
+
+def parse_datasets(spec: str, default_path: str) -> Dict[str, str]:
+    """"retail=/data/a.xlsb,food=/data/food/" -> {id: path}; "default" is SALES_FILE unless given."""
+    out = {DEFAULT_DATASET: default_path}
+    for item in (spec or "").split(","):
+        if not item.strip():
+            continue
+        name, sep, path = item.partition("=")
+        if not sep or not name.strip() or not path.strip():
+            raise ValueError(f"Invalid SALES_DATASETS entry: {item!r} (expected id=path)")
+        out[name.strip()] = path.strip()
+    return out
+
+
+class EngineRegistry:
+    """SalesEngines per dataset, loaded on demand and kept in an LRU under a memory budget.
+
+    The first load of a dataset parses its workbooks and writes a Parquet
+    snapshot; after eviction it is reloaded from the snapshot, unless a source
+    file is newer.
+    """
+
+    def __init__(
+        self,
+        sources: Dict[str, str],
+        budget_bytes: int,
+        snapshot_dir: str = "",
+        on_load: Optional[Callable[[str, SalesEngine], Any]] = None,
+    ):
+        self.sources = sources
+        self.budget_bytes = budget_bytes
+        self.snapshot_dir = snapshot_dir
+        self.on_load = on_load
+        self._engines: "OrderedDict[str, SalesEngine]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._loading: Dict[str, threading.Lock] = {k: threading.Lock() for k in sources}
+
+    def datasets(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            loaded = {k: e.memory_bytes() for k, e in self._engines.items()}
+        return [{"id": k, "loaded": k in loaded, "bytes": loaded.get(k)} for k in self.sources]
+
+    def get(self, dataset: Optional[str] = None) -> SalesEngine:
+        dataset = dataset or DEFAULT_DATASET
+        if dataset not in self.sources:
+            raise KeyError(f"Unknown dataset: {dataset}")
+        with self._lock:
+            engine = self._engines.get(dataset)
+            if engine is not None:
+                self._engines.move_to_end(dataset)
+                return engine
+        with self._loading[dataset]:  # one load per dataset; other datasets load concurrently
+            with self._lock:
+                engine = self._engines.get(dataset)
+            if engine is None:
+                engine = self._load(dataset, from_source=False)
+        return engine
+
+    def reload(self, dataset: Optional[str] = None) -> SalesEngine:
+        """Re-reads the dataset's sources (and rewrites its snapshot)."""
+        dataset = dataset or DEFAULT_DATASET
+        if dataset not in self.sources:
+            raise KeyError(f"Unknown dataset: {dataset}")
+        with self._loading[dataset]:
+            return self._load(dataset, from_source=True)
+
+    def _snapshot_path(self, dataset: str) -> str:
+        return os.path.join(self.snapshot_dir, f"{dataset}.parquet") if self.snapshot_dir else ""
+
+    def _snapshot_fresh(self, dataset: str, path: str) -> bool:
+        from ..data.sales_loader import resolve_sources
+        from ..data.snapshot import has_snapshot
+
+        if not path or not has_snapshot(path):
+            return False
+        try:
+            newest = max(os.path.getmtime(f) for f, _ in resolve_sources(self.sources[dataset]))
+        except (OSError, RuntimeError):
+            return False
+        return os.path.getmtime(path) >= newest
+
+    def _load(self, dataset: str, from_source: bool) -> SalesEngine:
+        # pandas and the loaders are imported with the first dataset, not with the registry
+        from ..data.sales_loader import load_sales_dataframe
+        from ..data.snapshot import read_snapshot, write_snapshot
+        from .sales_engine import SalesEngine
+
+        snap = self._snapshot_path(dataset)
+        if settings.sales_shards:
+            engine: Any = self._load_sharded(dataset, snap, from_source)
+        else:
+            if not from_source and self._snapshot_fresh(dataset, snap):
+                df, cols = read_snapshot(snap)
+            else:
+                df, cols = load_sales_dataframe(self.sources[dataset])
+                if snap:
+                    try:
+                        write_snapshot(df, cols, snap)
+                    except ImportError:
+                        pass  # no pyarrow: evicted datasets reload from their sources
+            engine = SalesEngine(df, cols, settings.sales_backend, settings.sales_snapshot if dataset == DEFAULT_DATASET else "")
+        if self.on_load is not None:
+            self.on_load(dataset, engine)
+        self._admit(dataset, engine)
+        return engine
+
+    def _load_sharded(self, dataset: str, snap: str, from_source: bool) -> Any:
+        """Shard workers read their periods from the snapshot; this process keeps no rows."""
+        from ..data.sales_loader import load_sales_dataframe
+        from ..data.snapshot import read_cols, snapshot_periods, write_snapshot
+        from .shards import ShardedEngine
+
+        if not snap:
+            raise RuntimeError("SALES_SHARDS needs SNAPSHOT_DIR (shards load from the Parquet snapshot).")
+        if from_source or not self._snapshot_fresh(dataset, snap):
+            df, cols = load_sales_dataframe(self.sources[dataset])
+            try:
+                write_snapshot(df, cols, snap)
+            except ImportError:
+                raise RuntimeError("SALES_SHARDS needs pyarrow to write the Parquet snapshot.")
+            del df
+        return ShardedEngine(snap, read_cols(snap), snapshot_periods(snap), settings.sales_shards)
+
+    def _admit(self, dataset: str, engine: SalesEngine) -> None:
+        # Evicted engines are only dropped: requests still using one keep it alive until they finish.
+        with self._lock:
+            self._engines.pop(dataset, None)
+            self._engines[dataset] = engine
+            # least recently used first; the dataset just loaded always stays
+            total = sum(e.memory_bytes() for e in self._engines.values())
+            while self.budget_bytes and total > self.budget_bytes and len(self._engines) > 1:
+                _, lru = self._engines.popitem(last=False)
+                total -= lru.memory_bytes()
@@ -1,17 +1,29 @@
 from __future__ import annotations
 
-from typing import Any, Dict, Optional
+import threading
+import uuid
+from typing import Any, Callable, Dict, List, Optional, Tuple, get_args
+import numpy as np
 import pandas as pd
 
-from ..schemas import ParsedQuery
+from ..config import settings
+from ..schemas import GroupBy, ParsedQuery, Filters
 from ..data.sales_loader import load_sales_dataframe
 from ..data.sales_schema import Cols
+from ..data.value_index import DimensionIndex
+from ..data.periods import PeriodIndex, parse_month, quarter_range, year_range, add_months, format_key
+from ..data.sample import StratifiedSample
+from ..data.store_sets import StoreSets, cohort
+from ..sessions import SessionState
 
 
 class PlanValidationError(ValueError):
     pass
 
 
+TIME_FILTERS = ("month", "months", "quarter", "year", "month_from", "month_to", "last_n_months")
+
+
 def _norm(s: Optional[str]) -> Optional[str]:
     if s is None:
         return None
@@ -20,15 +32,28 @@ def _norm(s: Optional[str]) -> Optional[str]:
 
 
 def _ci_eq(series: pd.Series, value: str) -> pd.Series:
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        # compare the (few) categories once, then test codes
+        cats = series.cat.categories.astype(str).str.strip().str.lower()
+        hit = np.flatnonzero(cats == value.strip().lower())
+        return pd.Series(np.isin(series.cat.codes.to_numpy(), hit), index=series.index)
     return series.astype(str).str.strip().str.lower() == value.strip().lower()
 
 
+def _isin_stripped(series: pd.Series, values: List[str]) -> pd.Series:
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        cats = series.cat.categories.astype(str).str.strip()
+        hit = np.flatnonzero(cats.isin(values))
+        return pd.Series(np.isin(series.cat.codes.to_numpy(), hit), index=series.index)
+    return series.astype(str).str.strip().isin(values)
+
+
 def _validate_plan(plan: ParsedQuery, cols: Cols) -> None:
-    allowed_intents = {"TOTAL_SALES", "TOTAL_ACTIVE_STORES", "BREAKDOWN", "COMPARE_YOY", "TOP_N"}
+    allowed_intents = {"TOTAL_SALES", "TOTAL_ACTIVE_STORES", "BREAKDOWN", "COMPARE_YOY", "TOP_N", "STORE_COHORT", "DRIVERS"}
     if plan.intent not in allowed_intents:
         raise PlanValidationError(f"Unsupported intent for sales engine: {plan.intent}")
 
-    if plan.metric not in ("sales", "active_stores"):
+    if plan.metric not in ("sales", "active_stores") and plan.intent != "STORE_COHORT":
         raise PlanValidationError("metric must be 'sales' or 'active_stores'")
 
     if plan.intent in ("BREAKDOWN", "TOP_N"):
@@ -37,18 +62,75 @@ def _validate_plan(plan: ParsedQuery, cols: Cols) -> None:
 
 
     f = plan.filters
-    if plan.intent == "COMPARE_YOY":
-        time_count = int(bool(f.month)) + int(bool(f.quarter)) + int(bool(f.year)) + int(bool(f.months))
+    if plan.intent in ("COMPARE_YOY", "STORE_COHORT", "DRIVERS"):
+        time_count = (
+            int(bool(f.month)) + int(bool(f.quarter)) + int(bool(f.year)) + int(bool(f.months))
+            + int(bool(f.month_from or f.month_to or f.last_n_months))
+        )
         if time_count != 1:
-            raise PlanValidationError("COMPARE_YOY requires exactly one time filter: month OR months OR quarter OR year.")
+            raise PlanValidationError(f"{plan.intent} requires exactly one time filter: month OR months OR quarter OR year OR month range.")
 
     if cols.sales is None:
         raise PlanValidationError("Sales column mapping not available.")
 
 
-def _apply_filters(df: pd.DataFrame, cols: Cols, plan: ParsedQuery) -> pd.DataFrame:
+def _time_ranges(f: Filters) -> Optional[List[Tuple[int, int]]]:
+    """Inclusive period-key ranges selected by the time filters (None = no time filter)."""
+    lo, hi = 0, 999912
+    bounded = False
+    try:
+        if f.month:
+            k = parse_month(f.month)
+            lo, hi, bounded = max(lo, k), min(hi, k), True
+        if f.quarter:
+            a, b = quarter_range(f.quarter)
+            lo, hi, bounded = max(lo, a), min(hi, b), True
+        if f.year:
+            a, b = year_range(f.year)
+            lo, hi, bounded = max(lo, a), min(hi, b), True
+        if f.month_from:
+            lo, bounded = max(lo, parse_month(f.month_from)), True
+        if f.month_to:
+            hi, bounded = min(hi, parse_month(f.month_to)), True
+        months = [parse_month(x) for x in (f.months or []) if str(x).strip()]
+    except ValueError as e:
+        raise PlanValidationError(f"Invalid time filter: {e}")
+
+    if months:
+        return [(k, k) for k in months if lo <= k <= hi]
+    if not bounded:
+        return None
+    return [(lo, hi)] if lo <= hi else []
+
+
+def _slice_periods(df: pd.DataFrame, cols: Cols, ranges: List[Tuple[int, int]], periods: Optional[PeriodIndex]) -> pd.DataFrame:
+    if periods is not None:
+        slices = periods.row_slices(ranges)
+        if len(slices) == 1:
+            return df.iloc[slices[0][0]:slices[0][1]]
+        if not slices:
+            return df.iloc[0:0]
+        return pd.concat([df.iloc[a:b] for a, b in slices])
+
+    # Unsorted frame: fall back to a mask over the period key
+    if cols.period_key is not None:
+        keys = df[cols.period_key].to_numpy()
+    else:
+        keys = df[cols.date].str.replace("-", "", regex=False).astype("int64").to_numpy()
+    mask = np.zeros(len(df), dtype=bool)
+    for lo, hi in ranges:
+        mask |= (keys >= lo) & (keys <= hi)
+    return df[mask]
+
+
+def _apply_filters(df: pd.DataFrame, cols: Cols, plan: ParsedQuery, periods: Optional[PeriodIndex] = None) -> pd.DataFrame:
     f = plan.filters
 
+    # --- time filters (first: a contiguous slice when the frame is period-sorted) ---
+    ranges = _time_ranges(f)
+    if ranges is not None:
+        df = _slice_periods(df, cols, ranges, periods)
+
     # --- dimension filters ---
     def apply_if(attr_name: str, value: Optional[str]) -> None:
         nonlocal df
@@ -90,21 +172,44 @@ def _apply_filters(df: pd.DataFrame, cols: Cols, plan: ParsedQuery) -> pd.DataFr
     apply_if("segment", f.segment)
     apply_if("sub_brand", f.sub_brand)
     apply_if("promo", f.promo)
+    apply_if("source", f.source)
 
-    # --- time filters ---
-    if f.month:
-        df = df[df[cols.date] == f.month]
+    # in-list / pattern matches (already expanded to exact values by DimensionIndex)
+    for m in f.match or []:
+        col = getattr(cols, m.dim, None)
+        if col is None:
+            continue
+        if m.op == "in":
+            df = df[_isin_stripped(df[col], m.values)]
+        else:
+            pats = [v.strip().lower() for v in m.values if v.strip()]
+            keys = df[col].astype(str).str.strip().str.lower()
+            hit = pd.Series(False, index=df.index)
+            for p in pats:
+                hit |= keys.str.contains(p, regex=False) if m.op == "contains" else keys.str.startswith(p)
+            df = df[hit]
 
-    if f.months:
-        df = df[df[cols.date].isin([str(x).strip() for x in f.months if str(x).strip()])]
+    return df
 
-    if f.quarter:
-        df = df[df[cols.quarter] == f.quarter]
 
-    if f.year:
-        df = df[df[cols.year] == f.year]
+def _narrows(prev: Filters, new: Filters) -> bool:
+    """True when every row matching `new` also matches `prev` (both resolved)."""
+    p, n = prev.model_dump(exclude_none=True), new.model_dump(exclude_none=True)
+    for k, v in p.items():
+        if k in TIME_FILTERS or k == "match":
+            continue
+        if str(n.get(k, "")).strip().lower() != str(v).strip().lower():
+            return False
+    if any(m not in (n.get("match") or []) for m in p.get("match") or []):
+        return False
 
-    return df
+    prev_ranges = _time_ranges(prev)
+    if prev_ranges is None:
+        return True
+    new_ranges = _time_ranges(new)
+    if new_ranges is None:
+        return False
+    return all(any(a <= lo and hi <= b for a, b in prev_ranges) for lo, hi in new_ranges)
 
 
 def _metric_series(df: pd.DataFrame, plan: ParsedQuery, cols: Cols) -> pd.Series:
@@ -121,7 +226,102 @@ def _group_col(cols: Cols, gb: str) -> Optional[str]:
     return getattr(cols, gb, None)
 
 
-def _aggregate(df: pd.DataFrame, plan: ParsedQuery, cols: Cols) -> Dict[str, Any]:
+def _top_k(values: np.ndarray, k: int) -> np.ndarray:
+    """Indices of the k largest values, largest first, without sorting the rest."""
+    if k < len(values):
+        idx = np.argpartition(-values, k - 1)[:k]
+    else:
+        idx = np.arange(len(values))
+    return idx[np.argsort(-values[idx], kind="stable")]
+
+
+def _top_n(df: pd.DataFrame, group_col: str, plan: ParsedQuery, cols: Cols) -> Dict[str, Any]:
+    """TOP_N with rank, share of total, cumulative share and an "others" bucket from one aggregation."""
+    k = int(plan.limit or 5)
+
+    if plan.metric == "sales":
+        agg = df.groupby(group_col, observed=True)[cols.sales].sum()
+        values = agg.to_numpy(dtype=float)
+        top = _top_k(values, k)
+        labels_top = agg.index[top]
+        top_vals = values[top]
+        total = float(values.sum())
+        covered = np.cumsum(top_vals)
+    else:
+        pos = df[df[cols.sales] > 0]
+        codes, labels = pd.factorize(pos[group_col])
+        stores, _ = pd.factorize(pos["_store_id"])
+        valid = (codes >= 0) & (stores >= 0)
+        agg = pd.Series(stores[valid]).groupby(codes[valid]).nunique()
+        values = agg.to_numpy(dtype=float)
+        top = _top_k(values, k)
+        top_codes = agg.index.to_numpy()[top]
+        labels_top = labels[top_codes]
+        top_vals = values[top]
+        total = float(len(np.unique(stores[stores >= 0])))
+
+        # Stores are shared across groups: cumulative coverage counts each store once,
+        # at the best rank among the top groups it bought from.
+        rank_of_code = np.full(len(labels), len(top), dtype=np.int64)
+        rank_of_code[top_codes] = np.arange(len(top))
+        best = pd.Series(rank_of_code[codes[valid]]).groupby(stores[valid]).min().to_numpy()
+        covered = np.cumsum(np.bincount(best, minlength=len(top) + 1)[:len(top)]).astype(float)
+
+    return _top_n_result(plan, int(len(df)), labels_top, top_vals, covered, total, len(values))
+
+
+def _top_n_result(
+    plan: ParsedQuery, rows: int, labels_top: Any, top_vals: np.ndarray, covered: np.ndarray, total: float, n_groups: int
+) -> Dict[str, Any]:
+    table = []
+    for i, (g, v) in enumerate(zip(labels_top, top_vals)):
+        table.append({
+            "group": str(g),
+            "value": float(v),
+            "rank": i + 1,
+            "share": float(v) / total if total else None,
+            "cum_share": float(covered[i]) / total if total else None,
+        })
+
+    covered_all = float(covered[-1]) if len(covered) else 0.0
+    others = {
+        "groups": int(n_groups - len(top_vals)),
+        "value": total - covered_all,
+        "share": (total - covered_all) / total if total else None,
+    }
+    return {
+        "ok": True, "rows": rows, "metric": plan.metric, "group_by": plan.group_by,
+        "total": total, "table": table, "others": others,
+    }
+
+
+def _shift_year(filters: Filters) -> Dict[str, Any]:
+    """Time filters moved back one year (same period last year)."""
+    f = filters.model_dump()
+    if f.get("month"):
+        y, m = f["month"].split("-")
+        f["month"] = f"{int(y)-1:04d}-{int(m):02d}"
+    if f.get("months"):
+        shifted = []
+        for mm in f["months"]:
+            y, m = str(mm).split("-")
+            shifted.append(f"{int(y)-1:04d}-{int(m):02d}")
+        f["months"] = shifted
+    if f.get("quarter"):
+        y, q = f["quarter"].split("-Q")
+        f["quarter"] = f"{int(y)-1:04d}-Q{q}"
+    if f.get("year"):
+        f["year"] = int(f["year"]) - 1
+    for k in ("month_from", "month_to"):
+        if f.get(k):
+            f[k] = format_key(add_months(parse_month(f[k]), -12))
+    return f
+
+
+def _aggregate(
+    df: pd.DataFrame, plan: ParsedQuery, cols: Cols, full: Optional[pd.DataFrame] = None, periods: Optional[PeriodIndex] = None
+) -> Dict[str, Any]:
+    """`full`/`periods` are the engine's whole frame, needed by COMPARE_YOY for the prior year."""
     if df.empty:
         return {"ok": True, "rows": 0, "message": "No data matched the filters.", "value": 0}
 
@@ -140,13 +340,13 @@ def _aggregate(df: pd.DataFrame, plan: ParsedQuery, cols: Cols) -> Dict[str, Any
         if group_col is None:
             raise PlanValidationError(f"Cannot group by '{gb}' (no column mapping).")
 
+        if plan.intent == "TOP_N":
+            return _top_n(df, group_col, plan, cols)
+
         if plan.metric == "sales":
-            out = df.groupby(group_col)[cols.sales].sum().sort_values(ascending=False)
+            out = df.groupby(group_col, observed=True)[cols.sales].sum().sort_values(ascending=False)
         else:
-            out = df[df[cols.sales] > 0].groupby(group_col)["_store_id"].nunique().sort_values(ascending=False)
-
-        if plan.intent == "TOP_N":
-            out = out.head(int(plan.limit or 5))
+            out = df[df[cols.sales] > 0].groupby(group_col, observed=True)["_store_id"].nunique().sort_values(ascending=False)
 
         table = [{"group": str(idx), "value": float(val)} for idx, val in out.items()]
         return {"ok": True, "rows": int(len(df)), "metric": plan.metric, "group_by": gb, "table": table}
@@ -155,55 +355,446 @@ def _aggregate(df: pd.DataFrame, plan: ParsedQuery, cols: Cols) -> Dict[str, Any
         # total current
         base_total = _aggregate(df, ParsedQuery(**{**plan.model_dump(), "intent": "TOTAL_SALES" if plan.metric == "sales" else "TOTAL_ACTIVE_STORES"}), cols)
 
-        f = plan.filters.model_dump()
-        # shift -1 year
-        if f.get("month"):
-            y, m = f["month"].split("-")
-            f["month"] = f"{int(y)-1:04d}-{int(m):02d}"
-        if f.get("months"):
-            shifted = []
-            for mm in f["months"]:
-                y, m = str(mm).split("-")
-                shifted.append(f"{int(y)-1:04d}-{int(m):02d}")
-            f["months"] = shifted
-        if f.get("quarter"):
-            y, q = f["quarter"].split("-Q")
-            f["quarter"] = f"{int(y)-1:04d}-Q{q}"
-        if f.get("year"):
-            f["year"] = int(f["year"]) - 1
-
-        plan_ly = ParsedQuery(**{**plan.model_dump(), "filters": f})
-        # reuse loaded df via module cache
-        df_ly = _apply_filters(_GLOBAL_DF, cols, plan_ly)  # type: ignore[arg-type]
+        plan_ly = ParsedQuery(**{**plan.model_dump(), "filters": _shift_year(plan.filters)})
+        if full is None:
+            raise PlanValidationError("COMPARE_YOY needs the full frame for the prior year.")
+        df_ly = _apply_filters(full, cols, plan_ly, periods)
         ly_total = _aggregate(df_ly, ParsedQuery(**{**plan_ly.model_dump(), "intent": "TOTAL_SALES" if plan.metric == "sales" else "TOTAL_ACTIVE_STORES"}), cols)
 
-        cur_val = float(base_total["value"])
-        ly_val = float(ly_total["value"])
-        delta = cur_val - ly_val
-        pct = (delta / ly_val * 100.0) if ly_val != 0 else None
-
-        return {"ok": True, "metric": plan.metric, "current": cur_val, "last_year": ly_val, "delta": delta, "delta_pct": pct}
+        return _yoy_result(plan, float(base_total["value"]), float(ly_total["value"]))
 
     raise PlanValidationError(f"Unhandled intent: {plan.intent}")
 
 
-_GLOBAL_DF: Optional[pd.DataFrame] = None
-_GLOBAL_COLS: Optional[Cols] = None
+def _yoy_result(plan: ParsedQuery, cur_val: float, ly_val: float) -> Dict[str, Any]:
+    delta = cur_val - ly_val
+    pct = (delta / ly_val * 100.0) if ly_val != 0 else None
+    return {"ok": True, "metric": plan.metric, "current": cur_val, "last_year": ly_val, "delta": delta, "delta_pct": pct}
+
+
+def _resolve_plan(values: DimensionIndex, last: Optional[int], plan: ParsedQuery) -> Tuple[ParsedQuery, Dict[str, Any]]:
+    """Rewrites filter values to the canonical spelling found in the data."""
+    filters, report = values.resolve_filters(plan.filters.model_dump())
+
+    # "last 12 months" is relative to the latest month present in the data
+    n = filters.get("last_n_months")
+    if n and last is not None:
+        filters["month_from"] = format_key(add_months(last, -(int(n) - 1)))
+        filters["month_to"] = format_key(last)
+        filters["last_n_months"] = None
+        report["last_n_months"] = {"requested": n, "resolved": f"{filters['month_from']}..{filters['month_to']}"}
+
+    if filters == plan.filters.model_dump():
+        return plan, report
+    return plan.model_copy(update={"filters": Filters(**filters)}), report
+
+
+def _cohort_ranges(plan: ParsedQuery) -> Tuple[List[Tuple[int, int]], List[Tuple[int, int]]]:
+    ranges = _time_ranges(plan.filters)
+    if not ranges:
+        raise PlanValidationError(f"{plan.intent} requires a time filter.")
+    if plan.compare_to == "same_period_last_year":
+        return ranges, [(add_months(lo, -12), add_months(hi, -12)) for lo, hi in ranges]
+
+    # previous period of the same length (month -> prior month, quarter -> prior quarter, ...)
+    if len(ranges) != 1 or ranges[0][0] == 0 or ranges[0][1] == 999912:
+        raise PlanValidationError(f"{plan.intent} vs previous period needs one bounded period (month, quarter, year or month range).")
+    lo, hi = ranges[0]
+    span = (hi // 100 - lo // 100) * 12 + (hi % 100 - lo % 100) + 1
+    return ranges, [(add_months(lo, -span), add_months(hi, -span))]
+
+
+def _dim_filtered(plan: ParsedQuery) -> bool:
+    dims = plan.filters.model_dump(exclude=set(TIME_FILTERS), exclude_none=True)
+    return any(v not in (None, "", []) for v in dims.values())
+
+
+def _period_label(ranges: List[Tuple[int, int]]) -> str:
+    return ", ".join(format_key(lo) if lo == hi else f"{format_key(lo)}..{format_key(hi)}" for lo, hi in ranges)
+
+
+def _cohort_result(
+    cur_ranges: List[Tuple[int, int]], prev_ranges: List[Tuple[int, int]], cur: np.ndarray, prev: np.ndarray,
+    label: Callable[[Any], str], name: Optional[Callable[[Any], Optional[str]]],
+) -> Dict[str, Any]:
+    """STORE_COHORT result from the sorted unique active stores of both periods."""
+    sets = cohort(cur, prev)
+    table = []
+    for status in ("new", "lost"):
+        for c in sets[status]:
+            row = {"group": label(c), "status": status}
+            if name is not None:
+                row["store_name"] = name(c)
+            table.append(row)
+
+    return {
+        "ok": True,
+        "metric": "active_stores",
+        "current_period": _period_label(cur_ranges),
+        "previous_period": _period_label(prev_ranges),
+        "current": int(len(cur)),
+        "previous": int(len(prev)),
+        "new": int(len(sets["new"])),
+        "lost": int(len(sets["lost"])),
+        "retained": int(len(sets["retained"])),
+        "table": table,
+    }
+
+
+def _driver_columns(cols: Cols) -> List[Tuple[str, str]]:
+    """(dimension, column) of every mapped GroupBy dimension but month, one dimension per column.
+
+    "region" is a compatibility alias of "country" and only used when country is unmapped.
+    """
+    out: List[Tuple[str, str]] = []
+    seen = set()
+    for dim in get_args(GroupBy):
+        skip = dim == "month" or (dim == "region" and cols.country is not None)
+        col = None if skip else getattr(cols, dim, None)
+        if col is not None and col not in seen:
+            seen.add(col)
+            out.append((dim, col))
+    return out
+
+
+def _driver_ranges(plan: ParsedQuery) -> Tuple[List[Tuple[int, int]], List[Tuple[int, int]]]:
+    """DRIVERS compares with the same period last year unless compare_to says otherwise."""
+    return _cohort_ranges(plan if plan.compare_to else plan.model_copy(update={"compare_to": "same_period_last_year"}))
+
+
+# {dimension: {earlier dimension splitting the rows alike: {value: earlier value}}}
+SameSplits = Dict[str, Dict[str, Dict[Optional[str], Optional[str]]]]
+
+
+def _driver_summary(
+    cur: pd.DataFrame, prev: pd.DataFrame, cols: Cols, metric: str,
+) -> Tuple[pd.DataFrame, float, float, SameSplits]:
+    """Current and previous value of every dimension value from both periods' matched rows.
+
+    Row arrays (period flag, sales, store) are built once; each dimension is
+    then one bincount over its category codes with the period folded into the
+    code (active_stores: over the distinct (code, store) keys). Returns
+    DataFrame(dimension, group, current, previous) of the values present in
+    either period, the two period totals, and for every dimension the earlier
+    ones whose values map one-to-one onto its values on these rows.
+    """
+    sales = cols.sales
+    assert sales is not None
+    if metric == "active_stores":
+        cur, prev = cur[cur[sales].to_numpy() > 0], prev[prev[sales].to_numpy() > 0]
+    side = np.concatenate([np.zeros(len(cur), dtype=np.int64), np.ones(len(prev), dtype=np.int64)])
+    if metric == "sales":
+        y = np.concatenate([cur[sales].to_numpy(dtype=float), prev[sales].to_numpy(dtype=float)])
+        cur_total, prev_total = float(y[:len(cur)].sum()), float(y[len(cur):].sum())
+    else:
+        stores = np.concatenate([cur["_store_id"].cat.codes.to_numpy(), prev["_store_id"].cat.codes.to_numpy()]).astype(np.int64)
+        n_stores = len(cur["_store_id"].cat.categories)
+        ok = stores >= 0
+        cur_total = float(len(np.unique(stores[:len(cur)][ok[:len(cur)]])))
+        prev_total = float(len(np.unique(stores[len(cur):][ok[len(cur):]])))
+
+    parts = []
+    same: SameSplits = {}
+    constant: List[Tuple[str, Optional[str]]] = []
+    seen: Dict[bytes, List[Tuple[str, np.ndarray, np.ndarray]]] = {}
+    for dim, col in _driver_columns(cols):
+        a, b = cur[col], prev[col]
+        if isinstance(a.dtype, pd.CategoricalDtype):
+            codes = np.concatenate([a.cat.codes.to_numpy(), b.cat.codes.to_numpy()])
+            labels = a.cat.categories
+        else:
+            codes, labels = pd.factorize(pd.concat([a, b], ignore_index=True))
+        slots = codes.astype(np.int32) + 1  # slot 0 holds missing values
+        size = len(labels) + 1
+        # (value slot) * 2 + period
+        keys = slots * 2 + side
+        if metric == "sales":
+            counts = np.bincount(keys, weights=y, minlength=2 * size)
+        else:
+            pairs = pd.unique(keys[ok] * n_stores + stores[ok])
+            counts = np.bincount(pairs // n_stores, minlength=2 * size).astype(float)
+        counts = counts.reshape(-1, 2)
+        present = np.flatnonzero((counts[:, 0] != 0) | (counts[:, 1] != 0))  # slots, 0 = missing
+        names = np.concatenate([[None], np.asarray(labels.astype(str), dtype=object)])
+        shown = present[present > 0]
+        parts.append(pd.DataFrame({
+            "dimension": dim,
+            "group": names[shown],
+            "current": counts[shown, 0],
+            "previous": counts[shown, 1],
+        }))
+
+        # earlier dimensions splitting the rows alike: their values map one-to-one onto this one's
+        if len(present) == 1 and slots.min() == slots.max():  # one value on every row
+            value = names[present[0]]
+            same[dim] = {first: {value: first_value} for first, first_value in constant}
+            constant.append((dim, value))
+            continue
+        same[dim] = {}
+        # candidates report the same (current, previous) pairs, as values with the same rows do
+        key = counts[present][np.lexsort((counts[present, 1], counts[present, 0]))].tobytes()
+        for first, first_slots, first_names in seen.get(key, []):
+            # every earlier value meets one value of this dimension, and no two meet the same one
+            first_used = np.flatnonzero(np.bincount(first_slots, minlength=len(first_names)))
+            to_slot = np.zeros(len(first_names), dtype=np.int32)
+            to_slot[first_slots] = slots
+            image = to_slot[first_used]
+            if len(np.unique(image)) == len(image) and np.array_equal(to_slot[first_slots], slots):
+                same[dim][first] = dict(zip(names[image], first_names[first_used]))
+        seen.setdefault(key, []).append((dim, slots, names))
+
+    summary = pd.concat(parts, ignore_index=True) if parts else pd.DataFrame(columns=["dimension", "group", "current", "previous"])
+    return summary, cur_total, prev_total, same
+
+
+def _driver_parts(
+    df: pd.DataFrame, cols: Cols, plan: ParsedQuery, cur_ranges: List[Tuple[int, int]], prev_ranges: List[Tuple[int, int]],
+    periods: Optional[PeriodIndex] = None,
+) -> Tuple[int, int, pd.DataFrame, float, float, SameSplits]:
+    """Matched rows of each period (under the plan's dimension filters) and their _driver_summary."""
+    no_time = plan.model_copy(update={"filters": plan.filters.model_copy(update={k: None for k in TIME_FILTERS})})
+    cur = _apply_filters(_slice_periods(df, cols, cur_ranges, periods), cols, no_time)
+    prev = _apply_filters(_slice_periods(df, cols, prev_ranges, periods), cols, no_time)
+    return (len(cur), len(prev), *_driver_summary(cur, prev, cols, plan.metric or "sales"))
+
+
+def _merge_same(parts: List[SameSplits]) -> Dict[str, str]:
+    """Dimensions splitting the rows exactly like an earlier one in every part: {dimension: earlier}.
+
+    The value pairs of all parts must agree and stay one-to-one overall.
+    """
+    out: Dict[str, str] = {}
+    for b in (parts[0] if parts else {}):
+        for a in parts[0][b]:
+            if a in out or not all(a in p.get(b, {}) for p in parts):
+                continue
+            pairs: Dict[Optional[str], Optional[str]] = {}
+            if all(pairs.setdefault(v, w) == w for p in parts for v, w in p[b][a].items()) and (
+                len(set(pairs.values())) == len(pairs)
+            ):
+                out[b] = a
+                break
+    return out
+
+
+def _drivers_result(
+    plan: ParsedQuery, cur_ranges: List[Tuple[int, int]], prev_ranges: List[Tuple[int, int]],
+    cur_rows: int, prev_rows: int, summary: pd.DataFrame, cur_total: float, prev_total: float, same: List[SameSplits],
+) -> Dict[str, Any]:
+    """DRIVERS result: both period totals and the dimension values ranked by absolute change.
+
+    Dimensions with one value over both periods (e.g. pinned by a filter) are
+    left out, and so are dimensions splitting the rows exactly like an earlier
+    one (`same`: _driver_summary's report per part; listed in "collapsed").
+    Without rows in the comparison period there is nothing to compare with.
+    """
+    rows = cur_rows + prev_rows
+    if rows == 0:
+        return {"ok": True, "rows": 0, "message": "No data matched the filters.", "value": 0}
+    num = (lambda v: round(float(v), 6)) if plan.metric == "sales" else int
+    if prev_rows == 0:
+        return {
+            "ok": True,
+            "rows": rows,
+            "metric": plan.metric,
+            "current_period": _period_label(cur_ranges),
+            "previous_period": _period_label(prev_ranges),
+            "current": num(cur_total),
+            "message": f"No data for the comparison period ({_period_label(prev_ranges)}).",
+        }
+    delta = cur_total - prev_total
+
+    n_values = summary.groupby("dimension", sort=False).size()
+    single = [d for d, n in n_values.items() if n <= 1]
+    collapsed = {d: first for d, first in _merge_same(same).items() if d not in single}
+    ranked = summary[~summary["dimension"].isin(single + list(collapsed))]
+    ranked = ranked.assign(delta=ranked["current"] - ranked["previous"])
+    ranked = ranked.assign(impact=ranked["delta"].abs().round(6)).sort_values(
+        ["impact", "dimension", "group"], ascending=[False, True, True], kind="stable"
+    )
+
+    def row(r: Any) -> Dict[str, Any]:
+        return {
+            "dimension": r.dimension, "group": r.group, "current": num(r.current), "previous": num(r.previous),
+            "delta": num(r.delta), "share_of_change": round(float(r.delta) / delta, 6) if delta else None,
+        }
+
+    by_dimension: Dict[str, List[Dict[str, Any]]] = {}
+    for r in ranked.groupby("dimension", sort=False).head(3).itertuples(index=False):
+        by_dimension.setdefault(r.dimension, []).append({"group": r.group, "delta": num(r.delta)})
+    return {
+        "ok": True,
+        "rows": rows,
+        "metric": plan.metric,
+        "current_period": _period_label(cur_ranges),
+        "previous_period": _period_label(prev_ranges),
+        "current": num(cur_total),
+        "previous": num(prev_total),
+        "delta": num(delta),
+        "delta_pct": (delta / prev_total * 100.0) if prev_total else None,
+        "table": [row(r) for r in ranked.head(int(plan.limit or 10)).itertuples(index=False)],
+        "by_dimension": by_dimension,
+        "single_valued": single,
+        "collapsed": collapsed,
+    }
 
 
 class SalesEngine:
-    def __init__(self, df: pd.DataFrame, cols: Cols):
+    def __init__(self, df: pd.DataFrame, cols: Cols, backend: str = "pandas", snapshot: str = ""):
+        self.periods: Optional[PeriodIndex] = None
+        if cols.period_key is not None:
+            if not df[cols.period_key].is_monotonic_increasing:
+                df = df.sort_values(cols.period_key, kind="stable").reset_index(drop=True)
+            self.periods = PeriodIndex.build(df[cols.period_key].to_numpy())
+        if not isinstance(df.index, pd.RangeIndex) or df.index.start != 0 or df.index.step != 1:
+            df = df.reset_index(drop=True)  # session row sets are positions == labels
+        if "_store_id" in df.columns and not isinstance(df["_store_id"].dtype, pd.CategoricalDtype):
+            df = df.assign(_store_id=df["_store_id"].astype("category"))
         self.df = df
         self.cols = cols
+        self.values = DimensionIndex.build(df, cols)
+
+        self.store_sets: Optional[StoreSets] = None
+        self._store_name_map: Optional[Dict[int, str]] = None
+        if self.periods is not None and cols.sales is not None and "_store_id" in df.columns:
+            self.store_sets = StoreSets.build(
+                self.periods, df["_store_id"].cat.codes.to_numpy(), df[cols.sales].to_numpy(dtype=float)
+            )
+
+        # approximate mode: a stratified (period x channel) sample, built on the first approximate request
+        self.sample: Optional[StratifiedSample] = None
+        self._sample_lock = threading.Lock()
+
+        self.backend = backend
+        self.sql: Any = None
+        if backend == "duckdb":
+            from .sql_backend import DuckDBBackend
+
+            self.sql = DuckDBBackend(df, cols, snapshot, settings.duckdb_threads)
+        elif backend != "pandas":
+            raise ValueError(f"Unknown sales backend: {backend!r}")
+        self.token = uuid.uuid4().hex  # identifies this load: session row sets are only valid against it
+
+        self._nbytes: Optional[int] = None
+
+    def memory_bytes(self) -> int:
+        """Approximate resident size of the frame (computed once)."""
+        if self._nbytes is None:
+            self._nbytes = int(self.df.memory_usage(deep=True).sum())
+            if self.sample is not None:
+                self._nbytes += int(self.sample.df.memory_usage(deep=True).sum())
+        return self._nbytes
+
+    def approx_sample(self) -> Optional[StratifiedSample]:
+        """The approximate-mode sample, built once on first use.
+
+        None (approximate requests run exactly) when APPROX_SAMPLE_FRAC is 0 or
+        the dataset has fewer than APPROX_MIN_DATASET_ROWS rows: a scan of a
+        small frame is as fast as the estimate and has no sampling error.
+        """
+        if len(self.df) < settings.approx_min_dataset_rows:
+            return None
+        if self.sample is None and settings.approx_sample_frac > 0 and self.periods is not None and self.cols.sales is not None:
+            with self._sample_lock:
+                if self.sample is None:
+                    sample = StratifiedSample.build(
+                        self.df, self.cols.period_key, self.cols.channel,
+                        settings.approx_sample_frac, settings.approx_min_rows, settings.approx_seed,
+                    )
+                    if self._nbytes is not None:
+                        self._nbytes += int(sample.df.memory_usage(deep=True).sum())
+                    self.sample = sample
+        return self.sample
 
     @classmethod
     def from_file(cls, path: str) -> "SalesEngine":
-        global _GLOBAL_DF, _GLOBAL_COLS
         df, cols = load_sales_dataframe(path)
-        _GLOBAL_DF, _GLOBAL_COLS = df, cols
-        return cls(df, cols)
+        return cls(df, cols, settings.sales_backend, settings.sales_snapshot)
+
+    def resolve_plan(self, plan: ParsedQuery) -> Tuple[ParsedQuery, Dict[str, Any]]:
+        """Rewrites filter values to the canonical spelling found in the data."""
+        return _resolve_plan(self.values, self.periods.last if self.periods is not None else None, plan)
+
+    def _active_store_codes(self, plan: ParsedQuery, ranges: List[Tuple[int, int]], dim_filtered: bool) -> np.ndarray:
+        if not dim_filtered and self.store_sets is not None:
+            return self.store_sets.stores(ranges)
+        df = _slice_periods(self.df, self.cols, ranges, self.periods)
+        no_time = plan.filters.model_copy(update={k: None for k in TIME_FILTERS})
+        df = _apply_filters(df, self.cols, plan.model_copy(update={"filters": no_time}))
+        codes = df["_store_id"].cat.codes.to_numpy()[df[self.cols.sales].to_numpy() > 0]
+        return np.unique(codes[codes >= 0])
+
+    def _store_cohort(self, plan: ParsedQuery) -> Dict[str, Any]:
+        """New / lost / retained active stores between the plan's period and the comparison period."""
+        cur_ranges, prev_ranges = _cohort_ranges(plan)
+        dim_filtered = _dim_filtered(plan)
+        cur = self._active_store_codes(plan, cur_ranges, dim_filtered)
+        prev = self._active_store_codes(plan, prev_ranges, dim_filtered)
+
+        ids = self.df["_store_id"].cat.categories
+        names = self._store_names()
+        return _cohort_result(
+            cur_ranges, prev_ranges, cur, prev,
+            lambda c: str(ids[c]), (lambda c: names.get(int(c))) if names is not None else None,
+        )
+
+    def _drivers(self, plan: ParsedQuery) -> Dict[str, Any]:
+        """Which dimension values moved the metric between the plan's period and the comparison period."""
+        cur_ranges, prev_ranges = _driver_ranges(plan)
+        *parts, same = _driver_parts(self.df, self.cols, plan, cur_ranges, prev_ranges, self.periods)
+        return _drivers_result(plan, cur_ranges, prev_ranges, *parts, [same])
+
+    def _store_names(self) -> Optional[Dict[int, str]]:
+        if self.cols.customer_account_name is None:
+            return None
+        if self._store_name_map is None:
+            codes = self.df["_store_id"].cat.codes.to_numpy()
+            first = self.df[self.cols.customer_account_name].groupby(codes, observed=True).first()
+            self._store_name_map = {int(k): str(v) for k, v in first.items() if k >= 0}
+        return self._store_name_map
 
     def execute(self, plan: ParsedQuery) -> Dict[str, Any]:
+        return self.execute_session(plan)[0]
+
+    def execute_session(
+        self, plan: ParsedQuery, prior: Optional[SessionState] = None, approximate: bool = False
+    ) -> Tuple[Dict[str, Any], SessionState]:
+        """Runs the plan; a follow-up that only narrows the prior plan scans the prior rows only.
+
+        approximate: estimate totals, breakdowns and TOP_N from the sample
+        (result["approximate"] is True, with ci_low/ci_high); other plans, and
+        filters no sampled row matches, still run exactly.
+        Returns the result and the state to keep for the next turn.
+        """
         _validate_plan(plan, self.cols)
-        df = _apply_filters(self.df, self.cols, plan)
-        return _aggregate(df, plan, self.cols)
+        plan, resolution = self.resolve_plan(plan)
+        rows: Optional[np.ndarray] = None
+        approx = None
+        sample = self.approx_sample() if approximate else None
+        if sample is not None:
+            from .approx import estimate, store_cap
+
+            approx = estimate(sample, self.cols, plan, store_cap(self, plan) if plan.metric == "active_stores" else None)
+        if approx is not None:
+            result = approx
+        elif plan.intent == "STORE_COHORT":
+            result = self._store_cohort(plan)
+        elif plan.intent == "DRIVERS":
+            result = self._drivers(plan)
+        elif self.sql is not None:
+            result = self.sql.execute(plan)
+        else:
+            if (
+                prior is not None and prior.rows is not None and prior.engine == self.token
+                and _narrows(prior.plan.filters, plan.filters)
+            ):
+                # rows are sorted positions, so the subset stays period-sorted; filter it by mask
+                df = _apply_filters(self.df.take(prior.rows), self.cols, plan)
+            else:
+                df = _apply_filters(self.df, self.cols, plan, self.periods)
+            result = _aggregate(df, plan, self.cols, self.df, self.periods)
+            if len(df) <= settings.session_max_rows:
+                rows = df.index.to_numpy(dtype=np.int32 if len(self.df) < 2**31 else np.int64)
+        if resolution:
+            result["filter_resolution"] = resolution
+        return result, SessionState(plan=plan, rows=rows, engine=self.token)
@@ -0,0 +1,268 @@
+from __future__ import annotations
+
+import multiprocessing
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from ..data.sales_schema import Cols
+from ..data.snapshot import read_snapshot
+from ..data.value_index import DimensionIndex, ValueIndex
+from ..schemas import ParsedQuery
+from ..sessions import SessionState
+from .sales_engine import (
+    PlanValidationError,
+    SalesEngine,
+    SameSplits,
+    _aggregate,
+    _apply_filters,
+    _cohort_ranges,
+    _cohort_result,
+    _dim_filtered,
+    _driver_parts,
+    _driver_ranges,
+    _drivers_result,
+    _group_col,
+    _resolve_plan,
+    _shift_year,
+    _time_ranges,
+    _validate_plan,
+    _yoy_result,
+)
+
+SHARD_BY = ("year", "quarter")
+
+
+def shard_ranges(keys: np.ndarray, by: str) -> List[Tuple[int, int]]:
+    """Inclusive period-key range of every year (or quarter) present in `keys`."""
+    if by not in SHARD_BY:
+        raise ValueError(f"Unknown shard split: {by!r} (expected one of {SHARD_BY})")
+    out = set()
+    for k in np.unique(keys):
+        y, m = divmod(int(k), 100)
+        lo = y * 100 + (1 if by == "year" else (m - 1) // 3 * 3 + 1)
+        out.add((lo, lo + (11 if by == "year" else 2)))
+    return sorted(out)
+
+
+def _overlaps(shard: Tuple[int, int], ranges: Optional[List[Tuple[int, int]]]) -> bool:
+    return ranges is None or any(lo <= shard[1] and shard[0] <= hi for lo, hi in ranges)
+
+
+# --- worker side: one SalesEngine over one period slice per process ---
+
+_SHARD: Optional[SalesEngine] = None
+
+
+def _init_shard(snapshot: str, lo: int, hi: int) -> None:
+    global _SHARD
+    df, cols = read_snapshot(snapshot, (lo, hi))
+    _SHARD = SalesEngine(df, cols)
+
+
+def _shard_info() -> Dict[str, Any]:
+    assert _SHARD is not None
+    return {
+        "rows": int(len(_SHARD.df)),
+        "bytes": _SHARD.memory_bytes(),
+        "last": _SHARD.periods.last if _SHARD.periods is not None else None,
+        "values": {dim: idx.values for dim, idx in _SHARD.values.indexes.items()},
+    }
+
+
+def partial_frame(engine: SalesEngine, plan: ParsedQuery) -> Tuple[int, pd.DataFrame]:
+    """Matched row count and a small frame that _aggregate over all shards' frames turns into the result.
+
+    sales: one sum per group (or one total); active_stores: the distinct
+    (group, store) pairs with sales > 0, so store counts stay exact across shards.
+    """
+    cols = engine.cols
+    df = _apply_filters(engine.df, cols, plan, engine.periods)
+    keys: List[str] = []
+    if plan.intent in ("BREAKDOWN", "TOP_N"):
+        group_col = _group_col(cols, plan.group_by or "")
+        if group_col is None:
+            raise PlanValidationError(f"Cannot group by '{plan.group_by}' (no column mapping).")
+        keys = [group_col]
+
+    if plan.metric == "sales":
+        if keys:
+            part = df.groupby(keys, observed=True)[cols.sales].sum().reset_index()
+        else:
+            part = pd.DataFrame({cols.sales: [float(df[cols.sales].sum())]})
+    else:
+        part = df.loc[df[cols.sales] > 0, keys + ["_store_id"]].drop_duplicates().assign(**{cols.sales: 1.0})
+    for c in keys + ["_store_id"]:
+        if c in part.columns and isinstance(part[c].dtype, pd.CategoricalDtype):
+            part[c] = part[c].cat.remove_unused_categories()
+    return int(len(df)), part
+
+
+def _shard_partial(plan: Dict[str, Any]) -> Tuple[int, pd.DataFrame]:
+    assert _SHARD is not None
+    return partial_frame(_SHARD, ParsedQuery.model_validate(plan))
+
+
+def _shard_stores(plan: Dict[str, Any], ranges: List[Tuple[int, int]]) -> Tuple[List[str], Optional[Dict[str, str]]]:
+    """Active stores (labels) in `ranges` under the plan's dimension filters, with their names."""
+    assert _SHARD is not None
+    p = ParsedQuery.model_validate(plan)
+    codes = _SHARD._active_store_codes(p, ranges, _dim_filtered(p))
+    ids = _SHARD.df["_store_id"].cat.categories
+    labels = [str(ids[c]) for c in codes]
+    names = _SHARD._store_names()
+    return labels, ({lb: names.get(int(c), "nan") for lb, c in zip(labels, codes)} if names is not None else None)
+
+
+def _shard_drivers(
+    plan: Dict[str, Any], cur_ranges: List[Tuple[int, int]], prev_ranges: List[Tuple[int, int]],
+) -> Tuple[int, int, pd.DataFrame, float, float, SameSplits]:
+    assert _SHARD is not None
+    return _driver_parts(_SHARD.df, _SHARD.cols, ParsedQuery.model_validate(plan), cur_ranges, prev_ranges, _SHARD.periods)
+
+
+# --- coordinator ---
+
+class ShardedEngine:
+    """A dataset split by year (or quarter) across local worker processes.
+
+    Each worker loads only its slice of the Parquet snapshot. Plans are
+    resolved here, sent to the shards whose periods they touch, and the
+    partial results merged: sums are added, store sets unioned (counts stay
+    exact) and TOP_N ranked over the merged per-group values. Same interface
+    as SalesEngine for the API and reports; follow-ups are not narrowed to
+    prior rows, and DRIVERS supports metric "sales" only.
+    """
+
+    def __init__(self, snapshot: str, cols: Cols, keys: np.ndarray, by: str = "year"):
+        self.cols = cols
+        self.by = by
+        self.backend = f"shards-{by}"  # float sums merge in another order than a single engine's
+        self.ranges = shard_ranges(keys, by)
+        # spawn: workers start clean instead of forking a threaded server
+        ctx = multiprocessing.get_context("spawn")
+        self._pools = [
+            ProcessPoolExecutor(max_workers=1, mp_context=ctx, initializer=_init_shard, initargs=(snapshot, lo, hi))
+            for lo, hi in self.ranges
+        ]
+        try:
+            infos = self._fan(_shard_info, list(range(len(self._pools))))
+        except Exception:
+            self.close()
+            raise
+        values: Dict[str, set] = {}
+        for info in infos:
+            for dim, vals in info["values"].items():
+                values.setdefault(dim, set()).update(vals)
+        self.values = DimensionIndex({dim: ValueIndex.build(v) for dim, v in values.items()})
+        self.last: Optional[int] = max((i["last"] for i in infos if i["last"] is not None), default=None)
+        self.shard_rows = [i["rows"] for i in infos]
+        self._nbytes = sum(i["bytes"] for i in infos)
+        self.token = uuid.uuid4().hex
+
+    def memory_bytes(self) -> int:
+        """Resident size of all shards (held by the worker processes)."""
+        return self._nbytes
+
+    def close(self) -> None:
+        for pool in self._pools:
+            pool.shutdown(wait=False, cancel_futures=True)
+        self._pools = []
+
+    def __del__(self) -> None:
+        try:
+            self.close()
+        except Exception:
+            pass
+
+    def _fan(self, fn: Callable[..., Any], shards: List[int], *args: Any) -> List[Any]:
+        futures = [self._pools[i].submit(fn, *args) for i in shards]
+        return [f.result() for f in futures]
+
+    def _touching(self, ranges: Optional[List[Tuple[int, int]]]) -> List[int]:
+        return [i for i, r in enumerate(self.ranges) if _overlaps(r, ranges)]
+
+    def resolve_plan(self, plan: ParsedQuery) -> Tuple[ParsedQuery, Dict[str, Any]]:
+        return _resolve_plan(self.values, self.last, plan)
+
+    def _gather(self, plan: ParsedQuery) -> Dict[str, Any]:
+        parts = self._fan(_shard_partial, self._touching(_time_ranges(plan.filters)), plan.model_dump())
+        rows = sum(n for n, _ in parts)
+        if rows == 0:
+            return _aggregate(pd.DataFrame(), plan, self.cols)
+        frames = [f for _, f in parts if len(f)]
+        if frames:
+            merged = pd.concat(frames, ignore_index=True)
+        else:  # rows matched but none with sales > 0 (or all group keys missing)
+            merged = pd.DataFrame({c: [None] for c in parts[0][1].columns}).assign(**{self.cols.sales: 0.0})
+        result = _aggregate(merged, plan, self.cols)
+        result["rows"] = rows
+        return result
+
+    def _store_cohort(self, plan: ParsedQuery) -> Dict[str, Any]:
+        cur_ranges, prev_ranges = _cohort_ranges(plan)
+        names: Dict[str, str] = {}
+        with_names = False
+
+        def stores(ranges: List[Tuple[int, int]]) -> np.ndarray:
+            nonlocal with_names
+            labels: set = set()
+            # shards in period order: a store's name is its first one, as in a single engine
+            for part, part_names in self._fan(_shard_stores, self._touching(ranges), plan.model_dump(), ranges):
+                labels.update(part)
+                if part_names is not None:
+                    with_names = True
+                    for lb, n in part_names.items():
+                        if names.get(lb, "nan") == "nan":
+                            names[lb] = n
+            return np.array(sorted(labels), dtype=object)
+
+        cur, prev = stores(cur_ranges), stores(prev_ranges)
+        return _cohort_result(cur_ranges, prev_ranges, cur, prev, str, names.get if with_names else None)
+
+    def _drivers(self, plan: ParsedQuery) -> Dict[str, Any]:
+        if plan.metric != "sales":
+            # per-value store counts would need every shard's (value, store) pairs
+            raise PlanValidationError("DRIVERS on sharded datasets supports metric 'sales' only.")
+        cur_ranges, prev_ranges = _driver_ranges(plan)
+        parts = self._fan(_shard_drivers, self._touching(cur_ranges + prev_ranges), plan.model_dump(), cur_ranges, prev_ranges)
+        parts = [p for p in parts if p[0] or p[1]]
+        if not parts:
+            return _drivers_result(plan, cur_ranges, prev_ranges, 0, 0, pd.DataFrame(), 0.0, 0.0, [])
+        summary = pd.concat([p[2] for p in parts], ignore_index=True)
+        summary = summary.groupby(["dimension", "group"], sort=False)[["current", "previous"]].sum().reset_index()
+        # a dimension collapses only if every shard splits its rows alike with the same value mapping
+        return _drivers_result(
+            plan, cur_ranges, prev_ranges, sum(p[0] for p in parts), sum(p[1] for p in parts), summary,
+            sum(p[3] for p in parts), sum(p[4] for p in parts), [p[5] for p in parts],
+        )
+
+    def execute(self, plan: ParsedQuery) -> Dict[str, Any]:
+        return self.execute_session(plan)[0]
+
+    def execute_session(
+        self, plan: ParsedQuery, prior: Optional[SessionState] = None, approximate: bool = False
+    ) -> Tuple[Dict[str, Any], SessionState]:
+        # shards always answer exactly; `approximate` is accepted for interface parity
+        _validate_plan(plan, self.cols)
+        plan, resolution = self.resolve_plan(plan)
+        if plan.intent == "STORE_COHORT":
+            result = self._store_cohort(plan)
+        elif plan.intent == "DRIVERS":
+            result = self._drivers(plan)
+        elif plan.intent == "COMPARE_YOY":
+            total = "TOTAL_SALES" if plan.metric == "sales" else "TOTAL_ACTIVE_STORES"
+            cur = self._gather(plan.model_copy(update={"intent": total}))
+            if cur["rows"] == 0:
+                result = cur
+            else:
+                ly = self._gather(ParsedQuery(**{**plan.model_dump(), "intent": total, "filters": _shift_year(plan.filters)}))
+                result = _yoy_result(plan, float(cur["value"]), float(ly["value"]))
+        else:
+            result = self._gather(plan)
+        if resolution:
+            result["filter_resolution"] = resolution
+        return result, SessionState(plan=plan, engine=self.token)
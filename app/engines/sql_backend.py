@@ -0,0 +1,225 @@
+from __future__ import annotations
+
+import os
+import tempfile
+import uuid
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from ..schemas import ParsedQuery
+from ..data.sales_schema import Cols
+from ..data.snapshot import text_columns
+from .sales_engine import (
+    PlanValidationError,
+    _group_col,
+    _norm,
+    _shift_year,
+    _time_ranges,
+    _top_k,
+    _top_n_result,
+)
+
+# Intents compiled to SQL; STORE_COHORT stays on the precomputed store sets, DRIVERS on the frame.
+SQL_INTENTS = {"TOTAL_SALES", "TOTAL_ACTIVE_STORES", "BREAKDOWN", "COMPARE_YOY", "TOP_N"}
+
+# Filters fields that map 1:1 to a Cols attribute (equality, case-insensitive)
+DIM_FILTERS = (
+    "brand", "category", "product", "region", "country", "city", "area", "channel", "sub_channel",
+    "salesman", "customer", "customer_account_name", "retailer_group", "retailer_sub_group",
+    "master_distributor", "distributor", "line_of_business", "supplier", "agency", "segment",
+    "sub_brand", "promo", "source",
+)
+
+STORE = "_store_id"
+
+
+def _q(name: str) -> str:
+    return '"' + name.replace('"', '""') + '"'
+
+
+def _lit(value: str) -> str:
+    # string literal for statements that take no bound parameters (COPY ... TO, read_parquet in a view)
+    return "'" + value.replace("'", "''") + "'"
+
+
+def _text(col: str) -> str:
+    return f"CAST({_q(col)} AS VARCHAR)"
+
+
+def compile_where(plan: ParsedQuery, cols: Cols, filters: Optional[Dict[str, Any]] = None) -> Tuple[str, List[Any]]:
+    """WHERE clause + parameters with the same semantics as _apply_filters."""
+    f = plan.filters if filters is None else plan.filters.model_validate(filters)
+    clauses: List[str] = []
+    params: List[Any] = []
+
+    ranges = _time_ranges(f)
+    if ranges is not None:
+        if cols.period_key is None:
+            raise PlanValidationError("The SQL backend needs a period key column.")
+        if not ranges:
+            clauses.append("FALSE")
+        else:
+            clauses.append("(" + " OR ".join(f"{_q(cols.period_key)} BETWEEN ? AND ?" for _ in ranges) + ")")
+            for lo, hi in ranges:
+                params += [lo, hi]
+
+    for attr in DIM_FILTERS:
+        v = _norm(getattr(f, attr))
+        col = getattr(cols, attr, None)
+        if not v or col is None:
+            continue
+        clauses.append(f"lower(trim({_text(col)})) = ?")
+        params.append(v.lower())
+
+    for m in f.match or []:
+        col = getattr(cols, m.dim, None)
+        if col is None:
+            continue
+        if m.op == "in":
+            if not m.values:
+                clauses.append("FALSE")
+                continue
+            clauses.append(f"trim({_text(col)}) IN (" + ", ".join("?" for _ in m.values) + ")")
+            params += list(m.values)
+            continue
+        pats = [v.strip().lower() for v in m.values if v.strip()]
+        fn = "contains" if m.op == "contains" else "starts_with"
+        if not pats:
+            clauses.append("FALSE")
+            continue
+        clauses.append("(" + " OR ".join(f"{fn}(lower(trim({_text(col)})), ?)" for _ in pats) + ")")
+        params += pats
+
+    return (" AND ".join(clauses) if clauses else "TRUE"), params
+
+
+class DuckDBBackend:
+    """Runs plans as SQL against a Parquet snapshot of the loaded frame.
+
+    An alternative execution path, not a larger-than-memory one: the
+    SalesEngine keeps the loaded frame resident (value resolution, store sets,
+    the approximate-mode sample and DRIVERS read it), so memory use is the
+    frame plus DuckDB's working set. On data that fits in memory it is slower
+    than the pandas path; benchmarks/backend_conformance.py checks and times it.
+    """
+
+    def __init__(self, df: pd.DataFrame, cols: Cols, snapshot: str = "", threads: int = 0):
+        try:
+            import duckdb
+        except ImportError:
+            raise RuntimeError("SALES_BACKEND=duckdb requires the duckdb package.")
+
+        if cols.sales is None:
+            raise PlanValidationError("Sales column mapping not available.")
+        self.cols = cols
+        self._temp = not snapshot
+        self.snapshot = snapshot or os.path.join(tempfile.gettempdir(), f"sales_snapshot_{uuid.uuid4().hex}.parquet")
+
+        self.con = duckdb.connect()
+        if threads:
+            self.con.execute(f"SET threads = {int(threads)}")
+        self.con.register("frame", text_columns(df))
+        self.con.execute(f"COPY frame TO {_lit(self.snapshot)} (FORMAT PARQUET)")
+        self.con.unregister("frame")
+        self.con.execute(f"CREATE VIEW sales AS SELECT * FROM read_parquet({_lit(self.snapshot)})")
+
+    def __del__(self) -> None:
+        # temp snapshots go with the engine (e.g. when the dataset registry evicts it)
+        try:
+            self.con.close()
+            if self._temp and os.path.exists(self.snapshot):
+                os.remove(self.snapshot)
+        except Exception:
+            pass
+
+    def _fetch(self, sql: str, params: List[Any]) -> List[Tuple[Any, ...]]:
+        cur = self.con.cursor()  # one cursor per call: safe across request threads
+        try:
+            return cur.execute(sql, params).fetchall()
+        finally:
+            cur.close()
+
+    def _total(self, plan: ParsedQuery, where: str, params: List[Any]) -> Tuple[int, float]:
+        s = _q(self.cols.sales)
+        if plan.metric == "sales":
+            value = f"COALESCE(SUM({s}), 0)"
+        else:
+            value = f"COUNT(DISTINCT {_q(STORE)}) FILTER (WHERE {s} > 0)"
+        rows, v = self._fetch(f"SELECT COUNT(*), {value} FROM sales WHERE {where}", params)[0]
+        return int(rows), float(v)
+
+    def _groups(self, plan: ParsedQuery, group_col: str, where: str, params: List[Any]) -> List[Tuple[Any, float]]:
+        g, s = _q(group_col), _q(self.cols.sales)
+        if plan.metric == "sales":
+            sql = f"SELECT {g}, COALESCE(SUM({s}), 0) FROM sales WHERE {where} AND {g} IS NOT NULL GROUP BY {g}"
+        else:
+            sql = (
+                f"SELECT {g}, COUNT(DISTINCT {_q(STORE)}) FROM sales "
+                f"WHERE {where} AND {g} IS NOT NULL AND {s} > 0 GROUP BY {g}"
+            )
+        return [(k, float(v)) for k, v in self._fetch(sql + f" ORDER BY 2 DESC, {g}", params)]
+
+    def _top_n(self, plan: ParsedQuery, group_col: str, rows: int, where: str, params: List[Any]) -> Dict[str, Any]:
+        k = int(plan.limit or 5)
+        groups = self._groups(plan, group_col, where, params)
+        values = np.array([v for _, v in groups], dtype=float)
+        top = _top_k(values, k)
+        labels_top = [groups[i][0] for i in top]
+        top_vals = values[top]
+
+        if plan.metric == "sales":
+            return _top_n_result(plan, rows, labels_top, top_vals, np.cumsum(top_vals), float(values.sum()), len(values))
+
+        # distinct stores overall, and each store counted once at its best rank among the top groups
+        g, s, st = _q(group_col), _q(self.cols.sales), _q(STORE)
+        _, total = self._total(plan, where, params)
+        if not labels_top:
+            return _top_n_result(plan, rows, labels_top, top_vals, np.zeros(0), total, len(values))
+        ranks = " UNION ALL ".join("SELECT ? AS g, ? AS r" for _ in labels_top)
+        rank_params: List[Any] = []
+        for i, label in enumerate(labels_top):
+            rank_params += [label, i]
+        sql = (
+            f"WITH top AS ({ranks}), best AS ("
+            f"  SELECT {st}, MIN(top.r) AS r FROM sales JOIN top ON {g} = top.g"
+            f"  WHERE {where} AND {s} > 0 AND {st} IS NOT NULL GROUP BY {st})"
+            f" SELECT r, COUNT(*) FROM best GROUP BY r"
+        )
+        per_rank = np.zeros(len(labels_top))
+        for r, n in self._fetch(sql, rank_params + params):
+            per_rank[int(r)] = n
+        return _top_n_result(plan, rows, labels_top, top_vals, np.cumsum(per_rank), total, len(values))
+
+    def execute(self, plan: ParsedQuery) -> Dict[str, Any]:
+        """Same result shapes as the pandas path (_apply_filters + _aggregate)."""
+        where, params = compile_where(plan, self.cols)
+        rows, value = self._total(plan, where, params)
+        if rows == 0:
+            return {"ok": True, "rows": 0, "message": "No data matched the filters.", "value": 0}
+
+        if plan.intent in ("TOTAL_SALES", "TOTAL_ACTIVE_STORES"):
+            if plan.metric == "sales":
+                return {"ok": True, "rows": rows, "metric": "sales", "value": value}
+            return {"ok": True, "rows": rows, "metric": "active_stores", "value": int(value)}
+
+        if plan.intent in ("BREAKDOWN", "TOP_N"):
+            gb = plan.group_by
+            assert gb is not None
+            group_col = _group_col(self.cols, gb)
+            if group_col is None:
+                raise PlanValidationError(f"Cannot group by '{gb}' (no column mapping).")
+            if plan.intent == "TOP_N":
+                return self._top_n(plan, group_col, rows, where, params)
+            table = [{"group": str(k), "value": v} for k, v in self._groups(plan, group_col, where, params)]
+            return {"ok": True, "rows": rows, "metric": plan.metric, "group_by": gb, "table": table}
+
+        if plan.intent == "COMPARE_YOY":
+            where_ly, params_ly = compile_where(plan, self.cols, _shift_year(plan.filters))
+            _, ly_val = self._total(plan, where_ly, params_ly)
+            delta = value - ly_val
+            pct = (delta / ly_val * 100.0) if ly_val != 0 else None
+            return {"ok": True, "metric": plan.metric, "current": value, "last_year": ly_val, "delta": delta, "delta_pct": pct}
+
+        raise PlanValidationError(f"Unhandled intent: {plan.intent}")
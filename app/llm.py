@@ -1,10 +1,18 @@
 from __future__ import annotations
+import hashlib
 import json
-from typing import Any, Dict, Optional
+import random
+import threading
+import time
+from typing import TYPE_CHECKING, Any, Callable, Dict, Optional
 
-from openai import OpenAI
 from .config import settings
 
+if TYPE_CHECKING:
+    from openai import OpenAI
+
+# The SDK is imported on first use: it is the slowest import in the API and
+# sales-only workers, health checks and the CLI never call the model.
 _client: Optional[OpenAI] = None
 
 def client() -> OpenAI:
@@ -12,9 +20,125 @@ def client() -> OpenAI:
     if _client is None:
         if not settings.openai_api_key:
             raise RuntimeError("OPENAI_API_KEY is not set.")
-        _client = OpenAI(api_key=settings.openai_api_key)
+        from openai import OpenAI
+        # Retries are handled by _call_with_retry so they respect the limiter below
+        _client = OpenAI(api_key=settings.openai_api_key, base_url=settings.openai_base_url or None, max_retries=0)
     return _client
 
+
+class _TokenBucket:
+    """Blocking token bucket: `rate` tokens/sec, holding at most `burst` tokens."""
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.capacity = max(1, burst)
+        self._tokens = float(self.capacity)
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._last) * self.rate)
+                self._last = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+class _Flight:
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self) -> None:
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class _SingleFlight:
+    """Coalesces concurrent calls with the same key into one execution."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._flights: Dict[str, _Flight] = {}
+
+    def do(self, key: str, fn: Callable[[], Any]) -> Any:
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+        assert flight is not None
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.result
+
+        try:
+            flight.result = fn()
+            return flight.result
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                self._flights.pop(key, None)
+            flight.done.set()
+
+
+_inflight = _SingleFlight()
+_semaphore = threading.BoundedSemaphore(max(1, settings.llm_max_concurrency))
+_bucket: Optional[_TokenBucket] = _TokenBucket(settings.llm_rate_per_sec, settings.llm_rate_burst) if settings.llm_rate_per_sec > 0 else None
+
+_RETRYABLE_STATUS = {408, 409, 429, 500, 502, 503, 504}
+
+
+def _retry_delay(attempt: int, err: Exception) -> float:
+    # Honour the provider's Retry-After when given, otherwise full-jitter exponential backoff
+    resp = getattr(err, "response", None)
+    retry_after = resp.headers.get("retry-after") if resp is not None else None
+    if retry_after:
+        try:
+            return min(settings.llm_backoff_max, float(retry_after))
+        except ValueError:
+            pass
+    return random.uniform(0, min(settings.llm_backoff_max, settings.llm_backoff_base * (2 ** attempt)))
+
+
+def _is_retryable(err: Exception) -> bool:
+    import openai
+    if isinstance(err, (openai.APIConnectionError, openai.APITimeoutError)):
+        return True
+    return isinstance(err, openai.APIStatusError) and err.status_code in _RETRYABLE_STATUS
+
+
+def _call_with_retry(**kwargs: Any) -> str:
+    attempt = 0
+    while True:
+        if _bucket is not None:
+            _bucket.acquire()
+        try:
+            with _semaphore:
+                resp = client().responses.create(**kwargs)
+            # The SDK provides output_text as a convenience (string)
+            return resp.output_text
+        except Exception as e:
+            if attempt >= settings.llm_max_retries or not _is_retryable(e):
+                raise
+            time.sleep(_retry_delay(attempt, e))
+            attempt += 1
+
+
+def _create(**kwargs: Any) -> str:
+    """Rate-limited, retried Responses call; identical in-flight requests share one call."""
+    key = hashlib.sha256(json.dumps(kwargs, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+    return _inflight.do(key, lambda: _call_with_retry(**kwargs))
+
 def responses_json_schema(prompt: str, schema: Dict[str, Any], schema_name: str = "Schema") -> Dict[str, Any]:
     """
     Calls the OpenAI Responses API with Structured Outputs (json_schema),
@@ -22,7 +146,7 @@ def responses_json_schema(prompt: str, schema: Dict[str, Any], schema_name: str
 
     The model is instructed to return ONLY JSON matching the schema.
     """
-    resp = client().responses.create(
+    raw = _create(
         model=settings.openai_model,
         input=prompt,
         text={
@@ -37,15 +161,12 @@ def responses_json_schema(prompt: str, schema: Dict[str, Any], schema_name: str
         temperature=0,
         max_output_tokens=800,
     )
-    # The SDK provides output_text as a convenience (string)
-    raw = resp.output_text.strip()
-    return json.loads(raw)
+    return json.loads(raw.strip())
 
 def responses_text(prompt: str) -> str:
-    resp = client().responses.create(
+    return _create(
         model=settings.openai_model,
         input=prompt,
         temperature=0.2,
         max_output_tokens=600,
     )
-    return resp.output_text
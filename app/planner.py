@@ -1,90 +1,38 @@
 from __future__ import annotations
-from typing import Dict, Any
+import json
+from typing import Dict, Any, List, Optional, get_args
 
 from .llm import responses_json_schema
-from .schemas import ParsedQuery
+from .schemas import ParsedQuery, Filters, Intent, GroupBy, Dimension
+
+# Compact plan encoding: instead of all filter keys as required nullable fields,
+# the model emits only the filters it found as [{"k": key, "op": op, "v": value}, ...].
+# compact_to_plan() expands that back into a full ParsedQuery locally.
+FILTER_KEYS: List[str] = [k for k in Filters.model_fields if k != "match"]
+DIMENSION_KEYS = set(get_args(Dimension))
 
 PARSED_QUERY_SCHEMA: Dict[str, Any] = {
   "type": "object",
   "additionalProperties": False,
   "properties": {
-    "intent": {
-      "type": "string",
-      "enum": [
-        "TOTAL_SALES",
-        "TOTAL_ACTIVE_STORES",
-        "BREAKDOWN",
-        "COMPARE_YOY",
-        "TOP_N",
-        "PDF_COMPARE",
-        "CLARIFICATION_REQUIRED",
-        "UNSUPPORTED"
-      ]
-    },
+    "intent": {"type": "string", "enum": list(get_args(Intent))},
     "metric": {"type": ["string","null"], "enum": ["sales","active_stores", None]},
     "filters": {
-      "type": "object",
-      "additionalProperties": False,
-      "properties": {
-        "brand": {"type": ["string","null"]},
-        "category": {"type": ["string","null"]},
-        "product": {"type": ["string","null"]},
-        "region": {"type": ["string","null"]},
-
-        "country": {"type": ["string","null"]},
-        "city": {"type": ["string","null"]},
-        "area": {"type": ["string","null"]},
-
-        "channel": {"type": ["string","null"]},
-        "sub_channel": {"type": ["string","null"]},
-
-        "salesman": {"type": ["string","null"]},
-
-        "customer": {"type": ["string","null"]},
-        "customer_account_name": {"type": ["string","null"]},
-
-        "retailer_group": {"type": ["string","null"]},
-        "retailer_sub_group": {"type": ["string","null"]},
-
-        "master_distributor": {"type": ["string","null"]},
-        "distributor": {"type": ["string","null"]},
-        "line_of_business": {"type": ["string","null"]},
-        "supplier": {"type": ["string","null"]},
-        "agency": {"type": ["string","null"]},
-        "segment": {"type": ["string","null"]},
-        "sub_brand": {"type": ["string","null"]},
-        "promo": {"type": ["string","null"]},
-
-        "month": {"type": ["string","null"], "description": "YYYY-MM"},
-        "months": {"type": ["array","null"], "items": {"type": "string"}, "description": "List of YYYY-MM"},
-        "year": {"type": ["integer","null"]},
-        "quarter": {"type": ["string","null"], "description": "YYYY-Q#"}
-      },
-      "required": [
-        "brand","category","product","region",
-        "country","city","area",
-        "channel","sub_channel",
-        "salesman",
-        "customer","customer_account_name",
-        "retailer_group","retailer_sub_group",
-        "master_distributor","distributor","line_of_business","supplier","agency","segment","sub_brand","promo",
-        "month","months","year","quarter"
-      ]
-    },
-    "group_by": {
-      "type": ["string","null"],
-      "enum": [
-        "brand","category","product","region","country","city","area",
-        "channel","sub_channel","salesman",
-        "customer","customer_account_name",
-        "retailer_group","retailer_sub_group",
-        "master_distributor","distributor","line_of_business","supplier","agency","segment","sub_brand","promo",
-        "month",
-        None
-      ]
+      "type": "array",
+      "items": {
+        "type": "object",
+        "additionalProperties": False,
+        "properties": {
+          "k": {"type": "string", "enum": FILTER_KEYS},
+          "op": {"type": "string", "enum": ["eq","contains","prefix"]},
+          "v": {"type": "string"}
+        },
+        "required": ["k","op","v"]
+      }
     },
+    "group_by": {"type": ["string","null"], "enum": [*get_args(GroupBy), None]},
     "limit": {"type": ["integer","null"], "minimum": 1, "maximum": 50},
-    "compare_to": {"type": ["string","null"], "enum": ["same_period_last_year", None]},
+    "compare_to": {"type": ["string","null"], "enum": ["same_period_last_year", "previous_period", None]},
     "clarification_question": {"type": ["string","null"]}
   },
   "required": ["intent","metric","filters","group_by","limit","compare_to","clarification_question"]
@@ -103,9 +51,22 @@ Rules:
   - BREAKDOWN: grouped summary by group_by
   - TOP_N: top N by metric (requires group_by and limit)
   - COMPARE_YOY: compare vs same period last year (requires exactly one time unit: month OR quarter OR year)
+  - STORE_COHORT: which active stores were gained / lost / retained vs a comparison period
+    (requires exactly one time unit; compare_to="previous_period" for "vs last month/quarter",
+    compare_to="same_period_last_year" for "vs last year"; metric="active_stores")
+  - DRIVERS: what drove a change ("why did sales drop in March?", "what drove it?" after COMPARE_YOY):
+    ranks values of every dimension by their contribution to the change (requires exactly one time unit;
+    compare_to as for STORE_COHORT, default same_period_last_year; limit = rows to return, default 10)
   - PDF_COMPARE: when user asks to compare PO vs PI PDFs
   - UNSUPPORTED: outside scope
-- If user asks for multiple months (e.g. "Jan, Mar and Apr 2024"), put them into filters.months as ["2024-01","2024-03","2024-04"].
+- filters is a list of {"k": filter name, "op": operator, "v": value}. Include ONLY filters the user mentioned; omit everything else.
+  - op="eq" for an exact value. Repeat the same k with op="eq" for several values (e.g. "Neo or Delphy").
+  - op="contains" / op="prefix" only when the user asks for values containing / starting with some text
+    (e.g. "all Delphy products" => k="product", op="prefix", v="Delphy"; "customers containing Carrefour" => op="contains").
+  - Time filters always use op="eq". Values: month="YYYY-MM", quarter="YYYY-Q#", year="YYYY".
+- For a month range (e.g. "Jan–Jun 2024"), use month_from="2024-01" and month_to="2024-06".
+- For "last N months", use last_n_months="N" (do not guess dates).
+- If user asks for multiple months (e.g. "Jan, Mar and Apr 2024"), add one k="months" entry per month: "2024-01", "2024-03", "2024-04".
 - If user asks for month-wise breakdown, use intent=BREAKDOWN and group_by="month".
 - If user asks "sales by salesman", group_by="salesman" (unless they asked a single salesman filter).
 - metric:
@@ -115,11 +76,75 @@ Rules:
 Output ONLY valid JSON that matches the schema.
 """
 
-def parse_question_to_plan(question: str) -> ParsedQuery:
-    prompt = f"""{PARSER_INSTRUCTIONS}
+# Built once: static instructions first, question last, so every request shares
+# the same prefix and provider-side prompt caching can apply.
+_PROMPT_PREFIX = f"""{PARSER_INSTRUCTIONS}
 
 User question:
-{question}
 """
-    data = responses_json_schema(prompt, PARSED_QUERY_SCHEMA, schema_name="ParsedQuery")
-    return ParsedQuery.model_validate(data)
+
+
+def compact_to_plan(data: Dict[str, Any]) -> ParsedQuery:
+    """Expands the compact model output into a full ParsedQuery."""
+    filters: Dict[str, Any] = {}
+    eq: Dict[str, List[str]] = {}
+    patterns: Dict[tuple, List[str]] = {}
+    for item in data.get("filters") or []:
+        k, op, v = item.get("k"), item.get("op") or "eq", item.get("v")
+        if k not in FILTER_KEYS or v is None or not str(v).strip():
+            continue
+        v = str(v).strip()
+        if k == "months":
+            filters.setdefault("months", []).append(v)
+        elif k in DIMENSION_KEYS and op in ("contains", "prefix"):
+            patterns.setdefault((k, op), []).append(v)
+        elif k in DIMENSION_KEYS:
+            eq.setdefault(k, []).append(v)
+        else:
+            filters[k] = v
+
+    match: List[Dict[str, Any]] = []
+    for k, vals in eq.items():
+        if len(vals) == 1:
+            filters[k] = vals[0]
+        else:
+            match.append({"dim": k, "op": "in", "values": vals})
+    match.extend({"dim": k, "op": op, "values": vals} for (k, op), vals in patterns.items())
+    if match:
+        filters["match"] = match
+
+    return ParsedQuery.model_validate({**{k: v for k, v in data.items() if k != "filters"}, "filters": filters})
+
+
+def plan_to_compact(plan: ParsedQuery) -> Dict[str, Any]:
+    """Inverse of compact_to_plan (follow-up context, the stub LLM server and benchmarks)."""
+    data = plan.model_dump(exclude={"filters"})
+    items: List[Dict[str, str]] = []
+    for k, v in plan.filters.model_dump(exclude_none=True, exclude={"match"}).items():
+        for x in (v if isinstance(v, list) else [v]):
+            items.append({"k": k, "op": "eq", "v": str(x)})
+    for m in plan.filters.match or []:
+        op = "eq" if m.op == "in" else m.op
+        items.extend({"k": m.dim, "op": op, "v": x} for x in m.values)
+    data["filters"] = items
+    return data
+
+
+_FOLLOW_UP = """Previous question's plan in this conversation (same JSON format):
+{previous}
+If the question is a follow-up ("by brand", "top 5 of those", "what about last year"), start from
+the previous plan and keep its filters unless the user replaces them; otherwise ignore it.
+
+"""
+
+
+def build_prompt(question: str, previous: Optional[ParsedQuery] = None) -> str:
+    if previous is None:
+        return f"{_PROMPT_PREFIX}{question}\n"
+    context = _FOLLOW_UP.format(previous=json.dumps(plan_to_compact(previous), separators=(",", ":")))
+    return f"{PARSER_INSTRUCTIONS}\n\n{context}User question:\n{question}\n"
+
+
+def parse_question_to_plan(question: str, previous: Optional[ParsedQuery] = None) -> ParsedQuery:
+    data = responses_json_schema(build_prompt(question, previous), PARSED_QUERY_SCHEMA, schema_name="ParsedQuery")
+    return compact_to_plan(data)
@@ -0,0 +1,137 @@
+from __future__ import annotations
+
+import atexit
+import glob
+import hashlib
+import json
+import os
+import queue
+import threading
+import time
+from typing import Any, Dict, Iterator, List, Optional
+
+from .config import settings
+
+# Keys /chat adds on top of what the engine returns; left out of the hash so a
+# logged result can be checked by re-executing the plan
+RESULT_META = ("report", "filter_resolution")
+
+
+def json_default(o: Any) -> Any:
+    """json.dumps default for engine results: numpy values as lists/scalars, anything else as str."""
+    if hasattr(o, "tolist"):
+        return o.tolist()
+    return str(o)
+
+
+def result_hash(result: Dict[str, Any]) -> str:
+    """Stable digest of an engine result (key order and /chat metadata ignored)."""
+    body = {k: v for k, v in result.items() if k not in RESULT_META}
+    raw = json.dumps(body, sort_keys=True, separators=(",", ":"), default=json_default)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class QueryLog:
+    """Appends one JSON line per /chat call from a background thread.
+
+    log() never blocks the request: records go on a bounded queue and are
+    dropped (and counted) when it is full. The result is hashed on the writer
+    thread. The file rotates to path.1 .. path.<backups> above max_bytes.
+    """
+
+    def __init__(self, path: str, max_bytes: int, backups: int, queue_size: int = 10000):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backups = max(0, backups)
+        self.dropped = 0
+        self._queue: "queue.Queue[Dict[str, Any]]" = queue.Queue(maxsize=max(1, queue_size))
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.path)
+
+    def log(self, record: Dict[str, Any], result: Optional[Dict[str, Any]] = None) -> None:
+        if not self.enabled:
+            return
+        self._start()
+        try:
+            self._queue.put_nowait(dict(record, _result=result))
+        except queue.Full:
+            self.dropped += 1
+
+    def flush(self, timeout: float = 5.0) -> None:
+        """Waits until queued records are written (best effort)."""
+        deadline = time.monotonic() + timeout
+        while self._thread is not None and self._queue.unfinished_tasks and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+    def _start(self) -> None:
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is None:
+                os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+                self._thread = threading.Thread(target=self._run, name="query-log", daemon=True)
+                self._thread.start()
+                atexit.register(self.flush)
+
+    def _rotate(self) -> None:
+        for i in range(self.backups - 1, 0, -1):
+            if os.path.exists(f"{self.path}.{i}"):
+                os.replace(f"{self.path}.{i}", f"{self.path}.{i + 1}")
+        if self.backups:
+            os.replace(self.path, f"{self.path}.1")
+        else:
+            os.remove(self.path)
+
+    def _run(self) -> None:
+        fh, size = None, 0
+        while True:
+            record = self._queue.get()
+            try:
+                if fh is None:
+                    fh = open(self.path, "a", encoding="utf-8")
+                    size = fh.tell()
+                result = record.pop("_result")
+                if result is not None:
+                    record["result_hash"] = result_hash(result)
+                line = json.dumps(record, separators=(",", ":"), default=json_default) + "\n"  # ASCII
+                fh.write(line)
+                size += len(line)
+                if self.max_bytes and size >= self.max_bytes:
+                    fh.close()
+                    fh = None
+                    self._rotate()
+                elif self._queue.empty():
+                    fh.flush()
+            except Exception:
+                if fh is not None:  # e.g. the directory went away; reopen on the next record
+                    fh.close()
+                fh = None
+            finally:
+                self._queue.task_done()
+
+
+def log_files(path: str) -> List[str]:
+    """The log and its rotated backups, oldest first."""
+    rotated = [p for p in glob.glob(glob.escape(path) + ".*") if p.rsplit(".", 1)[1].isdigit()]
+    rotated.sort(key=lambda p: int(p.rsplit(".", 1)[1]), reverse=True)
+    return rotated + ([path] if os.path.exists(path) else [])
+
+
+def read_log(path: str) -> Iterator[Dict[str, Any]]:
+    """Records from the log and its backups in write order; unreadable lines are skipped."""
+    for name in log_files(path):
+        with open(name, "r", encoding="utf-8") as fh:
+            for line in fh:
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    continue
+
+
+query_log = QueryLog(
+    settings.query_log, settings.query_log_max_mb * 1024 * 1024, settings.query_log_backups, settings.query_log_queue,
+)
@@ -0,0 +1,120 @@
+from __future__ import annotations
+
+import json
+import os
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+from .config import settings
+from .schemas import ParsedQuery
+
+# Standard morning questions; "last month" is the latest month in the data.
+DEFAULT_REPORTS: Dict[str, Dict[str, Any]] = {
+    "sales_last_month": {"intent": "TOTAL_SALES", "metric": "sales", "filters": {"last_n_months": 1}},
+    "active_stores_last_month": {"intent": "TOTAL_ACTIVE_STORES", "metric": "active_stores", "filters": {"last_n_months": 1}},
+    "sales_yoy_last_month": {"intent": "COMPARE_YOY", "metric": "sales", "filters": {"last_n_months": 1}},
+    "active_stores_yoy_last_month": {"intent": "COMPARE_YOY", "metric": "active_stores", "filters": {"last_n_months": 1}},
+    "top_brands_last_month": {"intent": "TOP_N", "metric": "sales", "group_by": "brand", "limit": 5, "filters": {"last_n_months": 1}},
+    "sales_by_salesman_last_month": {"intent": "BREAKDOWN", "metric": "sales", "group_by": "salesman", "filters": {"last_n_months": 1}},
+}
+
+
+def load_report_specs(path: str) -> Dict[str, ParsedQuery]:
+    """{name: ParsedQuery} from a JSON file of {name: plan}; built-in defaults when the file is absent."""
+    specs = DEFAULT_REPORTS
+    if path and os.path.exists(path):
+        with open(path, "r", encoding="utf-8") as fh:
+            specs = json.load(fh)
+    return {name: ParsedQuery(**plan) for name, plan in specs.items()}
+
+
+# compare_to each intent runs with when the plan leaves it out; other intents ignore it
+DEFAULT_COMPARE_TO = {
+    "COMPARE_YOY": "same_period_last_year",
+    "STORE_COHORT": "previous_period",
+    "DRIVERS": "same_period_last_year",
+}
+
+
+def plan_key(plan: ParsedQuery) -> str:
+    """Canonical form of a resolved plan (phrasing-only fields dropped, a one-month range as month,
+    compare_to as the intent runs it)."""
+    f = plan.filters
+    if f.month_from and f.month_from == f.month_to and not f.month:
+        plan = plan.model_copy(update={"filters": f.model_copy(update={"month": f.month_from, "month_from": None, "month_to": None})})
+    compare_to = DEFAULT_COMPARE_TO.get(plan.intent)
+    if compare_to is not None and plan.intent != "COMPARE_YOY":  # COMPARE_YOY is always year over year
+        compare_to = plan.compare_to or compare_to
+    if compare_to != plan.compare_to:
+        plan = plan.model_copy(update={"compare_to": compare_to})
+    return plan.model_dump_json(exclude={"clarification_question"})
+
+
+@dataclass
+class Report:
+    name: str
+    plan: ParsedQuery  # resolved against the data it was computed on
+    result: Dict[str, Any]
+    computed_at: float
+
+
+class ReportCache:
+    """Named reports of one dataset, computed on each load; /chat answers matching plans from here."""
+
+    def __init__(self):
+        self._by_name: Dict[str, Report] = {}
+        self._by_key: Dict[str, Report] = {}
+        self.failed: List[str] = []
+        self.built = False  # set by the first build; kept when the dataset is evicted
+        self._lock = threading.Lock()
+
+    def build(self, engine: Any, specs: Dict[str, ParsedQuery]) -> List[str]:
+        """Computes every report; returns the names that failed (they are left out)."""
+        by_name: Dict[str, Report] = {}
+        failed = []
+        for name, plan in specs.items():
+            try:
+                result, state = engine.execute_session(plan)  # state.plan: the plan as resolved for this run
+            except Exception:
+                failed.append(name)
+                continue
+            result.pop("filter_resolution", None)  # reported per question on a /chat hit
+            by_name[name] = Report(name=name, plan=state.plan, result=result, computed_at=time.time())
+        with self._lock:
+            self._by_name = by_name
+            self._by_key = {plan_key(r.plan): r for r in by_name.values()}
+            self.failed = failed
+            self.built = True
+        return failed
+
+    def get(self, name: str) -> Optional[Report]:
+        return self._by_name.get(name)
+
+    def names(self) -> List[str]:
+        return sorted(self._by_name)
+
+    def match(self, engine: Any, plan: ParsedQuery) -> Optional[Tuple[Report, Dict[str, Any]]]:
+        """The report answering `plan`, with the plan's own filter resolution."""
+        if not self._by_key:
+            return None
+        try:
+            resolved, resolution = engine.resolve_plan(plan)
+        except Exception:
+            return None
+        report = self._by_key.get(plan_key(resolved))
+        return (report, resolution) if report is not None else None
+
+
+_caches: Dict[str, ReportCache] = {}
+_caches_lock = threading.Lock()
+
+
+def report_cache(dataset: str) -> ReportCache:
+    with _caches_lock:
+        return _caches.setdefault(dataset, ReportCache())
+
+
+def refresh_reports(dataset: str, engine: Any) -> List[str]:
+    return report_cache(dataset).build(engine, load_report_specs(settings.reports_file))
@@ -0,0 +1,115 @@
+from __future__ import annotations
+
+import base64
+import json
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+from .config import settings
+
+ARROW_STREAM = "application/vnd.apache.arrow.stream"
+
+
+class ResultStore:
+    """Thread-safe LRU of full result tables with a TTL, so pages can be fetched later."""
+
+    def __init__(self, max_items: int, ttl_s: float):
+        self.max_items = max_items
+        self.ttl_s = ttl_s
+        self._items: "OrderedDict[str, Tuple[float, List[Dict[str, Any]], Dict[str, Any]]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def put(self, table: List[Dict[str, Any]], meta: Dict[str, Any]) -> str:
+        rid = uuid.uuid4().hex
+        with self._lock:
+            self._items[rid] = (time.monotonic(), table, meta)
+            while len(self._items) > self.max_items:
+                self._items.popitem(last=False)
+        return rid
+
+    def get(self, rid: str) -> Optional[Tuple[List[Dict[str, Any]], Dict[str, Any]]]:
+        with self._lock:
+            item = self._items.get(rid)
+            if item is None:
+                return None
+            ts, table, meta = item
+            if time.monotonic() - ts > self.ttl_s:
+                del self._items[rid]
+                return None
+            self._items.move_to_end(rid)
+            return table, meta
+
+
+result_store = ResultStore(settings.result_cache_size, settings.result_cache_ttl_s)
+
+
+def encode_cursor(rid: str, offset: int) -> str:
+    raw = json.dumps({"r": rid, "o": offset}, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[str, int]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        data = json.loads(raw)
+        return str(data["r"]), int(data["o"])
+    except Exception:
+        raise ValueError("Invalid cursor.")
+
+
+def to_columns(rows: List[Dict[str, Any]]) -> Dict[str, List[Any]]:
+    """[{"group": g, "value": v}, ...] -> {"group": [...], "value": [...]}."""
+    if not rows:
+        return {}
+    return {k: [r.get(k) for r in rows] for k in rows[0]}
+
+
+def to_arrow_ipc(rows: List[Dict[str, Any]]) -> bytes:
+    try:
+        import pyarrow as pa
+    except ImportError:
+        raise RuntimeError("Arrow output requires pyarrow.")
+    tbl = pa.table(to_columns(rows)) if rows else pa.table({})
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, tbl.schema) as writer:
+        writer.write_table(tbl)
+    return sink.getvalue().to_pybytes()
+
+
+def page(table: List[Dict[str, Any]], rid: str, offset: int, limit: int, table_format: str = "rows") -> Dict[str, Any]:
+    rows = table[offset:offset + limit]
+    nxt = offset + len(rows)
+    return {
+        "result_id": rid,
+        "offset": offset,
+        "total_rows": len(table),
+        "table": to_columns(rows) if table_format == "columns" else rows,
+        "table_format": table_format,
+        "next_cursor": encode_cursor(rid, nxt) if nxt < len(table) else None,
+    }
+
+
+def paginate_result(result: Dict[str, Any], page_size: Optional[int] = None, table_format: str = "rows") -> Dict[str, Any]:
+    """Caps result.table to one page; the full table is cached behind a cursor."""
+    table = result.get("table")
+    if not isinstance(table, list):
+        return result
+    page_size = page_size or settings.result_page_size
+    out = dict(result)
+    if len(table) > page_size:
+        rid = result_store.put(table, {k: v for k, v in result.items() if k != "table"})
+        p = page(table, rid, 0, page_size, table_format)
+        out.update(
+            table=p["table"],
+            table_total_rows=p["total_rows"],
+            result_id=rid,
+            next_cursor=p["next_cursor"],
+        )
+    elif table_format == "columns":
+        out["table"] = to_columns(table)
+    if table_format == "columns":
+        out["table_format"] = "columns"
+    return out
@@ -9,6 +9,8 @@ Intent = Literal[
     "BREAKDOWN",
     "COMPARE_YOY",
     "TOP_N",
+    "STORE_COHORT",
+    "DRIVERS",
     "PDF_COMPARE",
     "CLARIFICATION_REQUIRED",
     "UNSUPPORTED",
@@ -38,10 +40,46 @@ GroupBy = Literal[
     "segment",
     "sub_brand",
     "promo",
+    "source",
     "month",
 ]
 
 
+# Categorical dimensions that can be filtered by value
+Dimension = Literal[
+    "brand",
+    "category",
+    "product",
+    "region",
+    "country",
+    "city",
+    "area",
+    "channel",
+    "sub_channel",
+    "salesman",
+    "customer",
+    "customer_account_name",
+    "retailer_group",
+    "retailer_sub_group",
+    "master_distributor",
+    "distributor",
+    "line_of_business",
+    "supplier",
+    "agency",
+    "segment",
+    "sub_brand",
+    "promo",
+    "source",
+]
+
+
+class DimensionMatch(BaseModel):
+    """Non-equality match on a dimension: any of several values, or a text pattern."""
+    dim: Dimension
+    op: Literal["in", "contains", "prefix"]
+    values: List[str]
+
+
 class Filters(BaseModel):
     # Core dims
     brand: Optional[str] = None
@@ -73,12 +111,19 @@ class Filters(BaseModel):
     segment: Optional[str] = None
     sub_brand: Optional[str] = None
     promo: Optional[str] = None
+    source: Optional[str] = None  # loaded file relative to the sources' common folder (and sheet), e.g. "qatar/2024.xlsb"
+
+    # in-list / contains / prefix matches, expanded to exact values by the engine
+    match: Optional[List[DimensionMatch]] = None
 
     # Time filters
     month: Optional[str] = Field(default=None, description="YYYY-MM")
     months: Optional[List[str]] = Field(default=None, description="List of YYYY-MM")
     year: Optional[int] = None
     quarter: Optional[str] = Field(default=None, description="e.g. 2024-Q2")
+    month_from: Optional[str] = Field(default=None, description="YYYY-MM, inclusive range start")
+    month_to: Optional[str] = Field(default=None, description="YYYY-MM, inclusive range end")
+    last_n_months: Optional[int] = Field(default=None, ge=1, description="Trailing months ending at the latest month in the data")
 
 
 class ParsedQuery(BaseModel):
@@ -89,18 +134,44 @@ class ParsedQuery(BaseModel):
     group_by: Optional[GroupBy] = None
     limit: Optional[int] = Field(default=None, ge=1, le=50)
 
-    compare_to: Optional[Literal["same_period_last_year"]] = None
+    compare_to: Optional[Literal["same_period_last_year", "previous_period"]] = None
     clarification_question: Optional[str] = None
 
 
 class ChatRequest(BaseModel):
     question: str
+    # result.table as a list of row objects, or as parallel arrays per column
+    table_format: Literal["rows", "columns"] = "rows"
+    page_size: Optional[int] = Field(default=None, ge=1, le=10000)
+    # Follow-ups in the same session are planned with the previous plan as context
+    session_id: Optional[str] = Field(default=None, max_length=128)
+    # Dataset id from SALES_DATASETS (None = "default")
+    dataset: Optional[str] = None
+    # Estimate from the engine's sample (fast, with confidence intervals) instead of scanning all rows
+    approximate: bool = False
 
 
 class ChatResponse(BaseModel):
     plan: ParsedQuery
     result: Dict[str, Any]
     answer: str
+    session_id: Optional[str] = None
+
+
+class ReportResponse(BaseModel):
+    name: str
+    plan: ParsedQuery
+    result: Dict[str, Any]
+    computed_at: float
+
+
+class ResultPage(BaseModel):
+    result_id: str
+    offset: int
+    total_rows: int
+    table: Any
+    table_format: Literal["rows", "columns"]
+    next_cursor: Optional[str] = None
 
 
 class PdfCompareResponse(BaseModel):
@@ -0,0 +1,57 @@
+from __future__ import annotations
+
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Optional
+
+import numpy as np
+
+from .config import settings
+from .schemas import ParsedQuery
+
+
+@dataclass(frozen=True)
+class SessionState:
+    """Last resolved plan of a conversation and the engine rows it matched.
+
+    rows holds positions into SalesEngine.df (int32 when it fits); None when the
+    set was too large to keep or the plan was not answered from the frame.
+    engine is the token of the engine load the rows belong to.
+    """
+    plan: ParsedQuery
+    rows: Optional[np.ndarray] = None
+    engine: str = ""
+
+
+class SessionStore:
+    """Thread-safe LRU of per-session state with a TTL refreshed on every turn."""
+
+    def __init__(self, max_items: int, ttl_s: float):
+        self.max_items = max_items
+        self.ttl_s = ttl_s
+        self._items: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def put(self, sid: str, state: SessionState) -> None:
+        with self._lock:
+            self._items[sid] = (time.monotonic(), state)
+            self._items.move_to_end(sid)
+            while len(self._items) > self.max_items:
+                self._items.popitem(last=False)
+
+    def get(self, sid: str) -> Optional[SessionState]:
+        with self._lock:
+            item = self._items.get(sid)
+            if item is None:
+                return None
+            ts, state = item
+            if time.monotonic() - ts > self.ttl_s:
+                del self._items[sid]
+                return None
+            self._items.move_to_end(sid)
+            return state
+
+
+session_store = SessionStore(settings.session_cache_size, settings.session_ttl_s)
@@ -0,0 +1,180 @@
+"""Local stand-in for the OpenAI Responses API, used for load testing.
+
+Run it, then point the app at it:
+
+    python -m app.stub_llm --port 8001 --plan-latency lognormal:0.6,0.4
+    OPENAI_BASE_URL=http://localhost:8001/v1 OPENAI_API_KEY=stub uvicorn app.api:app
+
+Structured-output calls (the planner) get a schema-valid compact plan picked
+deterministically from the prompt; plain text calls (the answer writer) get a
+short canned answer. Latency and error injection are configurable per call kind.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import hashlib
+import json
+import math
+import random
+import time
+import uuid
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+from .planner import plan_to_compact
+from .schemas import ParsedQuery
+
+
+STUB_PLANS: List[Dict[str, Any]] = [
+    {"intent": "TOTAL_SALES", "metric": "sales", "filters": {"month": "2024-01"}},
+    {"intent": "TOTAL_SALES", "metric": "sales", "filters": {"brand": "Delphy", "year": 2025}},
+    {"intent": "TOTAL_ACTIVE_STORES", "metric": "active_stores", "filters": {"quarter": "2025-Q2"}},
+    {"intent": "BREAKDOWN", "metric": "sales", "filters": {"year": 2024}, "group_by": "brand"},
+    {"intent": "BREAKDOWN", "metric": "sales", "filters": {"month": "2024-01"}, "group_by": "salesman"},
+    {"intent": "BREAKDOWN", "metric": "active_stores", "filters": {"year": 2025}, "group_by": "channel"},
+    {"intent": "TOP_N", "metric": "sales", "filters": {"year": 2024}, "group_by": "brand", "limit": 5},
+    {"intent": "TOP_N", "metric": "sales", "filters": {"year": 2025}, "group_by": "customer", "limit": 10},
+    {"intent": "COMPARE_YOY", "metric": "sales", "filters": {"month": "2025-03"}},
+    {"intent": "COMPARE_YOY", "metric": "active_stores", "filters": {"year": 2025}},
+    {"intent": "STORE_COHORT", "metric": "active_stores", "filters": {"month": "2025-06"}, "compare_to": "previous_period"},
+    {"intent": "DRIVERS", "metric": "sales", "filters": {"month": "2025-03"}},
+]
+
+STUB_ANSWER = "Here is the requested figure, based only on the verified backend results."
+
+
+# --- latency distributions ---
+
+def parse_latency(spec: str) -> Callable[[], float]:
+    """Parses `name:a,b` into a sampler returning seconds.
+
+    Supported: `fixed:s`, `uniform:lo,hi`, `normal:mean,sd`, `lognormal:median,sigma`, `exp:mean`.
+    """
+    name, _, args = spec.partition(":")
+    p = [float(x) for x in args.split(",") if x.strip()] if args else []
+    name = name.strip().lower()
+
+    if name == "fixed" and len(p) == 1:
+        return lambda: p[0]
+    if name == "uniform" and len(p) == 2:
+        return lambda: random.uniform(p[0], p[1])
+    if name == "normal" and len(p) == 2:
+        return lambda: max(0.0, random.gauss(p[0], p[1]))
+    if name == "lognormal" and len(p) == 2:
+        mu = math.log(p[0])
+        return lambda: random.lognormvariate(mu, p[1])
+    if name == "exp" and len(p) == 1:
+        return lambda: random.expovariate(1.0 / p[0]) if p[0] > 0 else 0.0
+    raise ValueError(f"Invalid latency spec: {spec!r}")
+
+
+@dataclass
+class StubConfig:
+    plan_latency: str = "fixed:0"
+    answer_latency: str = "fixed:0"
+    error_rate: float = 0.0
+    seed: Optional[int] = None
+
+
+# --- response construction ---
+
+def _plan_for_prompt(prompt: str) -> Dict[str, Any]:
+    # Same prompt -> same plan, so repeated questions behave like a real (temperature=0) model
+    h = int(hashlib.sha1(prompt.encode("utf-8")).hexdigest(), 16)
+    return plan_to_compact(ParsedQuery.model_validate(STUB_PLANS[h % len(STUB_PLANS)]))
+
+
+def _response_body(model: str, text: str, usage_in: int) -> Dict[str, Any]:
+    return {
+        "id": f"resp_{uuid.uuid4().hex}",
+        "object": "response",
+        "created_at": int(time.time()),
+        "status": "completed",
+        "model": model,
+        "output": [{
+            "type": "message",
+            "id": f"msg_{uuid.uuid4().hex}",
+            "status": "completed",
+            "role": "assistant",
+            "content": [{"type": "output_text", "text": text, "annotations": []}],
+        }],
+        "parallel_tool_calls": False,
+        "tool_choice": "auto",
+        "tools": [],
+        "usage": {
+            "input_tokens": usage_in,
+            "output_tokens": max(1, len(text) // 4),
+            "total_tokens": usage_in + max(1, len(text) // 4),
+            "input_tokens_details": {"cached_tokens": 0},
+            "output_tokens_details": {"reasoning_tokens": 0},
+        },
+    }
+
+
+def _prompt_text(inp: Any) -> str:
+    if isinstance(inp, str):
+        return inp
+    # list-of-messages form
+    return json.dumps(inp, sort_keys=True)
+
+
+def create_app(cfg: StubConfig) -> FastAPI:
+    if cfg.seed is not None:
+        random.seed(cfg.seed)
+    plan_sleep = parse_latency(cfg.plan_latency)
+    answer_sleep = parse_latency(cfg.answer_latency)
+
+    stub = FastAPI(title="Stub Responses API")
+
+    @stub.get("/")
+    def health():
+        return {"ok": True, "service": "Stub Responses API"}
+
+    @stub.post("/v1/responses")
+    async def responses(request: Request):
+        body = await request.json()
+        prompt = _prompt_text(body.get("input", ""))
+        fmt = ((body.get("text") or {}).get("format") or {})
+        structured = fmt.get("type") == "json_schema"
+
+        await asyncio.sleep((plan_sleep if structured else answer_sleep)())
+
+        if cfg.error_rate and random.random() < cfg.error_rate:
+            return JSONResponse(
+                status_code=429,
+                content={"error": {"message": "Stub rate limit", "type": "rate_limit_error", "code": "rate_limit_exceeded"}},
+            )
+
+        text = json.dumps(_plan_for_prompt(prompt)) if structured else STUB_ANSWER
+        return _response_body(body.get("model", "stub"), text, usage_in=max(1, len(prompt) // 4))
+
+    return stub
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Stub OpenAI Responses API server for load testing.")
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=8001)
+    ap.add_argument("--plan-latency", default="fixed:0", help="Latency for structured (planner) calls, e.g. lognormal:0.6,0.4")
+    ap.add_argument("--answer-latency", default="fixed:0", help="Latency for text (answer writer) calls, e.g. uniform:0.5,1.5")
+    ap.add_argument("--error-rate", type=float, default=0.0, help="Fraction of calls answered with HTTP 429")
+    ap.add_argument("--seed", type=int, default=None)
+    args = ap.parse_args()
+
+    import uvicorn
+
+    cfg = StubConfig(
+        plan_latency=args.plan_latency,
+        answer_latency=args.answer_latency,
+        error_rate=args.error_rate,
+        seed=args.seed,
+    )
+    uvicorn.run(create_app(cfg), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""Approximate mode: speed, error and interval coverage against exact results.
+
+Runs the backend conformance plans that approximate mode estimates (totals,
+breakdowns, TOP_N) both ways and reports the median relative error, how often
+the exact value falls inside [ci_low, ci_high] (sales intervals should cover
+about APPROX_CONFIDENCE of values; store intervals are GEE heuristics whose
+lower end always holds), and the timings. --scale N repeats every row N times
+to mimic a larger history. The estimator runs whatever the dataset size
+(APPROX_MIN_DATASET_ROWS is set to 0), so the timings show where it pays off.
+
+    python benchmarks/approx_accuracy.py --file Sales_Active_Stores_Data.xlsb --scale 20
+"""
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from backend_conformance import build_plans  # noqa: E402
+
+from app.config import settings  # noqa: E402
+from app.data.sales_loader import load_sales_dataframe  # noqa: E402
+from app.engines.approx import APPROX_INTENTS  # noqa: E402
+from app.engines.sales_engine import SalesEngine  # noqa: E402
+from app.schemas import ParsedQuery  # noqa: E402
+
+
+def _pairs(plan: ParsedQuery, exact: Dict, approx: Dict) -> List[tuple]:
+    """(exact, estimate, low, high) for the value or for every group present in both."""
+    if "table" not in approx:
+        return [(float(exact.get("value", 0)), approx["value"], approx["ci_low"], approx["ci_high"])]
+    truth = {r["group"]: r["value"] for r in exact.get("table", [])}
+    return [(truth[r["group"]], r["value"], r["ci_low"], r["ci_high"]) for r in approx["table"] if r["group"] in truth]
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Accuracy and speed of approximate mode.")
+    ap.add_argument("--file", default=settings.sales_file)
+    ap.add_argument("--scale", type=int, default=1)
+    args = ap.parse_args()
+    settings.approx_min_dataset_rows = 0
+
+    df, cols = load_sales_dataframe(args.file)
+    if args.scale > 1:
+        df = pd.concat([df] * args.scale, ignore_index=True)
+    t0 = time.perf_counter()
+    engine = SalesEngine(df, cols)
+    sample = engine.approx_sample()
+    assert sample is not None, "APPROX_SAMPLE_FRAC must be > 0"
+    print(f"rows={len(engine.df):,}  sample={len(sample.df):,}  engine init + sample {time.perf_counter() - t0:.2f}s")
+
+    plans = [ParsedQuery(**p) for p in build_plans(engine) if p["intent"] in APPROX_INTENTS]
+    stats: Dict[str, Dict[str, list]] = {m: {"err": [], "inside": [], "t_exact": [], "t_approx": []} for m in ("sales", "active_stores")}
+    fallback = 0
+    for plan in plans:
+        t = time.perf_counter()
+        exact = engine.execute(plan)
+        t_exact = time.perf_counter() - t
+        t = time.perf_counter()
+        approx, _ = engine.execute_session(plan, approximate=True)
+        t_approx = time.perf_counter() - t
+        if not approx.get("approximate"):
+            fallback += 1
+            continue
+        s = stats[plan.metric]
+        s["t_exact"].append(t_exact)
+        s["t_approx"].append(t_approx)
+        for truth, est, lo, hi in _pairs(plan, exact, approx):
+            if truth:
+                s["err"].append(abs(est - truth) / abs(truth))
+            s["inside"].append(lo - 1e-6 <= truth <= hi + 1e-6)
+
+    print(f"plans={len(plans)}  exact fallbacks={fallback}")
+    for metric, s in stats.items():
+        if not s["inside"]:
+            continue
+        print(
+            f"{metric:<14} median rel err {np.median(s['err']) * 100:>5.1f}%   inside interval {np.mean(s['inside']) * 100:>5.1f}%   "
+            f"exact {np.mean(s['t_exact']) * 1000:>6.2f} ms  approx {np.mean(s['t_approx']) * 1000:>6.2f} ms/plan"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+"""Conformance + timing of the query backends (pandas vs DuckDB).
+
+Loads the sales data once, builds one SalesEngine per backend and runs the
+same plans (every SQL-compiled intent x metric x group_by over time and
+dimension filters taken from the data) through both. Results must match:
+numbers to 1e-9 relative, tables up to the order of tied groups. Exits 1 on
+any mismatch.
+
+    python benchmarks/backend_conformance.py --file Sales_Active_Stores_Data.xlsb
+"""
+from __future__ import annotations
+
+import argparse
+import itertools
+import math
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from app.config import settings  # noqa: E402
+from app.data.periods import format_key  # noqa: E402
+from app.engines.sales_engine import SalesEngine  # noqa: E402
+from app.engines.sql_backend import SQL_INTENTS  # noqa: E402
+from app.schemas import ParsedQuery  # noqa: E402
+
+GROUP_BYS = ["brand", "customer", "month", "salesman", "channel", "city", "source"]
+
+
+def _top_values(engine: SalesEngine, col: str, n: int) -> List[str]:
+    return [str(v) for v in engine.df[col].value_counts().index[:n]]
+
+
+def build_plans(engine: SalesEngine) -> List[Dict[str, Any]]:
+    cols, periods = engine.cols, engine.periods
+    assert periods is not None and periods.last is not None
+    last = periods.last
+    last_year = last // 100
+    times: List[Dict[str, Any]] = [
+        {},
+        {"month": format_key(last)},
+        {"month": "1999-01"},  # no data
+        {"year": last_year},
+        {"quarter": f"{last_year}-Q2"},
+        {"months": [format_key(k) for k in periods.keys[-3:]]},
+        {"month_from": format_key(periods.keys[-6]), "month_to": format_key(last)},
+    ]
+    brands = _top_values(engine, cols.brand, 2) if cols.brand else []
+    dims: List[Dict[str, Any]] = [{}]
+    if brands:
+        dims.append({"brand": brands[0].lower()})
+        dims.append({"match": [{"dim": "brand", "op": "in", "values": brands}]})
+        dims.append({"match": [{"dim": "brand", "op": "prefix", "values": [brands[0][:2]]}]})
+    if cols.channel:
+        dims.append({"channel": _top_values(engine, cols.channel, 1)[0], **({"brand": brands[0]} if brands else {})})
+    if cols.salesman:
+        dims.append({"salesman": _top_values(engine, cols.salesman, 1)[0]})
+
+    plans = []
+    for t, d in itertools.product(times, dims):
+        f = {**t, **d}
+        for metric in ("sales", "active_stores"):
+            plans.append({"intent": "TOTAL_SALES" if metric == "sales" else "TOTAL_ACTIVE_STORES", "metric": metric, "filters": f})
+            for gb in GROUP_BYS:
+                plans.append({"intent": "BREAKDOWN", "metric": metric, "filters": f, "group_by": gb})
+                plans.append({"intent": "TOP_N", "metric": metric, "filters": f, "group_by": gb, "limit": 5})
+            if t and "month_from" not in t:
+                plans.append({"intent": "COMPARE_YOY", "metric": metric, "filters": f})
+    assert {p["intent"] for p in plans} == SQL_INTENTS
+    return plans
+
+
+def _close(a: Any, b: Any) -> bool:
+    if isinstance(a, float) or isinstance(b, float):
+        if a is None or b is None:
+            return a is b
+        return math.isclose(a, b, rel_tol=1e-9, abs_tol=1e-6)
+    return a == b
+
+
+def _same_table(plan: Dict[str, Any], a: List[Dict[str, Any]], b: List[Dict[str, Any]]) -> bool:
+    if len(a) != len(b):
+        return False
+    if plan["intent"] == "BREAKDOWN":
+        key = lambda r: (-round(r["value"], 6), r["group"])  # noqa: E731
+        return all(x["group"] == y["group"] and _close(x["value"], y["value"]) for x, y in zip(sorted(a, key=key), sorted(b, key=key)))
+    # TOP_N: groups tied at the cut may differ, values/ranks/shares may not
+    return all(_close(x[k], y[k]) for x, y in zip(a, b) for k in ("value", "rank", "share"))
+
+
+def diff(plan: Dict[str, Any], a: Dict[str, Any], b: Dict[str, Any]) -> List[str]:
+    out = []
+    for k in sorted(set(a) | set(b)):
+        if k == "table":
+            if not _same_table(plan, a.get(k, []), b.get(k, [])):
+                out.append(k)
+        elif k == "others":
+            if a[k]["groups"] != b[k]["groups"]:
+                out.append(k)
+        elif not _close(a.get(k), b.get(k)):
+            out.append(k)
+    return out
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Check the duckdb backend against pandas.")
+    ap.add_argument("--file", default=settings.sales_file)
+    ap.add_argument("--repeat", type=int, default=3)
+    args = ap.parse_args()
+
+    settings.sales_backend = "pandas"
+    pandas_engine = SalesEngine.from_file(args.file)
+    t0 = time.perf_counter()
+    duck_engine = SalesEngine(pandas_engine.df, pandas_engine.cols, "duckdb")
+    print(f"rows={len(pandas_engine.df):,}  duckdb init {time.perf_counter() - t0:.2f}s (incl. parquet snapshot)")
+
+    plans = [ParsedQuery(**p) for p in build_plans(pandas_engine)]
+    timings = {"pandas": 0.0, "duckdb": 0.0}
+    bad = 0
+    for plan in plans:
+        results = {}
+        for name, engine in (("pandas", pandas_engine), ("duckdb", duck_engine)):
+            best = float("inf")
+            for _ in range(args.repeat):
+                s = time.perf_counter()
+                results[name] = engine.execute(plan)
+                best = min(best, time.perf_counter() - s)
+            timings[name] += best
+        keys = diff(plan.model_dump(), results["pandas"], results["duckdb"])
+        if keys:
+            bad += 1
+            print(f"MISMATCH {keys}: {plan.model_dump(exclude_none=True)}")
+
+    print(f"plans={len(plans)}  mismatches={bad}")
+    for name, t in timings.items():
+        print(f"{name:<7} total {t * 1000:>8.1f} ms   mean {t / len(plans) * 1000:>6.2f} ms/plan")
+    if bad:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
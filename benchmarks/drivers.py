@@ -0,0 +1,110 @@
+"""DRIVERS against one BREAKDOWN per dimension and period.
+
+For each plan, runs DRIVERS once and the two BREAKDOWNs (current and
+comparison period) it replaces for every dimension, checks that every
+reported value and each dimension's top mover match, and compares the
+timings. --scale N repeats every row N times to mimic a larger history.
+Exits 1 on any mismatch.
+
+    python benchmarks/drivers.py --file Sales_Active_Stores_Data.xlsb --scale 20
+"""
+from __future__ import annotations
+
+import argparse
+import math
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List
+
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from app.config import settings  # noqa: E402
+from app.data.periods import format_key  # noqa: E402
+from app.data.sales_loader import load_sales_dataframe  # noqa: E402
+from app.engines.sales_engine import TIME_FILTERS, SalesEngine, _driver_columns, _driver_ranges  # noqa: E402
+from app.schemas import ParsedQuery  # noqa: E402
+
+
+def _period_filters(lo: int, hi: int) -> Dict[str, Any]:
+    return {"month": format_key(lo)} if lo == hi else {"month_from": format_key(lo), "month_to": format_key(hi)}
+
+
+def _breakdowns(engine: SalesEngine, plan: ParsedQuery) -> Dict[str, Dict[str, tuple]]:
+    """dimension -> group -> (current, previous), from one BREAKDOWN per dimension and period."""
+    cur_ranges, prev_ranges = _driver_ranges(plan)
+    dims = plan.filters.model_dump(exclude=set(TIME_FILTERS), exclude_none=True)
+    out: Dict[str, Dict[str, tuple]] = {}
+    for dim, _ in _driver_columns(engine.cols):
+        values = []
+        for lo, hi in (cur_ranges[0], prev_ranges[0]):
+            bd = engine.execute(ParsedQuery(
+                intent="BREAKDOWN", metric=plan.metric, group_by=dim, filters={**dims, **_period_filters(lo, hi)},
+            ))
+            values.append({r["group"]: r["value"] for r in bd.get("table", [])})
+        cur, prev = values
+        out[dim] = {g: (cur.get(g, 0.0), prev.get(g, 0.0)) for g in set(cur) | set(prev)}
+    return out
+
+
+def _check(result: Dict[str, Any], truth: Dict[str, Dict[str, tuple]]) -> List[str]:
+    close = lambda a, b: math.isclose(a, b, rel_tol=1e-9, abs_tol=1e-6)  # noqa: E731
+    bad = []
+    for r in result.get("table", []):
+        cur, prev = truth[r["dimension"]].get(r["group"], (0.0, 0.0))
+        if not (close(r["current"], cur) and close(r["previous"], prev)):
+            bad.append(f"{r['dimension']}={r['group']}")
+    for dim, top in result.get("by_dimension", {}).items():
+        best = max(abs(c - p) for c, p in truth[dim].values())
+        if not close(abs(top[0]["delta"]), best):
+            bad.append(f"top {dim}")
+    return bad
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="DRIVERS vs per-dimension breakdowns.")
+    ap.add_argument("--file", default=settings.sales_file)
+    ap.add_argument("--scale", type=int, default=1)
+    ap.add_argument("--repeat", type=int, default=3)
+    args = ap.parse_args()
+
+    df, cols = load_sales_dataframe(args.file)
+    if args.scale > 1:
+        df = pd.concat([df] * args.scale, ignore_index=True)
+    engine = SalesEngine(df, cols)
+    assert engine.periods is not None and engine.periods.last is not None
+    last = engine.periods.last
+    print(f"rows={len(engine.df):,}  dimensions={len(_driver_columns(cols))}")
+
+    plans = []
+    for f in ({"month": format_key(last)}, {"quarter": f"{last // 100}-Q2"}, {"year": last // 100}):
+        for metric in ("sales", "active_stores"):
+            for compare_to in ("same_period_last_year", "previous_period"):
+                plans.append(ParsedQuery(intent="DRIVERS", metric=metric, filters=f, compare_to=compare_to, limit=50))
+
+    bad = 0
+    for plan in plans:
+        t_drivers = t_breakdowns = float("inf")
+        for _ in range(args.repeat):
+            t = time.perf_counter()
+            result = engine.execute(plan)
+            t_drivers = min(t_drivers, time.perf_counter() - t)
+            t = time.perf_counter()
+            truth = _breakdowns(engine, plan)
+            t_breakdowns = min(t_breakdowns, time.perf_counter() - t)
+        wrong = _check(result, truth)
+        bad += bool(wrong)
+        print(
+            f"{plan.metric:<14} {result.get('current_period', '-'):>17} vs {result.get('previous_period', '-'):<17} "
+            f"drivers {t_drivers * 1000:>7.1f} ms  breakdowns {t_breakdowns * 1000:>8.1f} ms"
+            + (f"  MISMATCH {wrong[:5]}" if wrong else "")
+        )
+    print(f"plans={len(plans)}  mismatches={bad}")
+    if bad:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
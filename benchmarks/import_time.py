@@ -0,0 +1,65 @@
+"""Import cost of the app's entry points, and which heavy dependencies they pull in.
+
+Each module is imported in a fresh interpreter (best of --repeat runs).
+Heavy libraries are meant to load with the subsystem that uses them:
+pandas with the first dataset, openai with the first LLM call, pdfplumber
+with the first PDF comparison. Exits 1 if a module listed in --forbid is
+imported.
+
+    python benchmarks/import_time.py
+    python benchmarks/import_time.py app.api --forbid pandas,openai,pdfplumber
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import subprocess
+import sys
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+ROOT = Path(__file__).resolve().parents[1]
+DEFAULT_MODULES = ["app.config", "app.schemas", "app.api", "app.__main__", "app.engines.sales_engine", "app.engines.pdf_compare"]
+HEAVY = ["fastapi", "numpy", "pandas", "openai", "pdfplumber", "pyarrow", "duckdb"]
+
+_PROBE = """
+import json, sys, time
+t0 = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - t0
+print(json.dumps({{"s": elapsed, "heavy": [m for m in {heavy!r} if m in sys.modules]}}))
+"""
+
+
+def measure(module: str, repeat: int) -> Tuple[float, List[str]]:
+    best, heavy = float("inf"), []
+    for _ in range(repeat):
+        out = subprocess.run(
+            [sys.executable, "-c", _PROBE.format(module=module, heavy=HEAVY)],
+            cwd=ROOT, capture_output=True, text=True, check=True,
+        )
+        res: Dict = json.loads(out.stdout.strip().splitlines()[-1])
+        best, heavy = min(best, res["s"]), res["heavy"]
+    return best, heavy
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Measure import time of app modules.")
+    ap.add_argument("modules", nargs="*", default=DEFAULT_MODULES)
+    ap.add_argument("--repeat", type=int, default=5)
+    ap.add_argument("--forbid", default="", help="comma-separated modules that must not be imported")
+    args = ap.parse_args()
+
+    forbid = {m for m in args.forbid.split(",") if m}
+    bad = 0
+    for module in args.modules:
+        elapsed, heavy = measure(module, args.repeat)
+        hit = sorted(forbid.intersection(heavy))
+        bad += bool(hit)
+        print(f"{module:<28} {elapsed * 1000:>7.0f} ms   loads: {', '.join(heavy) or '-'}{'   FORBIDDEN: ' + ', '.join(hit) if hit else ''}")
+    if bad:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+"""Closed-loop load generator for POST /chat.
+
+Drives the API with N concurrent workers for each worker count and reports
+throughput, latency percentiles and error rate. Intended to run against the
+API pointed at the stub LLM server (see app/stub_llm.py):
+
+    python -m app.stub_llm --port 8001 --plan-latency lognormal:0.6,0.4 --answer-latency uniform:0.5,1.5
+    OPENAI_BASE_URL=http://localhost:8001/v1 OPENAI_API_KEY=stub uvicorn app.api:app --port 8000
+    python benchmarks/load_chat.py --url http://localhost:8000/chat --workers 1,4,16,64 --duration 20
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List
+
+DEFAULT_QUESTIONS = [
+    "Total sales in Jan 2024",
+    "Top 5 brands by sales in 2024",
+    "Sales by salesman in Jan 2024",
+    "Sales of Delphy Cheese in Jan 2024",
+    "Promo vs non-promo sales in 2024",
+    "Active stores in Q2 2025",
+    "Sales by channel in 2025 vs last year",
+]
+
+
+def _percentile(sorted_vals: List[float], q: float) -> float:
+    if not sorted_vals:
+        return float("nan")
+    k = min(len(sorted_vals) - 1, max(0, int(round(q * (len(sorted_vals) - 1)))))
+    return sorted_vals[k]
+
+
+def _post(url: str, payload: Dict[str, Any], timeout: float) -> int:
+    req = urllib.request.Request(
+        url,
+        data=json.dumps(payload).encode("utf-8"),
+        headers={"Content-Type": "application/json"},
+        method="POST",
+    )
+    try:
+        with urllib.request.urlopen(req, timeout=timeout) as resp:
+            resp.read()
+            return resp.status
+    except urllib.error.HTTPError as e:
+        return e.code
+
+
+def run_level(url: str, questions: List[str], workers: int, duration: float, timeout: float) -> Dict[str, Any]:
+    deadline = time.perf_counter() + duration
+    lock = threading.Lock()
+    latencies: List[float] = []
+    errors: Dict[str, int] = {}
+
+    def worker(wid: int) -> None:
+        i = wid
+        while time.perf_counter() < deadline:
+            q = questions[i % len(questions)]
+            i += workers
+            t0 = time.perf_counter()
+            try:
+                status = _post(url, {"question": q}, timeout)
+                err = None if status == 200 else f"HTTP {status}"
+            except Exception as e:  # connection refused, timeouts, ...
+                err = type(e).__name__
+            dt = time.perf_counter() - t0
+            with lock:
+                if err is None:
+                    latencies.append(dt)
+                else:
+                    errors[err] = errors.get(err, 0) + 1
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as ex:
+        list(ex.map(worker, range(workers)))
+    elapsed = time.perf_counter() - started
+
+    lat = sorted(latencies)
+    total = len(lat) + sum(errors.values())
+    return {
+        "workers": workers,
+        "requests": total,
+        "ok": len(lat),
+        "throughput_rps": len(lat) / elapsed if elapsed > 0 else 0.0,
+        "p50_ms": _percentile(lat, 0.50) * 1000,
+        "p90_ms": _percentile(lat, 0.90) * 1000,
+        "p99_ms": _percentile(lat, 0.99) * 1000,
+        "max_ms": (lat[-1] * 1000) if lat else float("nan"),
+        "error_rate": (sum(errors.values()) / total) if total else 0.0,
+        "errors": errors,
+    }
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Load test POST /chat.")
+    ap.add_argument("--url", default="http://localhost:8000/chat")
+    ap.add_argument("--workers", default="1,4,16", help="Comma-separated worker counts")
+    ap.add_argument("--duration", type=float, default=10.0, help="Seconds per worker count")
+    ap.add_argument("--timeout", type=float, default=60.0)
+    ap.add_argument("--questions", default=None, help="Text file with one question per line")
+    ap.add_argument("--json", action="store_true", help="Print JSON lines instead of a table")
+    args = ap.parse_args()
+
+    questions = DEFAULT_QUESTIONS
+    if args.questions:
+        with open(args.questions, encoding="utf-8") as fh:
+            questions = [ln.strip() for ln in fh if ln.strip()]
+
+    if not args.json:
+        print(f"{'workers':>7} {'reqs':>7} {'rps':>8} {'p50ms':>8} {'p90ms':>8} {'p99ms':>8} {'maxms':>8} {'err%':>6}")
+    for w in [int(x) for x in args.workers.split(",") if x.strip()]:
+        r = run_level(args.url, questions, w, args.duration, args.timeout)
+        if args.json:
+            print(json.dumps(r))
+        else:
+            print(
+                f"{r['workers']:>7} {r['requests']:>7} {r['throughput_rps']:>8.1f} {r['p50_ms']:>8.1f} "
+                f"{r['p90_ms']:>8.1f} {r['p99_ms']:>8.1f} {r['max_ms']:>8.1f} {r['error_rate'] * 100:>6.2f}"
+            )
+            if r["errors"]:
+                print(f"{'':>7} errors: {r['errors']}")
+
+
+if __name__ == "__main__":
+    main()
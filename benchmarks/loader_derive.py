@@ -0,0 +1,119 @@
+"""Loader derivations on a synthetic sheet: row-wise vs dedupe-then-map.
+
+Builds a multi-million-row frame shaped like the pyxlsb output (float years,
+a dozen month spellings, float store ids) and times deriving the month number,
+period, quarter and store id both the old row-wise way and the way
+app.data.sales_loader does it now (factorize -> transform uniques -> take,
+integer arithmetic for period keys).
+
+    python benchmarks/loader_derive.py --rows 3000000
+"""
+from __future__ import annotations
+
+import argparse
+import re
+import sys
+import time
+from pathlib import Path
+from typing import Any, Optional
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from app.data.periods import format_key  # noqa: E402
+from app.data.sales_loader import (  # noqa: E402
+    MONTH_MAP,
+    _clean_str,
+    _factorize_map,
+    _key_labels,
+    _normalize_month_to_num,
+    _store_id,
+)
+
+MONTH_SPELLINGS = ["JAN", "Feb", "MAR ", "April", "MAY", "JUNE", "Jul", "AUG", "Sept", "OCT", "NOV", "DEC"]
+
+
+def synthetic(rows: int, stores: int = 5000, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        "Year": rng.choice([2022.0, 2023.0, 2024.0, 2025.0], rows),
+        "Month": pd.Series(np.array(MONTH_SPELLINGS, dtype=object)[rng.integers(0, 12, rows)], dtype=object),
+        "Customer Account Number": rng.integers(10000, 10000 + stores, rows).astype(np.float64),
+    })
+
+
+def rowwise(df: pd.DataFrame) -> pd.DataFrame:
+    """The loader's previous per-row derivations."""
+    def to_month(v: Any) -> Optional[int]:
+        if pd.isna(v):
+            return None
+        x = _clean_str(v).upper()
+        x = re.sub(r"\s+", "", x)
+        if x.isdigit():
+            m = int(x)
+            return m if 1 <= m <= 12 else None
+        x3 = x[:3]
+        if x3 in MONTH_MAP:
+            return MONTH_MAP[x3]
+        for k, m in MONTH_MAP.items():
+            if k in x:
+                return m
+        return None
+
+    out = pd.DataFrame(index=df.index)
+    out["_year"] = pd.to_numeric(df["Year"], errors="coerce").astype("Int64")
+    out["_month_num"] = df["Month"].map(to_month).astype("Int64")
+    out["_period"] = out["_year"].astype(int).astype(str) + "-" + out["_month_num"].astype(int).astype(str).str.zfill(2)
+    out["_quarter"] = out["_year"].astype(int).astype(str) + "-Q" + (((out["_month_num"].astype(int) - 1) // 3) + 1).astype(str)
+    out["_store_id"] = df["Customer Account Number"].map(_store_id)
+    return out
+
+
+def deduped(df: pd.DataFrame) -> pd.DataFrame:
+    out = pd.DataFrame(index=df.index)
+    year = pd.to_numeric(df["Year"], errors="coerce").astype("int64")
+    month = _normalize_month_to_num(df["Month"]).astype("int64")
+    keys = (year * 100 + month).to_numpy()
+    out["_year"] = year
+    out["_month_num"] = month
+    out["_period"] = _key_labels(keys, format_key)
+    out["_quarter"] = _key_labels((keys // 100) * 10 + (keys % 100 - 1) // 3 + 1, lambda k: f"{k // 10}-Q{k % 10}")
+    codes, ids = _factorize_map(df["Customer Account Number"], _store_id)
+    out["_store_id"] = pd.Categorical.from_codes(codes, categories=ids)
+    return out
+
+
+def _time(fn, df: pd.DataFrame, repeat: int) -> tuple:
+    best, res = float("inf"), None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        res = fn(df)
+        best = min(best, time.perf_counter() - t0)
+    return best, res
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Benchmark loader derivations.")
+    ap.add_argument("--rows", type=int, default=3_000_000)
+    ap.add_argument("--repeat", type=int, default=3)
+    args = ap.parse_args()
+
+    df = synthetic(args.rows)
+    t_old, old = _time(rowwise, df, args.repeat)
+    t_new, new = _time(deduped, df, args.repeat)
+
+    for col in old.columns:
+        a = old[col].astype(str).to_numpy()
+        b = new[col].astype(str).to_numpy()
+        if not np.array_equal(a, b):
+            raise SystemExit(f"Mismatch in {col}")
+
+    print(f"rows={args.rows:,}")
+    print(f"row-wise      {t_old * 1000:>9.0f} ms")
+    print(f"dedupe+take   {t_new * 1000:>9.0f} ms   ({t_old / t_new:.1f}x faster)")
+
+
+if __name__ == "__main__":
+    main()
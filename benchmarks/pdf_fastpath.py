@@ -0,0 +1,68 @@
+"""PO/PI line-item extraction: template fast path vs generic extract_tables().
+
+Extracts every PDF both ways, checks the line items are identical and times
+both. Exits 1 on any difference.
+
+    python benchmarks/pdf_fastpath.py Purchase_Order_2025-12-12.pdf Proforma_Invoice_2025-12-12.pdf
+
+For a new supplier layout, print a template to add to
+app/engines/pdf_templates.TEMPLATES:
+
+    python benchmarks/pdf_fastpath.py new_supplier.pdf --learn new_supplier_po
+"""
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import pdfplumber
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from app.config import settings  # noqa: E402
+from app.engines.pdf_engine import extract_line_items, items_to_df  # noqa: E402
+from app.engines.pdf_templates import learn_template, match_template, text_lines  # noqa: E402
+
+
+def _best(fn, repeat: int) -> tuple:
+    best, out = float("inf"), None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        out = fn()
+        best = min(best, time.perf_counter() - t0)
+    return best, out
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Compare template and generic PDF line-item extraction.")
+    ap.add_argument("pdfs", nargs="*", default=[settings.po_pdf, settings.pi_pdf])
+    ap.add_argument("--repeat", type=int, default=5)
+    ap.add_argument("--learn", metavar="NAME", help="print a Template for the first PDF's layout and exit")
+    args = ap.parse_args()
+
+    if args.learn:
+        with pdfplumber.open(args.pdfs[0]) as pdf:
+            print(learn_template(pdf.pages[0], args.learn))
+        return
+
+    bad = 0
+    for path in args.pdfs:
+        with pdfplumber.open(path) as pdf:
+            template = match_template(text_lines(pdf.pages[0].extract_words()))
+        t_gen, generic = _best(lambda: extract_line_items(path, fast=False), args.repeat)
+        t_fast, fast = _best(lambda: extract_line_items(path), args.repeat)
+        same = items_to_df(generic).equals(items_to_df(fast))
+        bad += not same
+        print(
+            f"{Path(path).name}: template={template.name if template else '-'} items={len(fast)} "
+            f"generic {t_gen * 1000:.1f} ms  fast {t_fast * 1000:.1f} ms  ({t_gen / t_fast:.2f}x)  "
+            f"{'identical' if same else 'MISMATCH'}"
+        )
+    if bad:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
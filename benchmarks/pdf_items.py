@@ -0,0 +1,150 @@
+"""Line-item handling after extraction: per-row dataclasses vs columnar batches.
+
+Builds synthetic PO/PI line items (some missing on either side, some with
+qty/price/discount/tax differences) and times the old chain (dataclass per
+row -> dict per row -> DataFrame -> iterrows compare) against the current one
+(LineItems batch -> zero-copy DataFrame -> vectorised compare_items). The
+discrepancy lists must be identical.
+
+    python benchmarks/pdf_items.py --lines 50000
+"""
+from __future__ import annotations
+
+import argparse
+import math
+import sys
+import time
+import tracemalloc
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from app.engines.pdf_compare import compare_items  # noqa: E402
+from app.engines.pdf_engine import LineItems, items_to_df  # noqa: E402
+
+Row = Tuple[str, str, int, float, float, float]
+
+
+@dataclass
+class OldLineItem:
+    sku: str
+    description: str
+    qty: int
+    unit_price: float
+    discount_pct: float
+    tax_pct: float
+
+
+def synthetic(lines: int, seed: int = 0) -> Tuple[List[Row], List[Row]]:
+    rng = np.random.default_rng(seed)
+    po: List[Row] = []
+    pi: List[Row] = []
+    for i in range(lines):
+        row = (f"A{i:07d}", f"Item {i}", int(rng.integers(1, 100)), float(rng.integers(100, 10000)) / 100, 5.0, 7.5)
+        r = rng.random()
+        if r < 0.01:
+            po.append(row)  # missing in PI
+            continue
+        if r < 0.02:
+            pi.append(row)  # missing in PO
+            continue
+        po.append(row)
+        if r < 0.05:
+            row = (row[0], row[1], row[2] + 1, row[3] * 1.1, row[4], float("nan") if r < 0.03 else 5.0)
+        pi.append(row)
+    return po, pi
+
+
+def old_extract(rows: List[Row]) -> List[OldLineItem]:
+    return [OldLineItem(*r) for r in rows]
+
+
+def old_items_to_df(items: List[OldLineItem]) -> pd.DataFrame:
+    return pd.DataFrame([{
+        "sku": it.sku, "description": it.description, "qty": it.qty,
+        "unit_price": it.unit_price, "discount_pct": it.discount_pct, "tax_pct": it.tax_pct,
+    } for it in items])
+
+
+def old_compare(po_items: pd.DataFrame, pi_items: pd.DataFrame) -> List[Dict[str, Any]]:
+    """The previous iterrows-based comparison from compare_po_pi."""
+    merged = po_items.merge(pi_items, on="sku", how="outer", suffixes=("_po", "_pi"), indicator=True)
+
+    def neq(a, b, tol=1e-6):
+        if pd.isna(a) and pd.isna(b):
+            return False
+        if isinstance(a, (int, float, np.number)) and isinstance(b, (int, float, np.number)):
+            return abs(float(a) - float(b)) > tol
+        return str(a) != str(b)
+
+    out = []
+    for _, r in merged.iterrows():
+        issues = []
+        if r["_merge"] != "both":
+            issues.append("MISSING_IN_" + ("PI" if r["_merge"] == "left_only" else "PO"))
+        if neq(r.get("qty_po"), r.get("qty_pi"), tol=0):
+            issues.append("QTY_MISMATCH")
+        if neq(r.get("unit_price_po"), r.get("unit_price_pi"), tol=0.01):
+            issues.append("UNIT_PRICE_MISMATCH")
+        if neq(r.get("discount_pct_po"), r.get("discount_pct_pi"), tol=0.01):
+            issues.append("DISCOUNT_MISMATCH")
+        if neq(r.get("tax_pct_po"), r.get("tax_pct_pi"), tol=0.01):
+            issues.append("TAX_MISMATCH")
+        if issues:
+            side = lambda s: {f: r.get(f + s) for f in ("description", "qty", "unit_price", "discount_pct", "tax_pct")}  # noqa: E731
+            out.append({"sku": r["sku"], "issues": issues, "po": side("_po"), "pi": side("_pi")})
+    return out
+
+
+def new_extract(rows: List[Row]) -> LineItems:
+    items = LineItems()
+    for r in rows:
+        items.append(*r)
+    return items
+
+
+def _same(a: Any, b: Any) -> bool:
+    if isinstance(a, dict):
+        return a.keys() == b.keys() and all(_same(a[k], b[k]) for k in a)
+    if isinstance(a, list):
+        return len(a) == len(b) and all(_same(x, y) for x, y in zip(a, b))
+    if isinstance(a, float) and isinstance(b, float) and math.isnan(a) and math.isnan(b):
+        return True
+    return a == b
+
+
+def _run(extract, to_df, compare, po_rows: List[Row], pi_rows: List[Row]) -> Tuple[float, int, List[Dict[str, Any]]]:
+    """Wall time of one run, then peak traced allocations of a second (tracemalloc slows it down)."""
+    t0 = time.perf_counter()
+    out = compare(to_df(extract(po_rows)), to_df(extract(pi_rows)))
+    elapsed = time.perf_counter() - t0
+    tracemalloc.start()
+    compare(to_df(extract(po_rows)), to_df(extract(pi_rows)))
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return elapsed, peak, out
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Benchmark line-item containers and comparison.")
+    ap.add_argument("--lines", type=int, default=50_000)
+    args = ap.parse_args()
+
+    po_rows, pi_rows = synthetic(args.lines)
+    t_old, m_old, old = _run(old_extract, old_items_to_df, old_compare, po_rows, pi_rows)
+    t_new, m_new, new = _run(new_extract, items_to_df, compare_items, po_rows, pi_rows)
+    if not _same(old, new):
+        raise SystemExit("Mismatch between old and new discrepancy lists")
+
+    print(f"lines={args.lines:,}  discrepancies={len(new):,}")
+    print(f"dataclass+dicts+iterrows  {t_old * 1000:>8.0f} ms   peak {m_old / 2**20:>6.1f} MiB")
+    print(f"columnar+vectorised       {t_new * 1000:>8.0f} ms   peak {m_new / 2**20:>6.1f} MiB   ({t_old / t_new:.1f}x faster)")
+
+
+if __name__ == "__main__":
+    main()
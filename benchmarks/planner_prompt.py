@@ -0,0 +1,133 @@
+"""Planner prompt size: full nullable-filters schema vs the compact plan encoding.
+
+Offline (default) it reports input/output token counts per request for both
+encodings over a set of representative plans. With --live N it also sends N
+questions per encoding to the configured Responses endpoint and reports median
+latency plus provider-reported input and cached tokens.
+
+    python benchmarks/planner_prompt.py
+    OPENAI_API_KEY=... python benchmarks/planner_prompt.py --live 10
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from app.planner import PARSED_QUERY_SCHEMA, build_prompt, plan_to_compact  # noqa: E402
+from app.schemas import Filters, ParsedQuery  # noqa: E402
+from app.stub_llm import STUB_PLANS  # noqa: E402
+
+try:
+    import tiktoken
+
+    _enc = tiktoken.get_encoding("o200k_base")
+
+    def count_tokens(s: str) -> int:
+        return len(_enc.encode(s))
+except ImportError:  # rough estimate without tiktoken
+    def count_tokens(s: str) -> int:
+        return max(1, len(s) // 4)
+
+
+QUESTIONS = [
+    "Total sales in Jan 2024",
+    "Top 5 brands by sales in 2024",
+    "Sales by salesman in Jan 2024",
+    "Active stores for Delphy in Q2 2025 vs last year",
+    "Sales of Neo in Jan, Mar and Apr 2025 by channel",
+]
+
+
+def full_schema() -> Dict[str, Any]:
+    """The previous encoding: every filter key present as a required nullable field."""
+    props: Dict[str, Any] = {}
+    for name, field in Filters.model_fields.items():
+        if name == "match":
+            continue
+        if name == "months":
+            props[name] = {"type": ["array", "null"], "items": {"type": "string"}}
+        elif name == "year":
+            props[name] = {"type": ["integer", "null"]}
+        else:
+            props[name] = {"type": ["string", "null"]}
+        if field.description:
+            props[name]["description"] = field.description
+    schema = json.loads(json.dumps(PARSED_QUERY_SCHEMA))
+    schema["properties"]["filters"] = {
+        "type": "object",
+        "additionalProperties": False,
+        "properties": props,
+        "required": list(props),
+    }
+    return schema
+
+
+def offline_report() -> None:
+    full, compact = full_schema(), PARSED_QUERY_SCHEMA
+    prompt = build_prompt(QUESTIONS[0])
+    in_full = count_tokens(prompt) + count_tokens(json.dumps(full))
+    in_compact = count_tokens(prompt) + count_tokens(json.dumps(compact))
+
+    plans = [ParsedQuery.model_validate(p) for p in STUB_PLANS]
+    out_full = [count_tokens(json.dumps(p.model_dump())) for p in plans]
+    out_compact = [count_tokens(json.dumps(plan_to_compact(p))) for p in plans]
+
+    print(f"{'':<28}{'full':>10}{'compact':>10}{'saved':>8}")
+    print(f"{'input tokens / request':<28}{in_full:>10}{in_compact:>10}{1 - in_compact / in_full:>8.0%}")
+    mf, mc = statistics.mean(out_full), statistics.mean(out_compact)
+    print(f"{'output tokens / plan (mean)':<28}{mf:>10.1f}{mc:>10.1f}{1 - mc / mf:>8.0%}")
+
+
+def _live(schema: Dict[str, Any], n: int) -> Dict[str, float]:
+    from app.config import settings
+    from app.llm import client
+
+    lat: List[float] = []
+    inp: List[int] = []
+    cached: List[int] = []
+    out: List[int] = []
+    for i in range(n):
+        t0 = time.perf_counter()
+        resp = client().responses.create(
+            model=settings.openai_model,
+            input=build_prompt(QUESTIONS[i % len(QUESTIONS)]),
+            text={"format": {"type": "json_schema", "name": "ParsedQuery", "schema": schema, "strict": True}},
+            temperature=0,
+            max_output_tokens=800,
+        )
+        lat.append(time.perf_counter() - t0)
+        u = resp.usage
+        if u is not None:
+            inp.append(u.input_tokens)
+            out.append(u.output_tokens)
+            cached.append(getattr(u.input_tokens_details, "cached_tokens", 0) or 0)
+    return {
+        "p50_ms": statistics.median(lat) * 1000,
+        "input_tokens": statistics.mean(inp) if inp else float("nan"),
+        "cached_tokens": statistics.mean(cached) if cached else float("nan"),
+        "output_tokens": statistics.mean(out) if out else float("nan"),
+    }
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--live", type=int, default=0, help="Also call the LLM N times per encoding")
+    args = ap.parse_args()
+
+    offline_report()
+    if args.live:
+        print()
+        for name, schema in (("full", full_schema()), ("compact", PARSED_QUERY_SCHEMA)):
+            r = _live(schema, args.live)
+            print(f"{name:<8} " + "  ".join(f"{k}={v:.1f}" for k, v in r.items()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""Replays a /chat query log (QUERY_LOG) against the sales engine.
+
+Re-executes the logged plans in order (no LLM calls), checks every result
+against the logged result_hash and reports latency next to the logged
+execute time. Exits 1 on any mismatch.
+
+Hashes are exact, so results are only checked when the replaying engine uses
+the backend that served the record (pandas and duckdb sum floats in different
+orders; benchmarks/backend_conformance.py compares those with a tolerance).
+
+    QUERY_LOG=logs/queries.jsonl uvicorn app.api:app --port 8000   # capture
+    python benchmarks/replay_log.py logs/queries.jsonl --save replay_new.jsonl
+
+To compare two engine versions on the same machine, replay from each checkout
+and pass the other run's --save file with --against.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from app.config import settings  # noqa: E402
+from app.engines.registry import DEFAULT_DATASET, EngineRegistry, parse_datasets  # noqa: E402
+from app.query_log import read_log, result_hash  # noqa: E402
+from app.schemas import ParsedQuery  # noqa: E402
+
+
+def _percentile(vals: List[float], q: float) -> float:
+    if not vals:
+        return float("nan")
+    s = sorted(vals)
+    return s[min(len(s) - 1, max(0, int(round(q * (len(s) - 1)))))]
+
+
+def _summary(label: str, ms: List[float]) -> str:
+    return f"{label:<14} p50 {_percentile(ms, 0.5):>8.2f} ms  p95 {_percentile(ms, 0.95):>8.2f} ms  total {sum(ms) / 1000:>7.2f} s"
+
+
+def _load_saved(path: Optional[str]) -> Dict[int, Dict[str, Any]]:
+    if not path:
+        return {}
+    with open(path, "r", encoding="utf-8") as fh:
+        return {r["line"]: r for r in map(json.loads, fh)}
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Replay logged /chat plans and check results.")
+    ap.add_argument("log", nargs="?", default=settings.query_log, help="query log (rotated backups are included)")
+    ap.add_argument("--dataset", help="replay every record against this dataset id")
+    ap.add_argument("--sales-file", help="replay against this file/directory/glob instead of the configured datasets")
+    ap.add_argument("--limit", type=int, default=0)
+    ap.add_argument("--repeat", type=int, default=1, help="executions per plan; the fastest is reported")
+    ap.add_argument("--save", help="write per-record timings and hashes (JSON lines)")
+    ap.add_argument("--against", help="a --save file from another engine version to compare with")
+    args = ap.parse_args()
+    if not args.log:
+        raise SystemExit("No log given and QUERY_LOG is not set")
+
+    if args.sales_file:
+        registry = EngineRegistry({DEFAULT_DATASET: args.sales_file}, 0)
+    else:
+        registry = EngineRegistry(parse_datasets(settings.sales_datasets, settings.sales_file), 0, settings.snapshot_dir)
+    other = _load_saved(args.against)
+
+    replayed: List[Dict[str, Any]] = []
+    mismatches = skipped = unchecked = 0
+    logged_ms: List[float] = []
+    for line, rec in enumerate(read_log(args.log)):
+        if args.limit and len(replayed) >= args.limit:
+            break
+        if "executed" not in rec or "result_hash" not in rec:
+            skipped += 1  # clarification / unsupported / PDF turns
+            continue
+        dataset = DEFAULT_DATASET if args.sales_file else (args.dataset or rec.get("dataset") or DEFAULT_DATASET)
+        try:
+            engine = registry.get(dataset)
+        except KeyError:
+            skipped += 1
+            continue
+        plan = ParsedQuery.model_validate(rec["executed"])
+        best = float("inf")
+        for _ in range(max(1, args.repeat)):
+            t0 = time.perf_counter()
+            result = engine.execute_session(plan, approximate=rec.get("approximate", False))[0]
+            best = min(best, time.perf_counter() - t0)
+        digest = result_hash(result)
+        if rec.get("backend", engine.backend) != engine.backend:
+            unchecked += 1
+        elif digest != rec["result_hash"]:
+            mismatches += 1
+            print(f"MISMATCH line {line}: {rec.get('question', '')!r} plan={json.dumps(rec['executed'])}")
+        replayed.append({"line": line, "result_hash": digest, "ms": best * 1000})
+        logged_ms.append(rec.get("timings_ms", {}).get("execute", float("nan")))
+
+    print(f"replayed {len(replayed)}  skipped {skipped}  mismatches {mismatches}  unchecked (other backend) {unchecked}")
+    print(_summary("logged", [m for m in logged_ms if m == m]))
+    print(_summary("replay", [r["ms"] for r in replayed]))
+    if other:
+        both = [r for r in replayed if r["line"] in other]
+        differ = sum(r["result_hash"] != other[r["line"]]["result_hash"] for r in both)
+        print(_summary("against", [other[r["line"]]["ms"] for r in both]))
+        print(f"against: {len(both)} common records, {differ} with different results")
+        mismatches += differ
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as fh:
+            for r in replayed:
+                fh.write(json.dumps(r) + "\n")
+    if mismatches:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
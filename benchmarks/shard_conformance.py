@@ -0,0 +1,125 @@
+"""Conformance + timing of the sharded engine (SALES_SHARDS) against a single engine.
+
+Writes a Parquet snapshot of the sales data, starts one worker process per
+year (or quarter) over it and runs the backend conformance plans plus
+STORE_COHORT and DRIVERS plans through both. Results must match as in
+backend_conformance.py (cohort tables as sets, DRIVERS tables by value).
+Exits 1 on any mismatch.
+
+    python benchmarks/shard_conformance.py --file Sales_Active_Stores_Data.xlsb --by year
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict, List
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from backend_conformance import _close, build_plans, diff  # noqa: E402
+
+from app.config import settings  # noqa: E402
+from app.data.periods import format_key  # noqa: E402
+from app.data.sales_loader import load_sales_dataframe  # noqa: E402
+from app.data.snapshot import read_snapshot, snapshot_periods, write_snapshot  # noqa: E402
+from app.engines.sales_engine import SalesEngine  # noqa: E402
+from app.engines.shards import ShardedEngine  # noqa: E402
+from app.schemas import ParsedQuery  # noqa: E402
+
+
+def cohort_plans(engine: SalesEngine) -> List[Dict[str, Any]]:
+    assert engine.periods is not None and engine.periods.last is not None
+    last = engine.periods.last
+    brand = str(engine.df[engine.cols.brand].value_counts().index[0]) if engine.cols.brand else None
+    out = []
+    for f in ({"month": format_key(last)}, {"quarter": f"{last // 100}-Q2"}, {"year": last // 100}, {"last_n_months": 3}):
+        for compare_to in ("previous_period", "same_period_last_year"):
+            out.append({"intent": "STORE_COHORT", "filters": f, "compare_to": compare_to})
+            if brand:
+                out.append({"intent": "STORE_COHORT", "filters": {**f, "brand": brand}, "compare_to": compare_to})
+    return out
+
+
+def driver_plans(engine: SalesEngine) -> List[Dict[str, Any]]:
+    """DRIVERS (sales only on shards) for the cohort plans' periods."""
+    return [{**p, "intent": "DRIVERS", "metric": "sales", "limit": 20} for p in cohort_plans(engine)]
+
+
+def drivers_diff(a: Dict[str, Any], b: Dict[str, Any]) -> List[str]:
+    out = [k for k in sorted(set(a) | set(b)) if k not in ("table", "by_dimension") and not _close(a.get(k), b.get(k))]
+    # rows tied on |delta| may swap, so compare the ranked impacts and every row both share
+    ta, tb = a.get("table", []), b.get("table", [])
+    same = len(ta) == len(tb) and all(_close(abs(x["delta"]), abs(y["delta"])) for x, y in zip(ta, tb))
+    rows_b = {(r["dimension"], r["group"]): r for r in tb}
+    for r in ta:
+        other = rows_b.get((r["dimension"], r["group"]))
+        if other is not None and not all(_close(r[k], other[k]) for k in ("current", "previous", "delta")):
+            same = False
+    if not same:
+        out.append("table")
+    if set(a.get("by_dimension", {})) != set(b.get("by_dimension", {})):
+        out.append("by_dimension")
+    return out
+
+
+def cohort_diff(a: Dict[str, Any], b: Dict[str, Any]) -> List[str]:
+    out = [k for k in sorted(set(a) | set(b)) if k != "table" and a.get(k) != b.get(k)]
+    key = lambda r: tuple(sorted(r.items()))  # noqa: E731
+    if sorted(map(key, a.get("table", []))) != sorted(map(key, b.get("table", []))):
+        out.append("table")
+    return out
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Check the sharded engine against a single engine.")
+    ap.add_argument("--file", default=settings.sales_file)
+    ap.add_argument("--by", default="year", choices=["year", "quarter"])
+    ap.add_argument("--repeat", type=int, default=3)
+    args = ap.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        snap = os.path.join(tmp, "sales.parquet")
+        df, cols = load_sales_dataframe(args.file)
+        write_snapshot(df, cols, snap)
+        del df
+        single = SalesEngine(*read_snapshot(snap))
+        t0 = time.perf_counter()
+        sharded = ShardedEngine(snap, cols, snapshot_periods(snap), args.by)
+        print(f"rows={len(single.df):,}  shards={len(sharded.ranges)} rows/shard={sharded.shard_rows}  start {time.perf_counter() - t0:.2f}s")
+
+        plans = [ParsedQuery(**p) for p in build_plans(single) + cohort_plans(single) + driver_plans(single)]
+        timings = {"single": 0.0, "sharded": 0.0}
+        bad = 0
+        for plan in plans:
+            results = {}
+            for name, engine in (("single", single), ("sharded", sharded)):
+                best = float("inf")
+                for _ in range(args.repeat):
+                    s = time.perf_counter()
+                    results[name] = engine.execute(plan)
+                    best = min(best, time.perf_counter() - s)
+                timings[name] += best
+            if plan.intent == "STORE_COHORT":
+                keys = cohort_diff(results["single"], results["sharded"])
+            elif plan.intent == "DRIVERS":
+                keys = drivers_diff(results["single"], results["sharded"])
+            else:
+                keys = diff(plan.model_dump(), results["single"], results["sharded"])
+            if keys:
+                bad += 1
+                print(f"MISMATCH {keys}: {plan.model_dump(exclude_none=True)}")
+        sharded.close()
+
+    print(f"plans={len(plans)}  mismatches={bad}")
+    for name, t in timings.items():
+        print(f"{name:<8} total {t * 1000:>8.1f} ms   mean {t / len(plans) * 1000:>6.2f} ms/plan")
+    if bad:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()